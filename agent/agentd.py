@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Agent Daemon
+Long-lived agent process that keeps the environment, repo handles, HTTP
+sessions and planner loaded, and runs goals and plans submitted over a local
+Unix socket. main.py hands its work to this daemon when it is running, so a
+cycle no longer pays for interpreter start-up, imports and tool setup.
+
+Protocol: one JSON object per line in each direction, with ``op`` one of
+ping, submit, wait, status or shutdown.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import signal
+import threading
+import socketserver
+from typing import Dict, Any, Optional
+
+# Only the standard library is imported at module level: main.py imports this
+# module just to talk to the socket and must stay fast to start.
+
+AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def socket_path() -> str:
+    return os.getenv('AGENT_SOCKET') or os.path.join(AGENT_DIR, 'logs', 'agentd.sock')
+
+
+def call(message: Dict[str, Any], timeout: Optional[float] = None, path: Optional[str] = None) -> Dict[str, Any]:
+    """Send one request to the daemon and return its reply; OSError if it isn't running"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or socket_path())
+        sock.sendall(json.dumps(message).encode() + b'\n')
+        line = sock.makefile('rb').readline()
+    if not line:
+        raise ConnectionError('agentd closed the connection')
+    return json.loads(line)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = self.server.agent.handle(json.loads(line))
+            except Exception as e:
+                reply = {'ok': False, 'error': str(e)}
+            self.wfile.write(json.dumps(reply, default=str).encode() + b'\n')
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class AgentDaemon:
+    """Runs submitted goals/plans one at a time on warm tools.
+
+    Jobs go through the same FixJobQueue the monitor uses. One worker by
+    default (``AGENT_DAEMON_WORKERS``): sequential runs check branches out in
+    the repo's main worktree, so two of them must not overlap. ``--jobs`` > 1
+    still fans a plan's tasks out over worktrees within a job.
+    """
+
+    def __init__(self, path: Optional[str] = None, workers: Optional[int] = None):
+        from dotenv import load_dotenv
+        load_dotenv(os.path.join(AGENT_DIR, '.env'))
+
+        # Warm everything a cycle needs once; later jobs reuse it
+        import planner
+        import pipeline
+        from tools.github_tool import GitHubTool
+        from tools.fix_queue import FixJobQueue
+        self.planner = planner
+        self.pipeline = pipeline
+        self.gh = GitHubTool(repo_slug=os.getenv('GITHUB_REPO', ''))
+        self.path = path or socket_path()
+        self.started = time.time()
+        self.queue = FixJobQueue(self._run, workers=workers or int(os.getenv('AGENT_DAEMON_WORKERS', '1')),
+                                 deadline=float(os.getenv('AGENT_DAEMON_DEADLINE', '3600')))
+        self._tools: Dict[str, Any] = {}
+        self._tools_lock = threading.Lock()
+        self.server = None
+
+    def tools_for(self, cwd: str):
+        """(RepoTool, NodeTool) for a client's working directory, created once and kept"""
+        from tools.repo_tool import RepoTool
+        from tools.node_tool import NodeTool
+        cwd = os.path.realpath(cwd)
+        with self._tools_lock:
+            if cwd not in self._tools:
+                self._tools[cwd] = (RepoTool(path=cwd, workdir=cwd),
+                                    NodeTool(client_dir=os.path.join(cwd, os.getenv('CLIENT_DIR', 'client')),
+                                             server_dir=os.path.join(cwd, os.getenv('SERVER_DIR', 'server'))))
+            return self._tools[cwd]
+
+    def _run(self, goal: str, deadline: float, request: Dict[str, Any]) -> Dict[str, Any]:
+        from tools.tracing import span
+        repo, node = self.tools_for(request['cwd'])
+        tasks = request.get('tasks') or self.planner.plan_from_goal(goal, repo.head())
+        jobs = int(request.get('jobs') or 1)
+        print(f"Planned {len(tasks)} task(s) for: {goal}", flush=True)
+        with span('cycle', goal=request.get('goal'), plan=request.get('plan'), tasks=len(tasks), jobs=jobs, daemon=True):
+            if jobs > 1 and len(tasks) > 1:
+                results = self.pipeline.run_parallel(tasks, repo, self.gh, jobs,
+                                                     os.getenv('CLIENT_DIR', 'client'),
+                                                     os.getenv('SERVER_DIR', 'server'), deadline)
+            else:
+                results = self.pipeline.run_sequential(tasks, repo, node, self.gh, deadline)
+        return {'success': all(r['ok'] for r in results), 'results': results}
+
+    def handle(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        op = message.get('op')
+        if op == 'ping':
+            jobs = self.queue.status()
+            return {'ok': True, 'pid': os.getpid(), 'uptime': round(time.time() - self.started, 1),
+                    'active': sum(j['state'] in ('queued', 'running') for j in jobs), 'jobs': len(jobs)}
+        if op == 'submit':
+            if not message.get('cwd') or not (message.get('goal') or message.get('tasks')):
+                return {'ok': False, 'error': 'submit needs cwd and a goal or tasks'}
+            goal = message.get('goal') or f"plan {os.path.basename(message.get('plan') or '-')} ({len(message['tasks'])} tasks)"
+            job, _ = self.queue.submit(goal, payload=message)
+            return {'ok': True, 'job': self._public(job)}
+        if op == 'wait':
+            # The waiting client is the job's owner; once it has the outcome the daemon can forget it
+            job = self.queue.wait_for(message.get('id', ''), message.get('timeout'), collect=True)
+            return {'ok': True, 'job': self._public(job)} if job else {'ok': False, 'error': 'unknown job'}
+        if op == 'status':
+            return {'ok': True, 'jobs': [self._public(j) for j in self.queue.status()]}
+        if op == 'shutdown':
+            threading.Thread(target=self.stop, daemon=True).start()
+            return {'ok': True}
+        return {'ok': False, 'error': f"unknown op: {op}"}
+
+    @staticmethod
+    def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+        # The request payload can be a whole plan; clients already have it
+        return {k: v for k, v in job.items() if k != 'payload'}
+
+    def serve(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        try:
+            call({'op': 'ping'}, timeout=1, path=self.path)
+            raise SystemExit(f"agentd already running on {self.path}")
+        except OSError:
+            # Nobody answers: whatever is at the path is a stale socket
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        self.server = _Server(self.path, _Handler)
+        self.server.agent = self
+        print(f"agentd {os.getpid()} listening on {self.path}", flush=True)
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            self.queue.shutdown(wait=False)
+            print("agentd stopped", flush=True)
+
+    def stop(self, *_):
+        if self.server:
+            # shutdown() blocks until serve_forever returns, so never call it on that thread
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+
+
+def main():
+    if '--ping' in sys.argv or '--status' in sys.argv:
+        try:
+            reply = call({'op': 'ping' if '--ping' in sys.argv else 'status'}, timeout=5)
+        except OSError as e:
+            print(f"agentd not running ({socket_path()}): {e}")
+            sys.exit(1)
+        print(json.dumps(reply, indent=2))
+        return
+    if '--stop' in sys.argv:
+        try:
+            call({'op': 'shutdown'}, timeout=5)
+        except OSError as e:
+            print(f"agentd not running: {e}")
+        return
+    daemon = AgentDaemon()
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.serve()
+
+
+if __name__ == "__main__":
+    main()
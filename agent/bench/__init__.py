@@ -0,0 +1 @@
+"""Offline benchmarks: local Render/GitHub stand-ins and a runner (python3 -m bench.run)."""
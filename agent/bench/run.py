@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark suite
+Drives the deploy, monitor and task-loop entry points against local Render and
+GitHub stand-ins and a throwaway git repo, and saves the results as JSON.
+
+    cd agent && python3 -m bench.run [--iterations N] [--latency MS] [--log-kb KB] [--compare FILE]
+"""
+import io
+import os
+import sys
+import json
+import time
+import runpy
+import shutil
+import platform
+import argparse
+import resource
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+from datetime import datetime
+from typing import Dict, Any, List, Callable
+from bench.standins import RenderStandin, GitHubStandin, build_log
+from tools.deploy_store import percentile
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ('deploy', 'monitor', 'analyze', 'tasks')
+SERVICE_ID = 'srv-bench'
+
+
+def bench_env(tmp: str, render: RenderStandin, github: GitHubStandin, args) -> Dict[str, str]:
+    """Environment pointing every agent component at the stand-ins and the temp dir.
+
+    Everything is set explicitly (possibly to '') so a developer's agent/.env,
+    which the entry points load without overriding, cannot leak real endpoints in.
+    """
+    return {
+        'RENDER_API_URL': render.url,
+        'RENDER_API_TOKEN': 'bench-token',
+        'RENDER_SERVICE_ID': SERVICE_ID,
+        'RENDER_SERVICE_IDS': '',
+        'RENDER_DEPLOY_HOOK_URL': '',
+        'RENDER_CANCEL_ON_FAILURE': '',
+        'RENDER_LOG_TAIL_INTERVAL': '1',
+        'GIT_SHA': '',
+        'GIT_REMOTE': 'origin',
+        'GITHUB_API_URL': github.url,
+        'GITHUB_TOKEN': 'bench-token',
+        'GITHUB_REPO': 'bench/app',
+        'GITHUB_DEFAULT_BRANCH': 'main',
+        'GITHUB_RATE': str(args.github_rate),
+        'CLIENT_DIR': 'client',
+        'SERVER_DIR': 'server',
+        'AGENT_DEPLOY_DB': os.path.join(tmp, 'deploys.db'),
+        'AGENT_LOG_ARCHIVE': os.path.join(tmp, 'archive'),
+        'AGENT_SCRIPT_CACHE_DIR': os.path.join(tmp, 'script-cache'),
+        'AGENT_WORKTREE_DIR': '',
+        # Measure main.py's own task loop, not a hand-off to a running agentd
+        'AGENT_DAEMON': 'off',
+        # Each monitor iteration sees the same errors; the index would (rightly) suppress the fix
+        'AGENT_FINGERPRINT_DB': 'off',
+    }
+
+
+def make_repo(tmp: str) -> str:
+    """A small client/server repo on `main` with a bare `origin` to push to"""
+    origin = os.path.join(tmp, 'origin.git')
+    work = os.path.join(tmp, 'app')
+    git = lambda *a, cwd=work: subprocess.run(['git', *a], cwd=cwd, check=True, capture_output=True)
+    os.makedirs(work)
+    git('init', '--bare', '-q', origin, cwd=tmp)
+    git('init', '-q', '-b', 'main')
+    git('config', 'user.email', 'bench@example.com')
+    git('config', 'user.name', 'bench')
+    for d in ('client/src', 'server/src', 'shared'):
+        os.makedirs(os.path.join(work, d))
+        for i in range(20):
+            with open(os.path.join(work, d, f"module{i}.ts"), 'w') as fh:
+                fh.write(f"export const value{i} = {i};\n" * 50)
+    git('add', '-A')
+    git('commit', '-q', '-m', 'initial')
+    git('remote', 'add', 'origin', origin)
+    git('push', '-q', 'origin', 'main')
+    return work
+
+
+def summarize(name: str, latencies: List[float], units: float, unit: str, failures: int,
+              peak_bytes: int, requests: Dict[str, Any]) -> Dict[str, Any]:
+    total = sum(latencies)
+    ms = [x * 1000 for x in latencies]
+    return {
+        'scenario': name,
+        'iterations': len(latencies),
+        'failures': failures,
+        'seconds': round(total, 4),
+        'throughput': round(units / total, 3) if total else None,
+        'unit': f"{unit}/s",
+        'latency_ms': {
+            'p50': round(percentile(ms, 50), 3),
+            'p90': round(percentile(ms, 90), 3),
+            'p95': round(percentile(ms, 95), 3),
+            'p99': round(percentile(ms, 99), 3),
+            'max': round(max(ms), 3),
+            'mean': round(sum(ms) / len(ms), 3),
+        },
+        'peak_memory_kb': peak_bytes // 1024,
+        'requests': requests,
+    }
+
+
+def measure(name: str, step: Callable[[int], bool], iterations: int, units_per_iteration: float,
+            unit: str, servers, quiet: bool = True) -> Dict[str, Any]:
+    """Run `step(i)` `iterations` times; it returns whether that iteration succeeded"""
+    for s in servers:
+        s.reset_stats()
+    latencies, failures = [], 0
+    tracemalloc.reset_peak()
+    out = io.StringIO() if quiet else sys.stdout
+    for i in range(iterations):
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(out):
+            ok = step(i)
+        latencies.append(time.perf_counter() - started)
+        failures += 0 if ok else 1
+        if quiet:
+            out.seek(0); out.truncate()
+    peak = tracemalloc.get_traced_memory()[1]
+    return summarize(name, latencies, units_per_iteration * iterations, unit, failures, peak,
+                     {s.name: s.stats() for s in servers})
+
+
+def run_deploy(args, render, github) -> Dict[str, Any]:
+    import deploy_render
+
+    def step(i):
+        # A fresh commit per iteration so nothing is coalesced or skipped as already live
+        os.environ['GIT_SHA'] = f"{i:040x}"
+        return deploy_render.main() == 0
+    try:
+        return measure('deploy', step, args.iterations, 1, 'deploys', [render], args.quiet)
+    finally:
+        os.environ['GIT_SHA'] = ''
+
+
+def run_monitor(args, render, github) -> Dict[str, Any]:
+    """Failed build -> errors detected while tailing -> fix job -> redeploy -> live"""
+    from monitor_render import RenderDeploymentMonitor
+    from tools.fix_queue import FixJobQueue
+
+    def redeploy(goal, deadline, request=None):
+        # Stands in for the fix PR being merged and deployed
+        deploy = render.create_deploy(SERVICE_ID, None, failed=False)
+        return {'success': True, 'results': [{'branch': None, 'pr': None, 'deploy_id': deploy['id']}]}
+
+    def step(i):
+        render.create_deploy(SERVICE_ID, None, failed=True)
+        monitor = RenderDeploymentMonitor()
+        monitor.fix_queue = FixJobQueue(redeploy, workers=1, deadline=60, on_done=monitor._fix_done)
+        try:
+            ok = monitor.monitor_deployment(timeout=args.monitor_timeout, check_interval=args.poll_interval)
+            jobs = monitor.wait_for_fixes(timeout=10)
+        finally:
+            monitor.fix_queue.shutdown()
+        return ok and len(jobs) == 1 and jobs[0]['state'] == 'succeeded'
+    return measure('monitor', step, args.iterations, 1, 'deploys', [render], args.quiet)
+
+
+def run_analyze(args, render, github) -> Dict[str, Any]:
+    from monitor_render import RenderDeploymentMonitor
+    monitor = RenderDeploymentMonitor()
+    log = build_log(args.log_kb * 1024, failed=True).decode()
+    return measure('analyze', lambda i: len(monitor.analyze_build_failure(log)) > 0,
+                   args.iterations, len(log) / 1e6, 'MB', [], args.quiet)
+
+
+def run_tasks(args, render, github, tmp) -> Dict[str, Any]:
+    """The main.py task loop: branch, edit, commit, push and a batched PR submission"""
+    repo = make_repo(tmp)
+    plan = os.path.join(tmp, 'plan.json')
+    with open(plan, 'w') as fh:
+        json.dump([{'title': f"bench task {n}", 'acceptance': 'benchmark', 'npmScripts': [],
+                    'files': [f"client/src/module{n % 20}.ts", f"server/src/module{n % 20}.ts"]}
+                   for n in range(args.tasks)], fh)
+    main_py = os.path.join(AGENT_DIR, 'main.py')
+
+    def step(i):
+        argv, cwd = sys.argv, os.getcwd()
+        sys.argv = [main_py, '--plan', plan, '--jobs', str(args.jobs)]
+        os.chdir(repo)
+        try:
+            results = runpy.run_path(main_py, run_name='__main__')['results']
+        finally:
+            sys.argv = argv
+            os.chdir(cwd)
+        return all(r['ok'] and r['pr'] for r in results)
+    return measure('tasks', step, args.iterations, args.tasks, 'tasks', [github], args.quiet)
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Percent change per scenario against an earlier results file (positive = bigger)"""
+    change = lambda new, old: round((new - old) / old * 100, 1) if new is not None and old else None
+    out = {}
+    for name, now in current['scenarios'].items():
+        then = baseline.get('scenarios', {}).get(name)
+        if not then:
+            continue
+        out[name] = {
+            'throughput_pct': change(now['throughput'], then['throughput']),
+            'p50_pct': change(now['latency_ms']['p50'], then['latency_ms']['p50']),
+            'p95_pct': change(now['latency_ms']['p95'], then['latency_ms']['p95']),
+            'peak_memory_pct': change(now['peak_memory_kb'], then['peak_memory_kb']),
+        }
+    return out
+
+
+def print_report(report: Dict[str, Any]):
+    from rich.console import Console
+    from rich.table import Table
+    table = Table(title=f"Benchmark ({report['config']['iterations']} iterations)")
+    for col in ('Scenario', 'Throughput', 'p50 ms', 'p95 ms', 'p99 ms', 'Peak KB', 'Requests', 'Failed', 'vs baseline'):
+        table.add_column(col)
+    for name, s in report['scenarios'].items():
+        delta = report.get('comparison', {}).get(name)
+        vs = f"{delta['throughput_pct']:+.1f}% thr, {delta['p95_pct']:+.1f}% p95" if delta and delta['throughput_pct'] is not None else '-'
+        requests = sum(r['total'] for r in s['requests'].values())
+        table.add_row(name, f"{s['throughput']} {s['unit']}", str(s['latency_ms']['p50']), str(s['latency_ms']['p95']),
+                      str(s['latency_ms']['p99']), str(s['peak_memory_kb']), str(requests), str(s['failures']), vs)
+    Console().print(table)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description='Benchmark the agent against local Render/GitHub stand-ins')
+    p.add_argument('--scenarios', default=','.join(SCENARIOS), help=f"comma separated subset of {', '.join(SCENARIOS)}")
+    p.add_argument('--iterations', type=int, default=20)
+    p.add_argument('--latency', type=float, default=5, help='stand-in response latency in ms')
+    p.add_argument('--jitter', type=float, default=0, help='extra random latency, up to this many ms')
+    p.add_argument('--rate-limit', type=float, default=None, help='stand-in requests per second before 429/403')
+    p.add_argument('--log-kb', type=int, default=512, help='generated build log size')
+    p.add_argument('--build-seconds', type=float, default=0.3, help='how long a stand-in build runs')
+    p.add_argument('--poll-interval', type=float, default=0.05, help='fixed monitor poll interval')
+    p.add_argument('--monitor-timeout', type=float, default=30)
+    p.add_argument('--tasks', type=int, default=4, help='tasks per main.py run')
+    p.add_argument('--jobs', type=int, default=1, help='main.py --jobs')
+    p.add_argument('--github-rate', type=float, default=50, help='GITHUB_RATE for PR pacing')
+    p.add_argument('--out', help='results file (default logs/bench/bench-<timestamp>.json)')
+    p.add_argument('--compare', help='earlier results file to compare against')
+    p.add_argument('--verbose', dest='quiet', action='store_false', help="show the agent's own output")
+    args = p.parse_args(argv)
+
+    selected = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(selected) - set(SCENARIOS)
+    if unknown:
+        p.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    tmp = tempfile.mkdtemp(prefix='agent-bench-')
+    kw = dict(latency=args.latency / 1000, jitter=args.jitter / 1000, rate_limit=args.rate_limit)
+    render = RenderStandin(log_bytes=args.log_kb * 1024, build_seconds=args.build_seconds, **kw).start()
+    github = GitHubStandin(**kw).start()
+    saved_env = dict(os.environ)
+    os.environ.update(bench_env(tmp, render, github, args))
+    os.environ.pop('AGENT_TRACE', None)
+    tracemalloc.start()
+    report = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=AGENT_DIR,
+                                 capture_output=True, text=True).stdout.strip() or None,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('out', 'compare', 'quiet')},
+        'scenarios': {},
+    }
+    try:
+        for name in selected:
+            print(f"Running {name}...", flush=True)
+            if name == 'tasks':
+                report['scenarios'][name] = run_tasks(args, render, github, tmp)
+            else:
+                report['scenarios'][name] = globals()[f"run_{name}"](args, render, github)
+    finally:
+        tracemalloc.stop()
+        render.stop()
+        github.stop()
+        os.environ.clear()
+        os.environ.update(saved_env)
+        shutil.rmtree(tmp, ignore_errors=True)
+    # ru_maxrss is KB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report['max_rss_kb'] = rss // 1024 if sys.platform == 'darwin' else rss
+
+    if args.compare:
+        with open(args.compare) as fh:
+            report['comparison'] = compare(report, json.load(fh))
+    out = args.out or os.path.join(AGENT_DIR, 'logs', 'bench', f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as fh:
+        json.dump(report, fh, indent=2)
+    print_report(report)
+    print(f"Results saved to {out}")
+    return 0 if all(s['failures'] == 0 for s in report['scenarios'].values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
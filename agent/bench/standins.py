@@ -0,0 +1,391 @@
+"""Local stand-ins for the Render and GitHub APIs the agent talks to.
+
+Both servers run on an ephemeral localhost port in a background thread and
+answer just enough of each API for the agent's own calls. Every response can
+be delayed (``latency`` seconds plus up to ``jitter``), requests can be
+rate-limited (``rate_limit`` per second, answered with 429/403 and
+``Retry-After``), and Render build logs are generated at ``log_bytes``.
+"""
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, List, Optional
+
+_LOG_LINE = "==> [build] step {n}: compiling modules, emitting chunks ({n} of many)\n"
+
+# Errors the analyzer recognises; appended to the log of a failing build
+_FAILURE_TAIL = (
+    "server/src/routes/sessions.ts(42,17): error TS2339: Property 'coachId' does not exist on type 'Session'.\n"
+    "client/src/pages/booking.tsx(88,5): error TS2322: Type 'string' is not assignable to type 'number'.\n"
+    "Error: Cannot find module 'drizzle-orm/pg-core'\n"
+    "==> Build failed 😞\n"
+)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def build_log(size: int, failed: bool) -> bytes:
+    """A synthetic build log of about ``size`` bytes; failed builds end with real-looking errors"""
+    tail = _FAILURE_TAIL.encode() if failed else b"==> Build successful \xf0\x9f\x8e\x89\n"
+    lines, total, n = [], len(tail), 0
+    while total < size:
+        line = _LOG_LINE.format(n=n).encode()
+        lines.append(line)
+        total += len(line)
+        n += 1
+    return b''.join(lines) + tail
+
+
+class _Limiter:
+    """Token bucket for the stand-in side of rate limiting; None rate means unlimited"""
+
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+        self.tokens = float(rate or 0)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> Optional[float]:
+        """None if the request may proceed, else seconds until it could"""
+        if not self.rate:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return None
+            return (1 - self.tokens) / self.rate
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    limited_status = 429
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, code: int, payload=None, headers: Optional[Dict[str, str]] = None, raw: bytes = None,
+               content_type: str = None):
+        body = raw if raw is not None else (json.dumps(payload).encode() if payload is not None else b'')
+        self.send_response(code)
+        self.send_header('Content-Type', content_type or ('application/json' if raw is None else 'text/plain; charset=utf-8'))
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+        self.server.count(self.command, self.route, code, len(body))
+
+    def _body(self) -> Dict[str, Any]:
+        return json.loads(self.raw_body) if self.raw_body else {}
+
+    def _handle(self):
+        # Always drain the body so the keep-alive connection stays usable
+        length = int(self.headers.get('Content-Length') or 0)
+        self.raw_body = self.rfile.read(length) if length else b''
+        self.parts = [p for p in self.path.split('?')[0].split('/') if p]
+        self.route = self.server.route_name(self.command, self.parts)
+        server = self.server
+        with server._stats_lock:
+            server.last_headers[self.route] = dict(self.headers)
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+        wait = server.limiter.take()
+        if wait is not None:
+            retry = max(int(wait + 0.999), 1)
+            return self._reply(self.limited_status, {'message': 'API rate limit exceeded'},
+                               {'Retry-After': str(retry), 'X-RateLimit-Remaining': '0',
+                                'X-RateLimit-Reset': str(int(time.time()) + retry)})
+        getattr(self, f"route_{self.route}", self.route_not_found)()
+
+    do_GET = do_POST = do_HEAD = _handle
+
+    def route_not_found(self):
+        self._reply(404, {'message': 'Not Found'})
+
+
+class _StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+    name = 'standin'
+
+    def __init__(self, handler, latency: float = 0.0, jitter: float = 0.0,
+                 rate_limit: Optional[float] = None, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.limiter = _Limiter(rate_limit)
+        self.requests: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.bytes_sent = 0
+        # Request headers last seen per route, so callers can check what was sent where
+        self.last_headers: Dict[str, Dict[str, str]] = {}
+        self._stats_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def route_name(self, method: str, parts: List[str]) -> str:
+        return 'not_found'
+
+    def count(self, method: str, route: str, code: int, size: int):
+        with self._stats_lock:
+            self.requests[f"{method} {route}"] += 1
+            self.statuses[str(code)] += 1
+            self.bytes_sent += size
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {'requests': dict(self.requests), 'statuses': dict(self.statuses),
+                    'total': sum(self.requests.values()), 'bytes_sent': self.bytes_sent}
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.requests.clear()
+            self.statuses.clear()
+            self.bytes_sent = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _RenderHandler(_StandinHandler):
+
+    def _deploy(self):
+        deploy = self.server.find(self.parts[1], self.parts[3])
+        if deploy is None:
+            self._reply(404, {'message': 'deploy not found'})
+        return deploy
+
+    def route_list_deploys(self):
+        body = json.dumps([{'deploy': d, 'cursor': d['id']} for d in self.server.deploys(self.parts[1])]).encode()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            return self._reply(304, headers={'ETag': etag})
+        self._reply(200, headers={'ETag': etag}, raw=body, content_type='application/json')
+
+    def route_create_deploy(self):
+        payload = self._body()
+        deploy = self.server.create_deploy(self.parts[1], payload.get('commitId'))
+        self._reply(201, deploy)
+
+    def route_get_deploy(self):
+        deploy = self._deploy()
+        if deploy:
+            self._reply(200, deploy)
+
+    def route_cancel_deploy(self):
+        deploy = self.server.cancel(self.parts[1], self.parts[3])
+        self._reply(200, deploy) if deploy else self._reply(404, {'message': 'deploy not found'})
+
+    def route_deploy_hook(self):
+        deploy = self.server.create_deploy(self.parts[1], None)
+        self._reply(200, {'deploy': {'id': deploy['id']}})
+
+    def route_build_log(self):
+        log = self.server.log_for(self.parts[1])
+        if log is None:
+            return self._reply(404, {'message': 'log not found'})
+        # Honour Range like a static file server so LogTailer only fetches new bytes
+        rng = self.headers.get('Range', '')
+        if rng.startswith('bytes=') and rng[6:].rstrip('-').isdigit():
+            start = int(rng[6:].rstrip('-'))
+            if start >= len(log):
+                return self._reply(416, headers={'Content-Range': f'bytes */{len(log)}'}, raw=b'')
+            return self._reply(206, raw=log[start:],
+                               headers={'Content-Range': f'bytes {start}-{len(log) - 1}/{len(log)}'})
+        self._reply(200, raw=log)
+
+
+class RenderStandin(_StandinServer):
+    """Render deploy API: list/create/get/cancel deploys, deploy hooks and build logs.
+
+    A deploy is ``build_in_progress`` for ``build_seconds`` after creation,
+    its log growing over that time, then settles on its outcome. New deploys
+    fail when ``fail_next`` is set (it resets after one use) or at ``fail_rate``.
+    """
+    name = 'render-standin'
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_limit: Optional[float] = None,
+                 log_bytes: int = 256 * 1024, build_seconds: float = 0.5, fail_rate: float = 0.0, **kw):
+        super().__init__(_RenderHandler, latency, jitter, rate_limit, **kw)
+        self.log_bytes = log_bytes
+        self.build_seconds = build_seconds
+        self.fail_rate = fail_rate
+        self.fail_next = False
+        self._deploys: Dict[str, List[Dict[str, Any]]] = {}
+        self._logs: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._seq = 0
+
+    def route_name(self, method: str, parts: List[str]) -> str:
+        if parts[:1] == ['services'] and len(parts) >= 3 and parts[2] == 'deploys':
+            if len(parts) == 3:
+                return 'list_deploys' if method == 'GET' else 'create_deploy'
+            if len(parts) == 4 and method == 'GET':
+                return 'get_deploy'
+            if len(parts) == 5 and parts[4] == 'cancel':
+                return 'cancel_deploy'
+        if parts[:1] == ['deploy'] and len(parts) == 2 and method in ('GET', 'POST'):
+            return 'deploy_hook'
+        if parts[:1] == ['logs'] and len(parts) == 2:
+            return 'build_log'
+        return 'not_found'
+
+    def hook_url(self, service_id: str) -> str:
+        return f"{self.url}/deploy/{service_id}"
+
+    def create_deploy(self, service_id: str, commit: Optional[str], failed: Optional[bool] = None) -> Dict[str, Any]:
+        with self._lock:
+            if failed is None:
+                failed = self.fail_next or random.random() < self.fail_rate
+                self.fail_next = False
+            self._seq += 1
+            deploy_id = f"dep-{self._seq:06d}"
+            self._logs[deploy_id] = build_log(self.log_bytes, failed)
+            deploy = {
+                'id': deploy_id,
+                'commit': {'id': commit or hashlib.sha1(deploy_id.encode()).hexdigest()},
+                'status': 'build_in_progress',
+                'createdAt': _now_iso(),
+                'finishedAt': None,
+                'buildLogsUrl': f"{self.url}/logs/{deploy_id}",
+                '_outcome': 'build_failed' if failed else 'live',
+                '_started': time.monotonic(),
+            }
+            self._deploys.setdefault(service_id, []).insert(0, deploy)
+            return self._public(deploy)
+
+    def _advance(self, deploy: Dict[str, Any]):
+        if deploy['status'] == 'build_in_progress' and time.monotonic() - deploy['_started'] >= self.build_seconds:
+            deploy['status'] = deploy['_outcome']
+            deploy['finishedAt'] = _now_iso()
+            if deploy['status'] == 'live':
+                # Render only keeps one live deploy per service
+                for other in self._deploys.get(self._service_of(deploy['id']), []):
+                    if other is not deploy and other['status'] == 'live':
+                        other['status'] = 'deactivated'
+
+    def _service_of(self, deploy_id: str) -> Optional[str]:
+        for service_id, deploys in self._deploys.items():
+            if any(d['id'] == deploy_id for d in deploys):
+                return service_id
+        return None
+
+    @staticmethod
+    def _public(deploy: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in deploy.items() if not k.startswith('_')}
+
+    def deploys(self, service_id: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            deploys = self._deploys.get(service_id, [])
+            for d in deploys:
+                self._advance(d)
+            return [self._public(d) for d in deploys[:10]]
+
+    def find(self, service_id: str, deploy_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for d in self._deploys.get(service_id, []):
+                if d['id'] == deploy_id:
+                    self._advance(d)
+                    return self._public(d)
+        return None
+
+    def cancel(self, service_id: str, deploy_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            for d in self._deploys.get(service_id, []):
+                if d['id'] == deploy_id:
+                    if d['status'] == 'build_in_progress':
+                        d['status'] = d['_outcome'] = 'canceled'
+                        d['finishedAt'] = _now_iso()
+                    return self._public(d)
+        return None
+
+    def log_for(self, deploy_id: str) -> Optional[bytes]:
+        with self._lock:
+            log = self._logs.get(deploy_id)
+            service_id = self._service_of(deploy_id) if log is not None else None
+            deploy = next((d for d in self._deploys.get(service_id, []) if d['id'] == deploy_id), None)
+            if deploy is None:
+                return log
+            self._advance(deploy)
+            if deploy['status'] != 'build_in_progress':
+                return log
+            # A running build has only written part of its log so far
+            done = (time.monotonic() - deploy['_started']) / self.build_seconds if self.build_seconds else 1
+            return log[:int(len(log) * min(done, 1.0))]
+
+
+class _GitHubHandler(_StandinHandler):
+    limited_status = 403
+
+    def route_list_pulls(self):
+        prs = self.server.open_pulls()
+        qs = dict(p.split('=', 1) for p in self.path.partition('?')[2].split('&') if '=' in p)
+        per_page, page = int(qs.get('per_page', 30)), int(qs.get('page', 1))
+        chunk = prs[(page - 1) * per_page:page * per_page]
+        headers = {}
+        if page * per_page < len(prs):
+            base = self.path.split('?')[0]
+            headers['Link'] = f'<{self.server.url}{base}?state=open&per_page={per_page}&page={page + 1}>; rel="next"'
+        self._reply(200, chunk, headers)
+
+    def route_create_pull(self):
+        payload = self._body()
+        pr = self.server.create_pull(self.parts[1], self.parts[2], payload)
+        if pr is None:
+            return self._reply(422, {'message': 'Validation Failed',
+                                     'errors': [{'message': f"A pull request already exists for {payload.get('head')}."}]})
+        self._reply(201, pr)
+
+
+class GitHubStandin(_StandinServer):
+    """GitHub pulls API: paginated list of open PRs and PR creation (422 for a duplicate head)"""
+    name = 'github-standin'
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_limit: Optional[float] = None, **kw):
+        super().__init__(_GitHubHandler, latency, jitter, rate_limit, **kw)
+        self._pulls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def route_name(self, method: str, parts: List[str]) -> str:
+        if parts[:1] == ['repos'] and len(parts) == 4 and parts[3] == 'pulls':
+            return 'list_pulls' if method == 'GET' else 'create_pull'
+        return 'not_found'
+
+    def create_pull(self, owner: str, repo: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # A cross-repository head is given as 'fork-owner:branch'
+        head_owner, _, ref = (payload.get('head') or '').rpartition(':')
+        head_owner = head_owner or owner
+        with self._lock:
+            if any(p['head']['label'] == f"{head_owner}:{ref}" for p in self._pulls):
+                return None
+            number = len(self._pulls) + 1
+            pr = {'number': number, 'title': payload.get('title'), 'state': 'open',
+                  'head': {'ref': ref, 'label': f"{head_owner}:{ref}",
+                           'repo': {'full_name': f"{head_owner}/{repo}"}},
+                  'base': {'ref': payload.get('base')},
+                  'html_url': f"https://github.com/{owner}/{repo}/pull/{number}"}
+            self._pulls.append(pr)
+            return pr
+
+    def open_pulls(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._pulls)
@@ -6,9 +6,14 @@ Entry point for triggering Render deployments via hook or API
 import os
 import sys
 import json
+import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
 from tools.render_tool import RenderTool
+from tools.render_client import AsyncRenderClient, service_ids_from_env
+from tools.deploy_events import DeployEventServer, fetch_pushed_statuses
+from tools.deploy_store import DeployHistory, open_history
+from tools.deploy_graph import DeployOrchestrator, load_service_graph
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
@@ -18,7 +23,7 @@ def log_message(message: str, level: str = "INFO"):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"[{timestamp}] {level}: {message}")
 
-def main():
+def main(force: bool = False, clear_cache: bool = None):
     """Main deployment function"""
     log_message("Starting Render deployment process...")
     
@@ -37,7 +42,7 @@ def main():
     
     # Attempt deployment
     try:
-        result = render_tool.deploy()
+        result = render_tool.deploy(clear_cache=clear_cache, force=force)
         
         if result['success']:
             log_message(f"Deployment successful via {result['method']}")
@@ -59,9 +64,107 @@ def check_status(deploy_id: str = None):
     """Check deployment status"""
     log_message("Checking deployment status...")
     
-    render_tool = RenderTool()
-    result = render_tool.get_deploy_status(deploy_id)
+    service_ids = service_ids_from_env()
+    if deploy_id:
+        print_status(RenderTool().get_deploy_status(deploy_id))
+        return
+    
+    # Pushed events answer instantly; only services without a fresh event are polled
+    pushed = fetch_pushed_statuses()
+    statuses = {s: dict(pushed[s], service_id=s) for s in service_ids if s in pushed}
+    missing = [s for s in service_ids if s not in statuses]
+    # No configured service falls through to RenderTool, which reports the missing credentials
+    if not service_ids or (missing and len(service_ids) == 1):
+        max_age = float(os.getenv('RENDER_STATUS_MAX_AGE', '30'))
+        print_status(RenderTool().get_deploy_status(max_age=max_age))
+        return
+    
+    if missing:
+        # Several services: fetch them all concurrently over one pooled session
+        async def fetch():
+            async with AsyncRenderClient() as client:
+                return await client.statuses(missing)
+        fetched = asyncio.run(fetch())
+        history = open_history()
+        if history:
+            for service_id, status in fetched.items():
+                history.record(service_id, status)
+        statuses.update(fetched)
+    
+    for service_id in service_ids:
+        status = statuses[service_id]
+        source = 'pushed event' if service_id in pushed else 'API'
+        log_message(f"Service: {service_id} (via {source})")
+        print_status({
+            'success': 'error' not in status,
+            'status': status.get('status'),
+            'deploy_id': status.get('id'),
+            'commit_sha': status.get('commit'),
+            'url': None,
+            'error': status.get('error')
+        })
+
+def format_seconds(value):
+    return f"{value:.0f}s" if value is not None else "n/a"
+
+def show_stats(service_id: str = None):
+    """Report build-duration percentiles and failure rate by error class"""
+    history = DeployHistory()
+    durations = history.duration_percentiles(service_id)
+    log_message(f"Build duration over {durations['count']} deploys: "
+                f"p50={format_seconds(durations['p50'])} p95={format_seconds(durations['p95'])}")
+    
+    failures = history.failure_rates(service_id)
+    if failures['deploys']:
+        log_message(f"Failure rate: {failures['failed']}/{failures['deploys']} "
+                    f"({failures['failure_rate']:.0%})")
+    for error_class, row in failures['by_class'].items():
+        log_message(f"  {error_class}: {row['deploys']} deploys ({row['rate']:.0%})")
+
+def show_slowest(n: int = 5, service_id: str = None):
+    """List the slowest recent deploys"""
+    for row in DeployHistory().slowest(n, service_id):
+        log_message(f"{row['id']} {row['status']} {format_seconds(row['duration'])} "
+                    f"service={row['service_id']} commit={(row['commit_sha'] or '')[:10]}")
+
+def listen(port: int = None):
+    """Run the local deploy event listener in the foreground"""
+    server = DeployEventServer(port)
+    log_message(f"Listening for Render deploy events on {server.server_address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def orchestrate(graph_path: str = None, force: bool = False, clear_cache: bool = None,
+                dry_run: bool = False):
+    """Deploy every service in the service graph in dependency order"""
+    try:
+        orchestrator = DeployOrchestrator(load_service_graph(graph_path), log=log_message)
+    except (OSError, ValueError) as e:
+        log_message(f"Invalid service graph: {e}", "ERROR")
+        return 1
+    for i, wave in enumerate(orchestrator.plan(), 1):
+        log_message(f"Wave {i}: {', '.join(wave)}")
+    if dry_run:
+        return 0
     
+    result = orchestrator.run(force=force, clear_cache=clear_cache)
+    for wave in result['waves']:
+        log_message(f"Wave {wave['wave']}: {format_seconds(wave['seconds'])}, "
+                    f"critical path {wave['critical_path'] or '-'} ({format_seconds(wave['critical_seconds'])})")
+    log_message(f"Total wall time: {format_seconds(result['wall_seconds'])} "
+                f"(critical path: {' -> '.join(result['critical_path']) or '-'})")
+    for name, service in result['services'].items():
+        if service['state'] != 'ready':
+            log_message(f"{name}: {service['state']} {service.get('error') or service.get('status') or ''}".rstrip(),
+                        "WARNING" if service['state'] == 'unconfirmed' else "ERROR")
+    return 0 if result['success'] else 1
+
+def print_status(result):
+    """Log one deploy status result"""
     if result['success']:
         log_message(f"Deploy Status: {result['status']}")
         log_message(f"Deploy ID: {result['deploy_id']}")
@@ -75,6 +178,21 @@ if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "status":
         deploy_id = sys.argv[2] if len(sys.argv) > 2 else None
         check_status(deploy_id)
+    elif len(sys.argv) > 1 and sys.argv[1] == "stats":
+        show_stats(sys.argv[2] if len(sys.argv) > 2 else None)
+    elif len(sys.argv) > 1 and sys.argv[1] == "slowest":
+        show_slowest(int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+                     sys.argv[3] if len(sys.argv) > 3 else None)
+    elif len(sys.argv) > 1 and sys.argv[1] == "orchestrate":
+        # --graph FILE overrides RENDER_SERVICE_GRAPH / render.yaml; --dry-run only prints the waves
+        graph_path = sys.argv[sys.argv.index('--graph') + 1] if '--graph' in sys.argv else None
+        sys.exit(orchestrate(graph_path, force='--force' in sys.argv,
+                             clear_cache=True if '--clear-cache' in sys.argv else None,
+                             dry_run='--dry-run' in sys.argv))
+    elif len(sys.argv) > 1 and sys.argv[1] == "listen":
+        listen(int(sys.argv[2]) if len(sys.argv) > 2 else None)
     else:
-        exit_code = main()
+        # --force deploys even if the commit is live or building; --clear-cache forces a cold build
+        exit_code = main(force='--force' in sys.argv,
+                         clear_cache=True if '--clear-cache' in sys.argv else None)
         sys.exit(exit_code)
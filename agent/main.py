@@ -1,32 +1,80 @@
-import argparse, os, json
+import argparse, os, sys, json, time
 from dotenv import load_dotenv
-from rich import print
-from planner import plan_from_goal
-from tools.repo_tool import RepoTool
-from tools.node_tool import NodeTool
-from tools.github_tool import GitHubTool
+from agentd import call
 
+# Heavy imports (rich, GitPython, the tools) happen only on the local path;
+# when agentd is running this file is a thin client of its socket.
+
+# Before argparse, so AGENT_JOBS / AGENT_DAEMON in .env set the defaults
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
+DEFAULT_GOAL = "Hello Agent — wiring PR"
+
 p = argparse.ArgumentParser()
 p.add_argument('--goal')
 p.add_argument('--plan')
+p.add_argument('--jobs', type=int, default=int(os.getenv('AGENT_JOBS', '1')),
+               help='run tasks concurrently, each in its own git worktree')
+p.add_argument('--local', action='store_true', default=os.getenv('AGENT_DAEMON', '').lower() == 'off',
+               help='run in this process even if agentd is running')
+p.add_argument('--detach', action='store_true', help='return once agentd has accepted the work')
 args = p.parse_args()
 
-# RepoTool will search upward for the real .git
-repo = RepoTool(path='.')
-node = NodeTool(client_dir=os.getenv('CLIENT_DIR','client'),
-                server_dir=os.getenv('SERVER_DIR','server'))
-gh   = GitHubTool(repo_slug=os.getenv('GITHUB_REPO',''))
-
-tasks = json.load(open(args.plan)) if args.plan else plan_from_goal(args.goal or "Hello Agent — wiring PR")
-
-print(f"Planned {len(tasks)} task(s)")
-for i, t in enumerate(tasks, 1):
-    b = repo.start_feature_branch(t['title']); print(f"\nTask {i}: {t['title']} -> {b}")
-    repo.apply_minimal_edits(t.get('files', []))
-    for s in t.get('npmScripts', []):
-        if not node.run_script(s):
-            print(f"Script failed: {s}"); break
-    repo.commit_all(f"feat(agent): {t['title']}")
-    print(f"PR opened: {gh.open_pr(b, t['title'], t.get('acceptance',''))}")
+def submit_to_daemon():
+    """Hand the run to agentd; None if it isn't running"""
+    message = {'op': 'submit', 'cwd': os.getcwd(), 'jobs': args.jobs}
+    if args.plan:
+        message.update(plan=os.path.abspath(args.plan), tasks=json.load(open(args.plan)))
+    else:
+        message['goal'] = args.goal or DEFAULT_GOAL
+    start = time.perf_counter()
+    try:
+        reply = call(message, timeout=5)
+    except OSError:
+        return None
+    if not reply.get('ok'):
+        sys.exit(f"agentd rejected the run: {reply.get('error')}")
+    job = reply['job']
+    print(f"Submitted to agentd as job {job['id']} ({(time.perf_counter() - start) * 1000:.1f}ms)")
+    if args.detach:
+        return job
+    try:
+        job = call({'op': 'wait', 'id': job['id']})['job']
+    except OSError as e:
+        sys.exit(f"Lost contact with agentd while waiting for job {job['id']} ({e}); it may still be running")
+    return job
+
+def run_local():
+    from rich import print
+    from planner import plan_from_goal
+    from tools.repo_tool import RepoTool
+    from tools.node_tool import NodeTool
+    from tools.github_tool import GitHubTool
+    from pipeline import run_sequential, run_parallel
+    from tools.tracing import span
+
+    # RepoTool will search upward for the real .git
+    repo = RepoTool(path='.')
+    client_dir, server_dir = os.getenv('CLIENT_DIR','client'), os.getenv('SERVER_DIR','server')
+    node = NodeTool(client_dir=client_dir, server_dir=server_dir)
+    gh   = GitHubTool(repo_slug=os.getenv('GITHUB_REPO',''))
+
+    tasks = json.load(open(args.plan)) if args.plan else plan_from_goal(args.goal or DEFAULT_GOAL, repo.head())
+
+    print(f"Planned {len(tasks)} task(s)")
+    with span('cycle', goal=args.goal, plan=args.plan, tasks=len(tasks), jobs=args.jobs):
+        if args.jobs > 1 and len(tasks) > 1:
+            return run_parallel(tasks, repo, gh, args.jobs, client_dir, server_dir)
+        return run_sequential(tasks, repo, node, gh)
+
+job = None if args.local else submit_to_daemon()
+if job is None:
+    results = run_local()
+elif args.detach:
+    sys.exit(0)
+else:
+    results = (job['result'] or {}).get('results', [])
+    print(f"agentd job {job['id']} {job['state']}" + (f": {job['error']}" if job['error'] else ''))
+
+from pipeline import print_summary
+print_summary(results)
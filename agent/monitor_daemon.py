@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Monitor Daemon
+Follows build.log and deploy.log by byte offset, keeps a rolling health state
+and supervises runner.sh as a child process, restarting it when builds or
+deploys fail. Replaces the grep-every-minute loop in monitor.sh.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import select
+import signal
+import struct
+import ctypes
+import ctypes.util
+import tempfile
+import subprocess
+from datetime import datetime
+from tools.log_analyzer import BuildLogAnalyzer
+from tools.render_client import IN_PROGRESS_STATUSES, FAILED_STATUSES
+from monitor_render import RenderDeploymentMonitor
+
+AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(AGENT_DIR)
+
+BUILD_FAILED_RE = re.compile(r"Build failed")
+BUILD_OK_RE = re.compile(r"built successfully|Build completed successfully")
+DEPLOY_FAILED_RE = re.compile(r"Deployment failed|deploy failed")
+DEPLOY_OK_RE = re.compile(r"Deployment successful|deploy hook triggered successfully")
+
+# inotify(7) constants
+IN_MODIFY = 0x002
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len; the name follows
+
+
+class DirWatcher:
+    """Wakes on writes to a directory via inotify, or after ``poll_interval`` where unavailable.
+
+    Events for names starting with one of ``ignore`` (e.g. the daemon's own
+    state file) don't count as a change.
+    """
+
+    def __init__(self, path, poll_interval=1.0, ignore=()):
+        self.poll_interval = poll_interval
+        self.ignore = tuple(ignore)
+        self.fd = None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+            mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+            if libc.inotify_add_watch(fd, os.fsencode(path), mask) < 0:
+                os.close(fd)
+                raise OSError(ctypes.get_errno(), 'inotify_add_watch failed')
+            self.fd = fd
+        except (OSError, AttributeError):
+            self.fd = None
+
+    @property
+    def mode(self):
+        return 'inotify' if self.fd is not None else 'polling'
+
+    def wait(self, timeout):
+        """Block until the directory changes or ``timeout`` passes; True if woken by a change"""
+        if self.fd is None:
+            time.sleep(min(timeout, self.poll_interval))
+            return False
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                ready, _, _ = select.select([self.fd], [], [], max(deadline - time.monotonic(), 0))
+            except InterruptedError:
+                return False
+            if not ready:
+                return False
+            if self._drain():
+                return True
+
+    def _drain(self):
+        # Read every queued event; only whether one of them matters is kept, followers stat the files
+        changed = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            pos = 0
+            while pos < len(data):
+                length = _EVENT.unpack_from(data, pos)[3]
+                name = data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b'\0').decode(errors='replace')
+                pos += _EVENT.size + length
+                if not (self.ignore and name.startswith(self.ignore)):
+                    changed = True
+        return changed
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class LogFollower:
+    """Reads only the bytes appended to a log since the remembered offset.
+
+    Truncation or replacement of the file (smaller size or new inode) restarts
+    from the beginning of the new file.
+    """
+
+    def __init__(self, path, offset=None, inode=None, backfill=64 * 1024, backfill_age=3600):
+        self.path = path
+        self.offset = offset
+        self.inode = inode
+        self.backfill = backfill
+        self.backfill_age = backfill_age
+        self._partial = b''
+        self.bytes_read = 0
+
+    def read_new(self, max_bytes=4 * 1024 * 1024):
+        """Complete lines appended since the last call"""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return []
+        if self.offset is None:
+            # First run: only recent lines of a recently written log count, not hours-old history
+            fresh = time.time() - st.st_mtime <= self.backfill_age
+            self.offset = max(st.st_size - self.backfill, 0) if fresh else st.st_size
+            self.inode = st.st_ino
+        elif st.st_ino != self.inode or st.st_size < self.offset:
+            self.offset, self.inode, self._partial = 0, st.st_ino, b''
+        if st.st_size == self.offset:
+            return []
+        with open(self.path, 'rb') as fh:
+            fh.seek(self.offset)
+            data = fh.read(max_bytes)
+        self.offset += len(data)
+        self.bytes_read += len(data)
+        data = self._partial + data
+        cut = data.rfind(b'\n') + 1
+        self._partial = data[cut:]
+        return data[:cut].decode('utf-8', errors='replace').splitlines()
+
+    def state(self):
+        return {'offset': self.offset, 'inode': self.inode}
+
+
+class HealthState:
+    """Rolling build/deploy health decided only from recent evidence"""
+
+    def __init__(self, stale_after=3600):
+        self.stale_after = stale_after
+        self.channels = {
+            'build': {'state': 'unknown', 'since': None, 'evidence': None},
+            'deploy': {'state': 'unknown', 'since': None, 'evidence': None},
+        }
+        self.last_failure_at = 0
+
+    def set(self, channel, state, evidence=None):
+        current = self.channels[channel]
+        now = time.time()
+        if state == 'failed':
+            self.last_failure_at = now
+        if current['state'] != state:
+            current['since'] = now
+        current.update(state=state, evidence=evidence, updated_at=now)
+        return current
+
+    def get(self, channel):
+        current = self.channels[channel]
+        if current['state'] != 'unknown' and time.time() - current.get('updated_at', 0) > self.stale_after:
+            return 'unknown'
+        return current['state']
+
+    def overall(self):
+        build, deploy = self.get('build'), self.get('deploy')
+        if deploy == 'failed' or (build == 'failed' and deploy not in ('ok', 'pending')):
+            return 'failing'
+        if build == 'failed':
+            return 'degraded'
+        if deploy == 'ok' and build in ('ok', 'unknown'):
+            return 'healthy'
+        return 'pending' if deploy == 'pending' else 'unknown'
+
+    def snapshot(self):
+        return {'overall': self.overall(),
+                **{k: dict(v, state=self.get(k)) for k, v in self.channels.items()}}
+
+
+class RunnerSupervisor:
+    """Runs runner.sh as a child in its own process group and restarts it on demand"""
+
+    def __init__(self, command, env=None, log=print):
+        self.command = command
+        self.env = env
+        self.log = log
+        self.process = None
+        self.starts = 0
+        self.next_restart_at = 0
+        self._restart_delay = 5
+
+    @property
+    def pid(self):
+        return self.process.pid if self.running() else None
+
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self.process = subprocess.Popen(self.command, cwd=ROOT_DIR, env=self.env, start_new_session=True)
+        self.starts += 1
+        self.log(f"Runner started (PID: {self.process.pid})")
+        return self.process.pid
+
+    def stop(self, grace=10):
+        if not self.running():
+            return
+        pgid = os.getpgid(self.process.pid)
+        os.killpg(pgid, signal.SIGTERM)
+        try:
+            self.process.wait(grace)
+        except subprocess.TimeoutExpired:
+            os.killpg(pgid, signal.SIGKILL)
+            self.process.wait()
+        self.log(f"Runner stopped (exit {self.process.returncode})")
+
+    def external_pids(self):
+        """runner.sh processes started outside this daemon, e.g. by hand"""
+        try:
+            found = subprocess.run(['pgrep', '-f', 'runner.sh'], capture_output=True, text=True).stdout.split()
+        except OSError:
+            return []
+        own = os.getpgid(self.process.pid) if self.running() else None
+        pids = []
+        for pid in map(int, found):
+            try:
+                if pid != os.getpid() and os.getpgid(pid) != own:
+                    pids.append(pid)
+            except ProcessLookupError:
+                pass
+        return pids
+
+    def restart(self):
+        self.stop()
+        for pid in self.external_pids():
+            # One-off takeover of a runner we didn't start; from here on it is our child
+            self.log(f"Stopping runner not started by the daemon (PID: {pid})")
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        self._restart_delay = 5
+        return self.start()
+
+    def check(self):
+        """Restart a runner that exited on its own, backing off if it keeps dying"""
+        if self.process is None or self.running():
+            return
+        now = time.monotonic()
+        if not self.next_restart_at:
+            self.log(f"Runner exited unexpectedly (exit {self.process.returncode}); restarting in {self._restart_delay}s")
+            self.next_restart_at = now + self._restart_delay
+            self._restart_delay = min(self._restart_delay * 2, 300)
+        elif now >= self.next_restart_at:
+            self.next_restart_at = 0
+            self.start()
+
+
+def log_dir_from_env():
+    # LOG_DIR is relative to the repo root, as runner.sh and monitor.sh use it
+    log_dir = os.getenv('LOG_DIR') or os.path.join(AGENT_DIR, 'logs')
+    return log_dir if os.path.isabs(log_dir) else os.path.join(ROOT_DIR, log_dir)
+
+
+class MonitorDaemon:
+    def __init__(self, log_dir=None, manage_runner=True):
+        self.log_dir = log_dir or log_dir_from_env()
+        os.makedirs(self.log_dir, exist_ok=True)
+        self.monitor_log = os.path.join(self.log_dir, 'monitor.log')
+        self.state_path = os.path.join(self.log_dir, 'monitor-state.json')
+        self.max_retries = int(os.getenv('MONITOR_MAX_RETRIES', '10'))
+        self.retry_delay = float(os.getenv('MONITOR_RETRY_DELAY', '300'))
+        self.settle = float(os.getenv('MONITOR_SETTLE', '5'))
+        self.status_interval = float(os.getenv('RENDER_STATUS_MAX_AGE', '30'))
+        self.health = HealthState(float(os.getenv('MONITOR_STALE_AFTER', '3600')))
+        self.failures = 0
+        self.last_cycle_at = 0
+        self.last_status_check = 0
+        self._stopping = False
+        self._saved = None
+
+        saved = self._load_state()
+        self.followers = {
+            name: LogFollower(os.path.join(self.log_dir, f"{name}.log"),
+                              backfill_age=self.health.stale_after,
+                              **saved.get('offsets', {}).get(name, {}))
+            for name in ('build', 'deploy')
+        }
+        self.analyzer = BuildLogAnalyzer(scopes=())
+        # The daemon's own writes mustn't wake it, or every save would trigger another tick
+        self.watcher = DirWatcher(self.log_dir, float(os.getenv('MONITOR_POLL_INTERVAL', '1')),
+                                  ignore=(os.path.basename(self.state_path), '.monitor-state.',
+                                          os.path.basename(self.monitor_log)))
+        self.render = RenderDeploymentMonitor()
+        self.render_api = bool(self.render.api_token and self.render.service_id)
+
+        env = dict(os.environ, LOG_DIR=os.path.relpath(self.log_dir, ROOT_DIR),
+                   GOAL=os.getenv('MONITOR_GOAL', 'Fix build errors and deploy to Render'))
+        self.runner = RunnerSupervisor([os.path.join(AGENT_DIR, 'runner.sh')], env, self.log) if manage_runner else None
+
+    def log(self, message, level='MONITOR'):
+        line = f"[{datetime.now():%Y-%m-%d %H:%M:%S}] {level}: {message}"
+        print(line, flush=True)
+        with open(self.monitor_log, 'a') as fh:
+            fh.write(line + '\n')
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        """Write the state file, only when something in it besides the timestamp changed"""
+        state = {
+            'pid': os.getpid(),
+            'health': self.health.snapshot(),
+            'failures': self.failures,
+            'runner_pid': self.runner.pid if self.runner else None,
+            'runner_starts': self.runner.starts if self.runner else 0,
+            'watch_mode': self.watcher.mode,
+            'offsets': {k: f.state() for k, f in self.followers.items()},
+        }
+        if state == self._saved:
+            return False
+        self._saved = state
+        fd, tmp = tempfile.mkstemp(dir=self.log_dir, prefix='.monitor-state.', suffix='.tmp')
+        with os.fdopen(fd, 'w') as fh:
+            json.dump(dict(state, updated_at=time.time()), fh, indent=2)
+        os.replace(tmp, self.state_path)
+        return True
+
+    def process_build(self, lines):
+        new_errors = []
+        # Line by line so the last word wins when a batch holds both failure and recovery
+        for line in lines:
+            errors = self.analyzer.feed(line + '\n')
+            if BUILD_OK_RE.search(line):
+                self.health.set('build', 'ok', line)
+            elif errors or BUILD_FAILED_RE.search(line):
+                self.health.set('build', 'failed', line)
+            new_errors.extend(errors)
+        if new_errors:
+            self.log(f"{len(new_errors)} new build error(s), latest: {new_errors[-1]['code'] or new_errors[-1]['kind']}")
+
+    def process_deploy(self, lines):
+        for line in lines:
+            if DEPLOY_FAILED_RE.search(line):
+                self.health.set('deploy', 'failed', line)
+                self.log("Deployment failure detected")
+            elif DEPLOY_OK_RE.search(line):
+                # A fired hook is only a trigger; confirm with Render when the API is configured
+                self.health.set('deploy', 'pending' if self.render_api else 'ok', line)
+                self.last_status_check = 0
+
+    def check_render(self):
+        """Resolve a pending deploy against Render's own status"""
+        if not self.render_api or self.health.get('deploy') != 'pending':
+            return
+        now = time.monotonic()
+        if now - self.last_status_check < self.status_interval:
+            return
+        self.last_status_check = now
+        status = self.render.get_deployment_status()
+        state = status.get('status')
+        if state == 'live':
+            self.health.set('deploy', 'ok', f"Render deploy {status.get('id')} live")
+        elif state in FAILED_STATUSES:
+            self.health.set('deploy', 'failed', f"Render deploy {status.get('id')} {state}")
+            self.log(f"Render reports deploy {status.get('id')} {state}")
+        elif state not in IN_PROGRESS_STATUSES:
+            self.log(f"Could not confirm deploy: {status.get('error') or state}")
+
+    def decide(self):
+        """Act on the health state: reset on success, restart the runner on fresh failures"""
+        overall = self.health.overall()
+        if overall in ('healthy', 'degraded'):
+            if self.failures:
+                self.log(f"{'Both build and deployment are healthy' if overall == 'healthy' else 'Build issues but deployment OK'} - resetting failure count")
+            self.failures = 0
+            return True
+        if overall != 'failing':
+            return True
+        now = time.time()
+        fresh = self.health.last_failure_at > self.last_cycle_at
+        settled = now - self.health.last_failure_at >= self.settle
+        cooled = now - self.last_cycle_at >= self.retry_delay
+        if not (fresh and settled and cooled):
+            return True
+        self.failures += 1
+        if self.failures > self.max_retries:
+            self.log(f"Max retries ({self.max_retries}) exceeded. Stopping monitoring.", 'ERROR')
+            return False
+        self.log(f"Triggering retry cycle {self.failures}/{self.max_retries} "
+                 f"(build={self.health.get('build')}, deploy={self.health.get('deploy')})")
+        self.last_cycle_at = now
+        if self.runner:
+            self.runner.restart()
+        return True
+
+    def tick(self, act=True):
+        before = json.dumps(self.health.snapshot(), sort_keys=True, default=str)
+        self.process_build(self.followers['build'].read_new())
+        self.process_deploy(self.followers['deploy'].read_new())
+        self.check_render()
+        keep_going = self.decide() if act else True
+        if self.runner and act:
+            self.runner.check()
+        after = json.dumps(self.health.snapshot(), sort_keys=True, default=str)
+        if after != before:
+            h = self.health.snapshot()
+            self.log(f"Status: Build={h['build']['state']}, Deploy={h['deploy']['state']}, "
+                     f"Overall={h['overall']}, Failures={self.failures}")
+        self.save_state()
+        return keep_going
+
+    def stop(self, *_):
+        self._stopping = True
+
+    def run(self):
+        self.log(f"Starting monitor daemon ({self.watcher.mode}, log dir {self.log_dir})")
+        self.log(f"Max retries: {self.max_retries}, Retry delay: {self.retry_delay:g}s")
+        # Seed the health state from recent log lines before acting on anything
+        self.tick(act=False)
+        if self.runner:
+            external = self.runner.external_pids()
+            if external:
+                self.log(f"Runner already running outside the daemon (PID: {' '.join(map(str, external))}); "
+                         "it will be replaced on the first retry")
+            else:
+                self.runner.start()
+                # A fresh runner is itself a new cycle; seeded failures don't warrant another
+                self.last_cycle_at = time.time()
+        try:
+            while not self._stopping and self.tick():
+                # Wake on log writes; the timeout covers settle/cooldown deadlines and Render checks
+                self.watcher.wait(min(self.settle, self.status_interval))
+        finally:
+            if self.runner:
+                self.runner.stop()
+            self.watcher.close()
+            self.save_state()
+            self.log("Monitoring stopped")
+
+
+def main():
+    if '--status' in sys.argv:
+        daemon_state = os.path.join(log_dir_from_env(), 'monitor-state.json')
+        try:
+            with open(daemon_state) as fh:
+                print(json.dumps(json.load(fh), indent=2))
+        except (OSError, ValueError) as e:
+            print(f"No monitor state: {e}")
+            sys.exit(1)
+        return
+    daemon = MonitorDaemon(manage_runner='--no-runner' not in sys.argv)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,42 +8,136 @@ import os
 import sys
 import time
 import json
+import asyncio
 import requests
-import subprocess
 from datetime import datetime
 from dotenv import load_dotenv
+from tools.log_analyzer import BuildLogAnalyzer, analyze_text, busts_cache, is_fatal, error_fingerprint
+from tools.log_tail import LogTailer
+from tools.polling import PollScheduler, ConditionalPoller
+from tools.deploy_events import DeployEventServer
+from tools.deploy_store import open_history
+from tools.fix_queue import FixJobQueue
+from tools.fingerprint_index import open_index, fingerprint
+from tools.log_archive import open_archive
+from tools.tracing import instrument_session, span
+from tools.render_client import (AsyncRenderClient, IN_PROGRESS_STATUSES, FAILED_STATUSES,
+                                 render_api_url, service_ids_from_env, summarize_deploy)
 
 # Load environment variables
 load_dotenv(os.path.join(os.path.dirname(__file__), '.env'))
 
+def run_fix_goal(goal, deadline, request=None):
+    """Fix-queue runner: plan the goal and open PRs, as `make run GOAL=...` used to"""
+    # Imported here so status-only invocations don't load GitPython
+    from pipeline import AGENT_DIR, run_goal
+    from tools.repo_tool import RepoTool
+    from tools.github_tool import GitHubTool
+    repo = RepoTool(path=AGENT_DIR, workdir=AGENT_DIR)
+    gh = GitHubTool(repo_slug=os.getenv('GITHUB_REPO', ''))
+    # The errors' fingerprints key the plan cache, so a retry of the same failure reuses its plan
+    return run_goal(goal, repo, gh, deadline, fingerprints=(request or {}).get('fingerprints', ()))
+
 class RenderDeploymentMonitor:
     def __init__(self):
         self.api_token = os.getenv('RENDER_API_TOKEN')
-        self.service_id = os.getenv('RENDER_SERVICE_ID')
+        self.service_ids = service_ids_from_env()
+        self.service_id = os.getenv('RENDER_SERVICE_ID') or (self.service_ids[0] if self.service_ids else None)
         self.deploy_hook_url = os.getenv('RENDER_DEPLOY_HOOK_URL')
         self.headers = {'Authorization': f'Bearer {self.api_token}'} if self.api_token else {}
+        self.log_chunk_size = int(os.getenv('RENDER_LOG_CHUNK_SIZE', str(64 * 1024)))
+        self.log_tail_lines = int(os.getenv('RENDER_LOG_TAIL_LINES', '200'))
+        self.tail_interval = int(os.getenv('RENDER_LOG_TAIL_INTERVAL', '5'))
+        self.cancel_on_failure = os.getenv('RENDER_CANCEL_ON_FAILURE', '').lower() in ('1', 'true', 'yes')
+        self.on_failure = None
+        self.session = instrument_session(requests.Session())
+        self.session.headers.update(self.headers)
+        # buildLogsUrl may be served from another host; never send it the API token
+        self.log_session = instrument_session(requests.Session())
+        self._tailer = None
+        self._tail_deploy_id = None
+        self._handled_deploys = set()
+        self._deploys_poller = None
+        self.poll_scheduler = None
+        self.events = None
+        self.push_fallback = float(os.getenv('RENDER_PUSH_FALLBACK', '120'))
+        self._push_since = 0
+        self._seen_version = 0
+        self.history = open_history()
+        self.fix_queue = None
+        self.fingerprints = open_index()
+        self.log_archive = open_archive()
         
+    def start_event_listener(self, port=None):
+        """Receive pushed deploy events so status checks stop polling the API"""
+        server = DeployEventServer(port).start()
+        self.events = server.table
+        print(f"Listening for Render deploy events on port {server.server_address[1]}")
+        return server
+    
     def get_deployment_status(self):
+        """Get the latest deployment status and record it in the deploy history"""
+        with span('render.status', service_id=self.service_id) as s:
+            status = self._current_status()
+            s.set(deploy_status=status.get('status'), source=status.get('source', 'api'),
+                  status='error' if status.get('error') else 'ok')
+        if self.history and status.get('id'):
+            self.history.record(self.service_id, status)
+        return status
+    
+    def cached_status(self, max_age):
+        """Latest status from the deploy history if observed within max_age seconds"""
+        row = self.history.latest(self.service_id, max_age) if self.history and self.service_id else None
+        if not row:
+            return None
+        return {
+            "status": row['status'],
+            "id": row['id'],
+            "commit": row['commit_sha'],
+            "created_at": row['created_at'],
+            "finished_at": row['finished_at'],
+            "source": "history"
+        }
+    
+    def _current_status(self):
+        """Latest deployment status, from pushed events when available"""
+        if self.events is None:
+            return self.poll_deployment_status()
+        
+        self._seen_version = self.events.version
+        state = self.events.get(self.service_id)
+        # Only trust events received since monitoring started, and poll for details they lack
+        if state and state['received_at'] >= self._push_since and (
+                state['status'] == 'live' or (state.get('id') and state.get('build_logs_url'))):
+            keys = ('status', 'id', 'commit', 'created_at', 'finished_at', 'build_logs_url')
+            return dict({k: state.get(k) for k in keys}, source='push')
+        
+        status = self.poll_deployment_status()
+        if status.get('id'):
+            self.events.update(dict(status, service_id=self.service_id))
+            self._seen_version = self.events.version
+        return status
+    
+    def _sleep(self, seconds):
+        """Sleep, waking early when a deploy event arrives; True if one did"""
+        if self.events is None:
+            time.sleep(seconds)
+            return False
+        return self.events.wait(self._seen_version, seconds)
+    
+    def poll_deployment_status(self):
         """Get the latest deployment status from Render API"""
         if not self.api_token or not self.service_id:
             return {"error": "Render API not configured"}
             
         try:
-            url = f"https://api.render.com/v1/services/{self.service_id}/deploys"
-            response = requests.get(url, headers=self.headers, timeout=30)
-            response.raise_for_status()
-            
-            deploys = response.json()
+            # Only the newest deploy matters; unchanged lists come back as 304s
+            if self._deploys_poller is None:
+                url = f"{render_api_url()}/services/{self.service_id}/deploys"
+                self._deploys_poller = ConditionalPoller(self.session, url, params={'limit': 1})
+            deploys = self._deploys_poller.get()
             if deploys:
-                latest = deploys[0]
-                return {
-                    "status": latest.get('status'),
-                    "id": latest.get('id'),
-                    "commit": latest.get('commit', {}).get('id'),
-                    "created_at": latest.get('createdAt'),
-                    "finished_at": latest.get('finishedAt'),
-                    "build_logs_url": latest.get('buildLogsUrl')
-                }
+                return summarize_deploy(deploys[0])
             return {"status": "no_deploys"}
         except Exception as e:
             return {"error": str(e)}
@@ -62,26 +156,48 @@ class RenderDeploymentMonitor:
                 return {"error": "No deployment ID available"}
                 
             # Get deployment details
-            url = f"https://api.render.com/v1/services/{self.service_id}/deploys/{deploy_id}"
-            response = requests.get(url, headers=self.headers, timeout=30)
+            url = f"{render_api_url()}/services/{self.service_id}/deploys/{deploy_id}"
+            response = self.session.get(url, timeout=30)
             response.raise_for_status()
             
             deploy_data = response.json()
             
-            # Try to get build logs if available
+            # Stream build logs through the analyzer instead of buffering them
             logs_url = deploy_data.get('buildLogsUrl')
             logs = ""
+            errors = []
+            log_bytes = 0
             if logs_url:
-                try:
-                    logs_response = requests.get(logs_url, timeout=60)
-                    logs = logs_response.text
-                except Exception as e:
-                    logs = f"Could not fetch logs: {e}"
+                with span('render.logs', deploy_id=deploy_id) as log_span:
+                    analyzer = BuildLogAnalyzer(tail_lines=self.log_tail_lines)
+                    # Archive the same stream so later searches don't need Render to keep the log
+                    archive = self.log_archive.writer(deploy_id, self.service_id) if self.log_archive else None
+                    try:
+                        with self.log_session.get(logs_url, timeout=60, stream=True) as logs_response:
+                            logs_response.raise_for_status()
+                            for chunk in logs_response.iter_content(chunk_size=self.log_chunk_size):
+                                if chunk:
+                                    analyzer.feed(chunk)
+                                    if archive:
+                                        archive.feed(chunk)
+                        analyzer.close()
+                        if archive:
+                            archive.close()
+                        logs = analyzer.tail_text()
+                    except Exception as e:
+                        if archive:
+                            archive.abort()
+                        logs = f"Could not fetch logs: {e}"
+                    errors = analyzer.errors
+                    log_bytes = analyzer.bytes_seen
+                    log_span.set(bytes=log_bytes, errors=len(errors))
             
             return {
                 "deploy_id": deploy_id,
                 "status": deploy_data.get('status'),
                 "logs": logs,
+                "errors": errors,
+                "log_bytes": log_bytes,
                 "error_message": deploy_data.get('errorMessage'),
                 "created_at": deploy_data.get('createdAt'),
                 "finished_at": deploy_data.get('finishedAt')
@@ -90,35 +206,112 @@ class RenderDeploymentMonitor:
             return {"error": str(e)}
     
     def analyze_build_failure(self, logs):
-        """Analyze build logs to identify specific TypeScript errors"""
+        """Analyze build logs and return structured TypeScript/Node error records"""
         if not logs:
             return []
-            
-        errors = []
-        lines = logs.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if 'error TS' in line and ('server/' in line or 'db/' in line or 'shared/' in line):
-                errors.append(line)
-            elif 'Cannot find module' in line:
-                errors.append(line)
-            elif 'Property' in line and 'does not exist' in line:
-                errors.append(line)
-            elif 'Object literal may only specify known properties' in line:
-                errors.append(line)
-        
-        return errors
-    
-    def trigger_fix_pr(self, errors):
-        """Create a PR to fix the identified errors"""
+        if isinstance(logs, list):
+            return logs
+        return analyze_text(logs)
+    
+    def cancel_deployment(self, deploy_id):
+        """Cancel an in-progress deployment"""
+        try:
+            url = f"{render_api_url()}/services/{self.service_id}/deploys/{deploy_id}/cancel"
+            response = self.session.post(url, timeout=30)
+            response.raise_for_status()
+            return {"success": True, "deploy_id": deploy_id}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+    
+    def tail_build_logs(self, status):
+        """Analyze newly appended build log bytes; return a failure event on a fatal error"""
+        deploy_id = status.get('id')
+        logs_url = status.get('build_logs_url')
+        if not deploy_id or not logs_url or deploy_id in self._handled_deploys:
+            return None
+        
+        if self._tailer is None or self._tail_deploy_id != deploy_id:
+            self._tailer = LogTailer(logs_url, session=self.log_session, chunk_size=self.log_chunk_size)
+            self._tail_deploy_id = deploy_id
+        
+        try:
+            new_errors = self._tailer.poll()
+        except Exception as e:
+            print(f"Could not tail logs: {e}")
+            return None
+        
+        fatal = [e for e in new_errors if is_fatal(e)]
+        if not fatal:
+            return None
+        
+        event = {
+            "deploy_id": deploy_id,
+            "errors": self._tailer.analyzer.errors,
+            "log_bytes": self._tailer.offset,
+            "detected_at": datetime.now().isoformat()
+        }
+        print(f"❌ Fatal build error detected in deploy {deploy_id} after {event['log_bytes']} log bytes")
+        if self.cancel_on_failure:
+            cancel = self.cancel_deployment(deploy_id)
+            event["canceled"] = cancel["success"]
+            print(f"Cancel deploy {deploy_id}: {'ok' if cancel['success'] else cancel['error']}")
+        if self.on_failure:
+            self.on_failure(event)
+        return event
+    
+    def handle_build_failure(self, deploy_id, errors):
+        """Report build errors and open a fix PR once per deploy"""
+        if deploy_id in self._handled_deploys:
+            print(f"Deploy {deploy_id} already handled, skipping")
+            return
+        self._handled_deploys.add(deploy_id)
+        if self.history:
+            self.history.record_errors(deploy_id, errors)
+        
+        print(f"Found {len(errors)} build errors")
+        for e in errors[:10]:
+            where = f"{e['file']}:{e['line']}:{e['column']}" if e['file'] else '(no location)'
+            print(f"  {where} {e['code'] or e['kind']}: {e['message']}")
+        
+        if errors:
+            print("Queueing fix PR...")
+            fix_result = self.trigger_fix_pr(errors, deploy_id)
+            if fix_result.get('skipped'):
+                pr = fix_result.get('pr') or fix_result.get('branch') or f"job {fix_result.get('job_id')}"
+                print(f"↪ All errors already covered by fix work {fix_result['work_id']} "
+                      f"({fix_result['state']}, {pr}); not opening another PR")
+            elif fix_result.get('success'):
+                verb = "Queued" if fix_result.get('queued') else "Already queued as"
+                print(f"✅ {verb} fix job {fix_result['job_id']}")
+                print(f"Goal: {fix_result.get('goal')}")
+            else:
+                print(f"❌ Failed to queue fix PR: {fix_result.get('error')}")
+    
+    def trigger_fix_pr(self, errors, deploy_id=None):
+        """Queue a PR to fix the identified errors, unless earlier fix work already covers them all"""
         if not errors:
             return None
+        
+        fps = self.fingerprints.observe(deploy_id, errors) if self.fingerprints else []
+        work = self.fingerprints.coverage(fps, stale_after=2 * self._fix_queue().deadline) if fps else None
+        if work:
+            self.fingerprints.attach(work['id'])
+            return {
+                "success": True,
+                "queued": False,
+                "skipped": True,
+                "work_id": work['id'],
+                "job_id": work['job_id'],
+                "state": work['state'],
+                "branch": work['branch'],
+                "pr": work['pr'],
+                "goal": work['goal']
+            }
             
         # Categorize errors
-        missing_deps = [e for e in errors if 'Cannot find module' in e]
-        type_errors = [e for e in errors if 'error TS' in e]
-        schema_errors = [e for e in errors if 'Property' in e and 'does not exist' in e]
+        missing_deps = [e for e in errors if busts_cache(e)]
+        type_errors = [e for e in errors if e['code']]
+        schema_errors = [e for e in errors if e['kind'] == 'missing_property']
         
         # Create a focused goal for fixing these specific issues
         goal_parts = []
@@ -132,74 +325,215 @@ class RenderDeploymentMonitor:
         goal = "Fix Render build failures: " + ", ".join(goal_parts)
         
         try:
-            # Use the agent to create a fix PR
-            result = subprocess.run([
-                'make', '-C', 'agent', 'PY=python3', 'run', 
-                f'GOAL="{goal}"'
-            ], capture_output=True, text=True, timeout=300)
-            
-            return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr,
-                "goal": goal
-            }
+            job, created = self._fix_queue().submit(goal, error_fingerprint(errors),
+                                                    payload={'fingerprints': sorted({fingerprint(e) for e in errors})})
         except Exception as e:
             return {"success": False, "error": str(e)}
+        if self.fingerprints:
+            existing = None if created else self.fingerprints.work_for_job(job['id'])
+            if existing:
+                self.fingerprints.attach(existing['id'])
+            else:
+                self.fingerprints.open_work(goal, fps, job['id'])
+        return {
+            "success": True,
+            "queued": created,
+            "job_id": job['id'],
+            "state": job['state'],
+            "goal": goal
+        }
     
-    def monitor_deployment(self, max_attempts=10, check_interval=30):
-        """Monitor deployment and automatically fix issues"""
-        print(f"[{datetime.now()}] Starting Render deployment monitoring...")
+    def _fix_queue(self):
+        # Fix jobs run in-process on worker threads, each task in its own git worktree
+        if self.fix_queue is None:
+            self.fix_queue = FixJobQueue(run_fix_goal, on_done=self._fix_done)
+        return self.fix_queue
+    
+    def _fix_done(self, job):
+        # Failed work stops covering its fingerprints, so the next occurrence retries
+        if not self.fingerprints:
+            return
+        work = self.fingerprints.work_for_job(job['id'])
+        if work:
+            results = (job['result'] or {}).get('results', [])
+            self.fingerprints.update_work(
+                work['id'], state=job['state'], finished_at=job['finished_at'],
+                branch=', '.join(r['branch'] for r in results if r.get('branch')) or None,
+                pr=', '.join(r['pr'] for r in results if r.get('pr')) or None)
+    
+    def wait_for_fixes(self, timeout=None):
+        """Wait for queued fix jobs to finish and report how each one ended"""
+        if not self.fix_queue:
+            return []
+        timeout = timeout if timeout is not None else self.fix_queue.deadline
+        if not self.fix_queue.wait(timeout):
+            print(f"Fix jobs still running after {timeout}s")
+        jobs = self.fix_queue.status()
+        for job in jobs:
+            prs = [r['pr'] for r in (job['result'] or {}).get('results', []) if r.get('pr')]
+            detail = ', '.join(prs) or job['error'] or ''
+            print(f"Fix job {job['id']} {job['state']}: {job['goal']} {detail}".rstrip())
+        return jobs
+    
+    def monitor_deployment(self, timeout=None, check_interval=None):
+        """Monitor deployment and automatically fix issues.
+        
+        Polls on an adaptive schedule until ``timeout`` seconds of wall-clock
+        time have passed; pass ``check_interval`` to poll at a fixed rate instead.
+        """
+        timeout = timeout or int(os.getenv('RENDER_MONITOR_TIMEOUT', '1800'))
+        scheduler = PollScheduler(deadline=timeout, fixed=check_interval)
+        self.poll_scheduler = scheduler
+        self._push_since = time.time()
+        print(f"[{datetime.now()}] Starting Render deployment monitoring ({scheduler.stats()['mode']} polling, {timeout}s deadline)...")
         
-        for attempt in range(max_attempts):
-            print(f"[{datetime.now()}] Attempt {attempt + 1}/{max_attempts}")
+        result = False
+        while not scheduler.expired():
+            print(f"[{datetime.now()}] Poll {scheduler.polls + 1} at {scheduler.elapsed():.0f}s")
             
             # Check deployment status
             status = self.get_deployment_status()
             print(f"Deployment status: {status}")
+            delay = scheduler.next_delay(status.get('status'))
+            if self.events is not None:
+                # Events wake us up; polling is only the fallback when none arrive
+                delay = max(delay, min(self.push_fallback, scheduler.remaining()))
             
             if status.get('status') == 'live':
+                scheduler.mark_detected()
                 print("✅ Deployment successful!")
-                return True
-            elif status.get('status') in ['failed', 'canceled']:
+                result = True
+                break
+            elif status.get('status') in FAILED_STATUSES:
+                scheduler.mark_detected()
                 print("❌ Deployment failed, analyzing logs...")
                 
+                if status.get('id') in self._handled_deploys:
+                    print("Failure already handled during build")
+                    self._sleep(delay)
+                    continue
+                
                 # Get detailed logs
-                logs_data = self.get_deployment_logs()
+                logs_data = self.get_deployment_logs(status.get('id'))
                 if logs_data.get('error'):
                     print(f"Could not get logs: {logs_data['error']}")
+                    self._sleep(delay)
                     continue
                 
-                # Analyze errors
-                errors = self.analyze_build_failure(logs_data.get('logs', ''))
-                print(f"Found {len(errors)} build errors")
-                
-                if errors:
-                    print("Creating fix PR...")
-                    fix_result = self.trigger_fix_pr(errors)
-                    if fix_result.get('success'):
-                        print("✅ Fix PR created successfully")
-                        print(f"Goal: {fix_result.get('goal')}")
-                    else:
-                        print(f"❌ Failed to create fix PR: {fix_result.get('error')}")
+                # Errors were extracted while the log streamed in
+                errors = self.analyze_build_failure(logs_data.get('errors', []))
+                self.handle_build_failure(logs_data['deploy_id'], errors)
                 
                 # Wait before next attempt
-                time.sleep(check_interval)
+                self._sleep(delay)
             else:
                 print(f"Deployment in progress: {status.get('status')}")
-                time.sleep(check_interval)
+                if status.get('status') not in IN_PROGRESS_STATUSES:
+                    self._sleep(delay)
+                    continue
+                
+                # Tail the build log between status checks to catch fatal errors early
+                wait_until = time.monotonic() + delay
+                while True:
+                    event = self.tail_build_logs(status)
+                    if event:
+                        scheduler.mark_detected()
+                        self.handle_build_failure(event['deploy_id'], event['errors'])
+                        break
+                    remaining = wait_until - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    if self._sleep(min(self.tail_interval, remaining)):
+                        break
+        else:
+            print(f"❌ Monitoring deadline of {timeout}s reached")
         
-        print("❌ Max monitoring attempts reached")
-        return False
+        print(f"Polling stats: {json.dumps(self.poll_stats())}")
+        return result
+    
+    def poll_stats(self):
+        """Request counts and time-to-detect for the last monitor_deployment run"""
+        stats = self.poll_scheduler.stats() if self.poll_scheduler else {}
+        if self._deploys_poller:
+            stats.update(self._deploys_poller.stats())
+        if self._tailer:
+            stats['log_requests'] = self._tailer.requests
+        return stats
+
+    def get_service_statuses(self):
+        """Latest deployment status of every configured service, fetched concurrently"""
+        async def fetch():
+            async with AsyncRenderClient(self.api_token or '') as client:
+                return await client.statuses(self.service_ids)
+        statuses = asyncio.run(fetch())
+        if self.history:
+            for service_id, status in statuses.items():
+                self.history.record(service_id, status)
+        return statuses
+    
+    def monitor_services(self, check_interval=None, timeout=None):
+        """Watch all configured services at once and open fix PRs for failed builds"""
+        timeout = timeout or int(os.getenv('RENDER_MONITOR_TIMEOUT', '1800'))
+        print(f"[{datetime.now()}] Monitoring {len(self.service_ids)} Render services...")
+        
+        async def watch():
+            async with AsyncRenderClient(self.api_token or '') as client:
+                return await client.watch_services(self.service_ids, check_interval, timeout)
+        results = asyncio.run(watch())
+        
+        for service_id, result in results.items():
+            if self.history:
+                self.history.record(service_id, result)
+            if result['success']:
+                print(f"✅ {service_id}: {result['status']} ({result['id']})")
+                continue
+            state = 'timed out' if result.get('timed_out') else result.get('status') or result.get('error')
+            print(f"❌ {service_id}: {state}")
+            if result.get('id') and result['status'] in FAILED_STATUSES:
+                self.handle_build_failure(result['id'], result['errors'])
+        return results
+
+def _option(name, cast=str, default=None):
+    """Value following `name` on the command line; exits with a message if it is missing or malformed"""
+    if name not in sys.argv:
+        return default
+    i = sys.argv.index(name) + 1
+    if i >= len(sys.argv):
+        sys.exit(f"{name} needs a value")
+    try:
+        return cast(sys.argv[i])
+    except ValueError:
+        sys.exit(f"{name}: invalid value {sys.argv[i]!r}")
 
 def main():
     if len(sys.argv) > 1 and sys.argv[1] == '--monitor':
         monitor = RenderDeploymentMonitor()
-        monitor.monitor_deployment()
+        if len(monitor.service_ids) > 1:
+            results = monitor.monitor_services()
+            monitor.wait_for_fixes()
+            sys.exit(0 if all(r['success'] for r in results.values()) else 1)
+        # --fixed N keeps the old constant-interval loop for comparison runs
+        fixed = _option('--fixed', float)
+        if '--listen' in sys.argv:
+            monitor.start_event_listener()
+        monitor.monitor_deployment(check_interval=fixed)
+        monitor.wait_for_fixes()
     elif len(sys.argv) > 1 and sys.argv[1] == '--status':
         monitor = RenderDeploymentMonitor()
-        status = monitor.get_deployment_status()
+        max_age = float(os.getenv('RENDER_STATUS_MAX_AGE', '30'))
+        if len(monitor.service_ids) > 1:
+            status = monitor.get_service_statuses()
+        else:
+            status = monitor.cached_status(max_age) or monitor.get_deployment_status()
         print(json.dumps(status, indent=2))
+    elif len(sys.argv) > 2 and sys.argv[1] == '--search':
+        archive = open_archive()
+        if not archive:
+            sys.exit(1)
+        last = _option('--last', int, 500)
+        service_id = _option('--service')
+        print(json.dumps(archive.search(sys.argv[2], last=last, service_id=service_id,
+                                        use_index='--scan' not in sys.argv), indent=2))
     elif len(sys.argv) > 1 and sys.argv[1] == '--logs':
         monitor = RenderDeploymentMonitor()
         logs_data = monitor.get_deployment_logs()
@@ -207,8 +541,12 @@ def main():
     else:
         print("Usage:")
         print("  python monitor_render.py --monitor  # Monitor deployment and auto-fix")
+        print("  python monitor_render.py --monitor --fixed 30  # Poll at a fixed interval instead")
+        print("  python monitor_render.py --monitor --listen    # Take pushed deploy events, poll as fallback")
         print("  python monitor_render.py --status   # Check current status")
         print("  python monitor_render.py --logs     # Get latest logs")
+        print("  python monitor_render.py --search \"Cannot find module 'drizzle-orm'\" [--last 500]  # Search archived build logs")
+        print("Set RENDER_SERVICE_IDS=srv-a,srv-b to monitor several services concurrently")
 
 if __name__ == "__main__":
     main()
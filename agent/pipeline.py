@@ -0,0 +1,171 @@
+"""Task pipeline shared by main.py and the monitor's fix queue: branch, edit, verify, commit and open a PR per task."""
+import os, time, shutil, tempfile
+from concurrent.futures import ThreadPoolExecutor
+from tools.node_tool import NodeTool, output_lock
+from tools.tracing import span, in_current_context
+
+AGENT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class DeadlineExceeded(Exception):
+    pass
+
+def check_deadline(deadline, phase:str):
+    """Raise once a monotonic deadline has passed; checked between pipeline phases"""
+    if deadline is not None and time.monotonic() > deadline:
+        raise DeadlineExceeded(f"deadline exceeded before {phase}")
+
+def tagged(tag:str):
+    def log(msg:str):
+        with output_lock: print(f"[{tag}] {msg}", flush=True)
+    return log
+
+def run_task(t, repo, node, gh, branch:str, log=print, deadline=None, defer_pr=False):
+    """Apply one planned task on an already checked-out branch.
+
+    With `defer_pr` the PR is not opened here; the result carries a `pr_request`
+    for `submit_prs` to open together with the other tasks' PRs.
+    """
+    result = {'title': t['title'], 'branch': branch, 'ok': True, 'pr': None, 'error': None}
+    with span('task', title=t['title'], branch=branch) as task_span:
+        with span('edit', files=len(t.get('files', [])), edits=len(t.get('edits', []))):
+            repo.apply_minimal_edits(t.get('files', []), t.get('edits'))
+        try:
+            for s in t.get('npmScripts', []):
+                check_deadline(deadline, f"npm run {s}")
+                with span('script', script=s):
+                    ok = node.run_script(s, changed=sorted(repo.touched))
+                if not ok:
+                    log(f"Script failed: {s}"); result.update(ok=False, error=f"npm run {s} failed"); break
+            if result['ok']:
+                check_deadline(deadline, 'commit')
+                repo.commit_all(f"feat(agent): {t['title']}", deadline=deadline)
+        except BaseException:
+            # Until the commit lands, a failed task leaves the tree and index as it found them
+            repo.revert_edits()
+            raise
+        if not result['ok']:
+            repo.revert_edits()
+            log("Reverted the task's edits")
+            task_span.set(status='error')
+            return result
+        check_deadline(deadline, 'PR creation')
+        task_span.set(status='ok')
+        if defer_pr:
+            result['pr_request'] = (branch, t['title'], t.get('acceptance',''))
+            return result
+        result['pr'] = gh.open_pr(branch, t['title'], t.get('acceptance',''), deadline)
+    log(f"PR opened: {result['pr']}")
+    return result
+
+def submit_prs(results, gh, log=print, deadline=None):
+    """Open the PRs deferred by run_task in one rate-limited batch, reusing open PRs for the same branch"""
+    pending = [r for r in results if r.get('pr_request')]
+    if not pending:
+        return results
+    for r, pr in zip(pending, gh.open_prs([r.pop('pr_request') for r in pending], deadline=deadline)):
+        if pr['error']:
+            r.update(ok=False, error=f"PR creation failed: {pr['error']}")
+            log(f"PR for {r['branch']} failed: {pr['error']}")
+        else:
+            r['pr'] = pr['pr']
+            log(f"PR {'opened' if pr['created'] else 'already open'}: {pr['pr']}")
+    return results
+
+def run_sequential(tasks, repo, node, gh, deadline=None):
+    results = []
+    # The node tool may be a warm one shared across runs; bound its scripts by this run's deadline
+    node_deadline, node.deadline = node.deadline, deadline if deadline is not None else node.deadline
+    try:
+        for i, t in enumerate(tasks, 1):
+            start = time.monotonic()
+            b = None
+            try:
+                check_deadline(deadline, f"task {i}")
+                b = repo.start_feature_branch(t['title']); print(f"\nTask {i}: {t['title']} -> {b}")
+                r = run_task(t, repo, node, gh, b, deadline=deadline, defer_pr=True)
+            except Exception as e:
+                r = {'title': t['title'], 'branch': b, 'ok': False, 'pr': None, 'error': str(e)}
+                print(f"Task {i} failed: {e}")
+            r['seconds'] = time.monotonic() - start
+            results.append(r)
+    finally:
+        node.deadline = node_deadline
+    return submit_prs(results, gh, deadline=deadline)
+
+def _exclude_node_modules(repo):
+    """Ignore node_modules symlinks in every worktree; .gitignore's `node_modules/` only matches directories"""
+    path = os.path.join(repo.repo.working_tree_dir, repo.repo.git.rev_parse('--git-path', 'info/exclude'))
+    try:
+        with open(path) as fh:
+            if 'node_modules' in fh.read().split('\n'):
+                return
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as fh:
+        fh.write('\n# Symlinked into agent worktrees\nnode_modules\n')
+
+def _link_node_modules(src_root:str, dst_root:str, dirs):
+    # Fresh worktrees have no installed packages; reuse the main checkout's
+    for d in ['.', *dirs]:
+        src = os.path.join(src_root, d, 'node_modules')
+        dst = os.path.join(dst_root, d, 'node_modules')
+        if os.path.isdir(src) and not os.path.exists(dst) and os.path.isdir(os.path.dirname(dst)):
+            os.symlink(src, dst)
+
+def run_parallel(tasks, repo, gh, jobs:int, client_dir='client', server_dir='server', deadline=None):
+    """Run each task in its own git worktree on its own branch, `jobs` at a time"""
+    root = os.getenv('AGENT_WORKTREE_DIR') or tempfile.mkdtemp(prefix='agent-worktrees-')
+    os.makedirs(root, exist_ok=True)
+    main_root = repo.repo.working_tree_dir
+    _exclude_node_modules(repo)
+
+    def work(i, t):
+        log = tagged(f"task-{i}")
+        start = time.monotonic()
+        branch, wt = None, None
+        try:
+            branch, wt = repo.add_worktree(t['title'], root)
+            wt.log = log
+            log(f"{t['title']} -> {branch}")
+            _link_node_modules(main_root, wt.repo.working_tree_dir,
+                               [os.path.relpath(os.path.join(wt.workdir, d), wt.repo.working_tree_dir)
+                                for d in (client_dir, server_dir)])
+            node = NodeTool(os.path.join(wt.workdir, client_dir), os.path.join(wt.workdir, server_dir),
+                            tag=f"task-{i}", deadline=deadline)
+            r = run_task(t, wt, node, gh, branch, log, deadline, defer_pr=True)
+        except Exception as e:
+            log(f"failed: {e}")
+            r = {'title': t['title'], 'branch': branch, 'ok': False, 'pr': None, 'error': str(e)}
+        finally:
+            if wt is not None:
+                try: repo.remove_worktree(wt)
+                except Exception as e: log(f"worktree cleanup failed: {e}")
+        r['seconds'] = time.monotonic() - start
+        return r
+
+    with ThreadPoolExecutor(max_workers=max(jobs, 1), thread_name_prefix='agent-task') as pool:
+        results = list(pool.map(in_current_context(work), range(1, len(tasks) + 1), tasks))
+    if not os.getenv('AGENT_WORKTREE_DIR'):
+        shutil.rmtree(root, ignore_errors=True)
+    return submit_prs(results, gh, deadline=deadline)
+
+def run_goal(goal:str, repo, gh, deadline=None, jobs:int=1, fingerprints=()):
+    """Plan a goal and run its tasks in isolated worktrees, so several goals can run at once"""
+    from planner import plan_from_goal
+    check_deadline(deadline, 'planning')
+    tasks = plan_from_goal(goal, repo.head(), fingerprints)
+    results = run_parallel(tasks, repo, gh, jobs, os.getenv('CLIENT_DIR','client'),
+                           os.getenv('SERVER_DIR','server'), deadline)
+    return {'success': all(r['ok'] for r in results), 'results': results}
+
+def print_summary(results):
+    from rich.console import Console
+    from rich.table import Table
+    table = Table(title="Agent tasks")
+    for col in ('#', 'Task', 'Branch', 'Result', 'Time', 'PR'):
+        table.add_column(col)
+    for i, r in enumerate(results, 1):
+        outcome = 'ok' if r['ok'] else f"failed: {r['error']}"
+        table.add_row(str(i), r['title'], r['branch'] or '-', outcome, f"{r['seconds']:.1f}s", str(r['pr'] or '-'))
+    Console().print(table)
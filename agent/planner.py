@@ -1,4 +1,23 @@
-def plan_from_goal(goal:str):
+import os
+from tools.plan_cache import open_plan_cache, validate_plan
+
+class PlanCacheMiss(LookupError):
+    pass
+
+_cache = None
+
+def plan_mode():
+    """AGENT_PLAN_MODE: 'cache' (default) reuses stored plans, 'replay' never plans, 'off' always does"""
+    return os.getenv('AGENT_PLAN_MODE', 'cache').lower()
+
+def _cache_handle():
+    # Opened once per process so the daemon and fix workers share one connection
+    global _cache
+    if _cache is None:
+        _cache = open_plan_cache() or False
+    return _cache or None
+
+def _plan(goal:str):
     slug = goal
     return [{
         "title": slug,
@@ -7,3 +26,26 @@ def plan_from_goal(goal:str):
         "files": ["client/src/agent-wiring.md", "server/agent-wiring.md"],
         "npmScripts": []
     }]
+
+def plan_from_goal(goal:str, head:str=None, fingerprints=()):
+    """Tasks for a goal, reusing the plan made for the same goal, HEAD and error fingerprints"""
+    mode = plan_mode()
+    cache = _cache_handle() if mode != 'off' else None
+    if cache:
+        tasks = cache.get(goal, head, fingerprints)
+        if tasks is None and mode == 'replay':
+            # Replays reproduce what was planned before, even if HEAD has moved since
+            tasks = cache.latest(goal, fingerprints)
+        if tasks is not None:
+            print(f"Reusing cached plan for: {goal}")
+            return tasks
+    if mode == 'replay':
+        raise PlanCacheMiss(f"No cached plan for goal {goal!r} (AGENT_PLAN_MODE=replay)")
+
+    tasks = _plan(goal)
+    problems = validate_plan(tasks)
+    if problems:
+        raise ValueError(f"Invalid plan for {goal!r}: {'; '.join(problems[:5])}")
+    if cache:
+        cache.put(goal, head, fingerprints, tasks)
+    return tasks
@@ -20,6 +20,13 @@ while true; do
   # Default goal if none supplied
   : "${GOAL:=Continuous improvement: tests, UI, API, Render deploys}"
 
+  # AGENT_DAEMON=1 keeps a warm agentd running; main.py hands its runs to it
+  if [[ "${AGENT_DAEMON:-}" == "1" ]] && ! python3 agent/agentd.py --ping >/dev/null 2>&1; then
+    mkdir -p agent/logs
+    nohup python3 agent/agentd.py >> agent/logs/agentd.log 2>&1 &
+    sleep 2
+  fi
+
   make -C agent PY=python3 run GOAL="$GOAL" || true
   # Pause between runs (20 min default). Override with SLEEP_SECS=600 etc.
   : "${SLEEP_SECS:=1200}"
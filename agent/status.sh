@@ -15,9 +15,9 @@ else
     echo "❌ Automation Runner: NOT RUNNING"
 fi
 
-if pgrep -f "monitor.sh" > /dev/null; then
+if pgrep -f "monitor_daemon.py|monitor.sh" > /dev/null; then
     echo "✅ Monitor: RUNNING"
-    echo "   PID: $(pgrep -f 'monitor.sh')"
+    echo "   PID: $(pgrep -f 'monitor_daemon.py|monitor.sh' | tr '\n' ' ')"
 else
     echo "❌ Monitor: NOT RUNNING"
 fi
@@ -42,6 +42,21 @@ fi
 
 echo
 
+# Health as tracked by the monitor daemon
+if [ -f "agent/logs/monitor-state.json" ]; then
+    echo "🩺 MONITOR HEALTH:"
+    echo "-----------------"
+    python3 - <<'PY'
+import json, time
+s = json.load(open('agent/logs/monitor-state.json'))
+h = s['health']
+print(f"   Overall: {h['overall']}  (build={h['build']['state']}, deploy={h['deploy']['state']})")
+print(f"   Failures: {s['failures']}  Runner PID: {s['runner_pid']}  Watch: {s['watch_mode']}")
+print(f"   Updated {int(time.time() - s['updated_at'])}s ago")
+PY
+    echo
+fi
+
 # Check build status
 echo "🔧 BUILD STATUS:"
 echo "---------------"
@@ -105,7 +120,7 @@ echo
 echo "💻 SYSTEM RESOURCES:"
 echo "-------------------"
 echo "CPU Usage: $(top -l 1 | grep "CPU usage" | awk '{print $3}' | sed 's/%//')"
-echo "Memory: $(ps -o pid,rss,comm -p $(pgrep -f 'runner.sh\|monitor.sh' 2>/dev/null | tr '\n' ' ') 2>/dev/null | awk 'NR>1 {sum+=$2} END {print sum/1024 " MB"}' || echo "N/A")"
+echo "Memory: $(ps -o pid,rss,comm -p $(pgrep -f 'runner.sh|monitor_daemon.py' 2>/dev/null | tr '\n' ' ') 2>/dev/null | awk 'NR>1 {sum+=$2} END {print sum/1024 " MB"}' || echo "N/A")"
 
 echo
 
@@ -135,7 +150,7 @@ echo "-----------------"
 echo "View logs:    tail -f agent/logs/runner.log"
 echo "Check status: ./agent/status.sh"
 echo "Manual deploy: cd agent && python3 deploy_render.py"
-echo "Stop system:  pkill -f 'runner.sh\|monitor.sh'"
+echo "Stop system:  pkill -f 'monitor_daemon.py'  # also stops its runner"
 
 echo
 echo "🕐 Last Updated: $(date)"
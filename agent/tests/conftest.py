@@ -0,0 +1,42 @@
+import os
+import sys
+import pytest
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AGENT_DIR)
+
+from bench.standins import RenderStandin, GitHubStandin  # noqa: E402
+
+
+@pytest.fixture
+def render():
+    server = RenderStandin(build_seconds=0, log_bytes=64 * 1024).start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def github():
+    server = GitHubStandin().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def agent_env(monkeypatch, tmp_path, render):
+    """Point the agent's stores at tmp_path and its Render calls at the stand-in"""
+    env = {
+        'RENDER_API_URL': render.url,
+        'RENDER_API_TOKEN': 'test-token',
+        'RENDER_SERVICE_ID': 'srv-test',
+        'RENDER_SERVICE_IDS': '',
+        'RENDER_DEPLOY_HOOK_URL': '',
+        'AGENT_DEPLOY_DB': str(tmp_path / 'deploys.db'),
+        'AGENT_LOG_ARCHIVE': str(tmp_path / 'archive'),
+        'AGENT_FINGERPRINT_DB': str(tmp_path / 'fingerprints.db'),
+        'AGENT_PLAN_CACHE': 'off',
+        'AGENT_TRACE': '',
+    }
+    for k, v in env.items():
+        monkeypatch.setenv(k, v)
+    return env
@@ -0,0 +1,36 @@
+from tools.deploy_events import DeployStateTable, parse_render_event
+
+
+def test_update_keeps_details_when_event_has_no_id():
+    table = DeployStateTable()
+    table.update({'service_id': 'srv', 'id': 'dep-1', 'status': 'build_in_progress',
+                  'build_logs_url': 'http://logs/dep-1'})
+    table.update({'service_id': 'srv', 'id': None, 'status': 'build_failed'})
+    state = table.get('srv')
+    assert state['status'] == 'build_failed'
+    assert state['id'] == 'dep-1'
+    assert state['build_logs_url'] == 'http://logs/dep-1'
+
+
+def test_update_drops_details_of_a_different_deploy():
+    table = DeployStateTable()
+    table.update({'service_id': 'srv', 'id': 'dep-1', 'status': 'live', 'build_logs_url': 'http://logs/dep-1'})
+    table.update({'service_id': 'srv', 'id': 'dep-2', 'status': 'build_in_progress'})
+    assert table.get('srv').get('build_logs_url') is None
+
+
+def test_parse_event_carries_build_logs_url():
+    state = parse_render_event({'type': 'build_ended', 'timestamp': 't', 'data': {
+        'serviceId': 'srv', 'deployId': 'dep-1', 'status': 'failed', 'buildLogsUrl': 'http://logs/dep-1'}})
+    assert state['status'] == 'build_failed'
+    assert state['build_logs_url'] == 'http://logs/dep-1'
+
+
+def test_check_status_reports_missing_credentials(monkeypatch, capsys):
+    import deploy_render
+    for k in ('RENDER_SERVICE_IDS', 'RENDER_SERVICE_ID', 'RENDER_API_TOKEN'):
+        monkeypatch.setenv(k, '')
+    monkeypatch.setenv('AGENT_DEPLOY_DB', 'off')
+    monkeypatch.setattr(deploy_render, 'fetch_pushed_statuses', lambda: {})
+    deploy_render.check_status()
+    assert 'API credentials not configured' in capsys.readouterr().out
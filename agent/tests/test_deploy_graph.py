@@ -0,0 +1,50 @@
+import time
+
+from tools.deploy_graph import DeployOrchestrator
+
+
+class HookOnlyTool:
+    api_token = ''
+    service_id = ''
+    deploy_hook_url = 'https://hooks.example/deploy'
+
+    def get_deploy_status(self, deploy_id=None):
+        return {'success': False, 'error': 'Render API credentials not configured'}
+
+    def deploy(self, commit_sha=None, clear_cache=None, force=False):
+        return {'success': True, 'method': 'hook', 'deploy_id': None}
+
+
+def graph(**hook_opts):
+    base = {'service_id': None, 'hook_url': 'https://hooks.example/deploy', 'readiness_url': None,
+            'timeout': None, 'assume_ready': False}
+    return {
+        'api': dict(base, name='api', depends_on=[], **hook_opts),
+        'web': dict(base, name='web', depends_on=['api']),
+    }
+
+
+def run(g):
+    orchestrator = DeployOrchestrator(g, tool_factory=lambda s: HookOnlyTool(), log=lambda m: None)
+    return orchestrator.run()
+
+
+def test_unconfirmed_hook_service_blocks_dependents(agent_env):
+    result = run(graph())
+    assert result['services']['api']['state'] == 'unconfirmed'
+    assert result['services']['web']['state'] == 'skipped'
+    assert not result['success']
+
+
+def test_dependents_wait_out_the_deploy_timeout(agent_env):
+    start = time.monotonic()
+    result = run(graph(timeout=0.3))
+    assert time.monotonic() - start >= 0.3
+    assert result['services']['api']['state'] == 'unconfirmed'
+    assert result['services']['web']['state'] == 'unconfirmed'
+
+
+def test_assume_ready_releases_dependents_at_once(agent_env):
+    result = run(graph(assume_ready=True))
+    assert result['services']['web']['state'] == 'unconfirmed'
+    assert result['success']
@@ -0,0 +1,18 @@
+from tools.deploy_store import percentile
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 11))
+    assert percentile([1, 2], 50) == 1
+    assert percentile(values, 50) == 5
+    assert percentile(values, 90) == 9
+    assert percentile(values, 95) == 10
+    assert percentile(values, 100) == 10
+    assert percentile(values, 0) == 1
+    assert percentile(list(range(1, 101)), 99) == 99
+
+
+def test_percentile_unsorted_and_empty():
+    assert percentile([30, 10, 20], 50) == 20
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
@@ -0,0 +1,20 @@
+import os
+import stat
+import subprocess
+
+from tools import edit_engine
+from tools.edit_engine import EditBatch
+
+
+def test_new_files_get_the_umask_mode_without_changing_it(tmp_path, monkeypatch):
+    subprocess.run(['git', 'init', '-q', str(tmp_path)], check=True)
+    expected = 0o666 & ~edit_engine._UMASK
+
+    def no_umask(mask):
+        raise AssertionError('os.umask flips the process-wide mask')
+    monkeypatch.setattr(os, 'umask', no_umask)
+
+    batch = EditBatch(str(tmp_path))
+    batch.stage([{'op': 'write', 'path': 'client/src/new.ts', 'content': 'export {};\n'}])
+    batch.apply(index=False)
+    assert stat.S_IMODE(os.stat(tmp_path / 'client/src/new.ts').st_mode) == expected
@@ -0,0 +1,68 @@
+import time
+
+from tools.fix_queue import FixJobQueue
+from tools.fingerprint_index import FingerprintIndex, fingerprint
+from tools.log_analyzer import error_fingerprint
+
+
+def test_wait_returns_after_on_done_ran():
+    recorded = []
+
+    def on_done(job):
+        time.sleep(0.2)
+        recorded.append((job['id'], job['state']))
+
+    q = FixJobQueue(lambda goal, deadline: {'success': True}, workers=1, on_done=on_done)
+    job, _ = q.submit('fix it')
+    assert q.wait(5)
+    assert recorded == [(job['id'], 'succeeded')]
+    q.shutdown()
+
+
+def test_on_done_failure_still_settles_job():
+    def on_done(job):
+        raise RuntimeError('boom')
+
+    q = FixJobQueue(lambda goal, deadline: {'success': False, 'error': 'nope'}, workers=1, on_done=on_done)
+    job, _ = q.submit('fix it')
+    assert q.wait_for(job['id'], 5)['state'] == 'failed'
+    q.shutdown()
+
+
+def test_succeeded_work_stops_covering_after_cover_ttl():
+    index = FingerprintIndex(':memory:', cover_ttl=60)
+    fps = index.observe('dep-1', [{'kind': 'type_error', 'code': 'TS2322', 'file': 'client/a.ts',
+                                   'module': None, 'message': 'bad'}])
+    work = index.open_work('fix', fps, 'job-1')
+    index.update_work(work['id'], state='succeeded', finished_at=time.time())
+    assert index.coverage(fps)['id'] == work['id']
+
+    # Seeing the error again doesn't keep old succeeded work alive
+    index.update_work(work['id'], finished_at=time.time() - 120)
+    index.observe('dep-2', [{'kind': 'type_error', 'code': 'TS2322', 'file': 'client/a.ts',
+                             'module': None, 'message': 'bad'}])
+    assert index.coverage(fps) is None
+
+
+def test_error_fingerprint_follows_per_error_fingerprints():
+    a = {'kind': 'type_error', 'code': 'TS2322', 'file': '/opt/render/project/src/client/a.ts',
+         'module': None, 'message': "Type 'string' is not assignable at line 3"}
+    b = dict(a, file='/tmp/worktree-x/client/a.ts', message="Type 'string' is not assignable at line 9")
+    assert fingerprint(a) == fingerprint(b)
+    assert error_fingerprint([a]) == error_fingerprint([b])
+    c = dict(a, message="Type 'number' is not assignable")
+    assert error_fingerprint([a]) != error_fingerprint([c])
+
+
+def test_collected_and_expired_jobs_are_evicted():
+    q = FixJobQueue(lambda goal, deadline: {'success': True}, workers=1, retain=60)
+    first, _ = q.submit('one')
+    second, _ = q.submit('two')
+    assert q.wait(5)
+    assert q.wait_for(first['id'], collect=True)['state'] == 'succeeded'
+    assert q.get(first['id']) is None
+    assert [j['id'] for j in q.status()] == [second['id']]
+
+    q.jobs[second['id']]['finished_at'] -= 120
+    assert q.status() == []
+    q.shutdown()
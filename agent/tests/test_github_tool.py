@@ -0,0 +1,36 @@
+import time
+import pytest
+import requests
+from tools.github_tool import GitHubTool
+
+
+@pytest.fixture
+def gh(monkeypatch, github):
+    monkeypatch.setenv('GITHUB_API_URL', github.url)
+    monkeypatch.setenv('GITHUB_TOKEN', 'test-token')
+    monkeypatch.setenv('GITHUB_RATE', '100')
+    return GitHubTool('acme/app')
+
+
+def test_open_pr_respects_deadline(gh, github):
+    github.latency = 1.0
+    start = time.monotonic()
+    with pytest.raises(requests.Timeout):
+        gh.open_pr('agent/fix', 'Fix', '', deadline=time.monotonic() + 0.3)
+    assert time.monotonic() - start < 1.0
+
+
+def test_open_prs_reports_deadline_as_error(gh):
+    results = gh.open_prs([('agent/fix', 'Fix', '')], deadline=time.monotonic() - 1)
+    assert results[0]['pr'] is None
+    assert 'deadline' in results[0]['error']
+
+
+def test_fork_pr_with_same_branch_is_not_reused(gh, github):
+    fork = gh.request('POST', '/repos/acme/app/pulls', json={'title': 'Fork', 'head': 'someone:agent/fix'})
+    assert fork.status_code == 201
+    assert gh.find_open_prs() == {}
+
+    results = gh.open_prs([('agent/fix', 'Fix', '')])
+    assert results[0]['created'] and results[0]['pr'] != fork.json()['html_url']
+    assert gh.find_open_prs() == {'agent/fix': results[0]['pr']}
@@ -0,0 +1,41 @@
+import json
+import pytest
+
+from tools.impact import ImpactResolver
+
+
+@pytest.fixture
+def repo(tmp_path):
+    (tmp_path / '.git').mkdir()
+    (tmp_path / 'tsconfig.json').write_text(json.dumps({'include': ['client/src/**/*', 'server/**/*', 'shared/**/*']}))
+    (tmp_path / 'package.json').write_text(json.dumps({'scripts': {'build': 'vite build && esbuild server/index.ts',
+                                                                   'check': 'tsc'}}))
+    for d in ('client/src', 'server', 'shared'):
+        (tmp_path / d).mkdir(parents=True)
+    (tmp_path / 'server' / 'index.ts').write_text("import { x } from '../shared/schema';\n")
+    (tmp_path / 'shared' / 'schema.ts').write_text('export const x = 1;\n')
+    (tmp_path / 'client' / 'src' / 'main.tsx').write_text('export {};\n')
+    return ImpactResolver(str(tmp_path))
+
+
+def test_package_changes_are_narrowed(repo):
+    assert repo.affected(['server/index.ts']) == {'server'}
+    assert repo.affected(['shared/schema.ts']) == {'shared', 'server'}
+    assert repo.affected(['vite.config.ts']) == {'client'}
+
+
+def test_docs_only_change_affects_nothing(repo):
+    assert repo.affected(['README.md', 'docs/notes.txt']) == set()
+    assert repo.plan('check', ['README.md']) == []
+
+
+@pytest.mark.parametrize('path', ['tests/login.spec.ts', 'playwright.config.ts', 'scripts/pw-loop-failed.js'])
+def test_paths_outside_every_package_run_in_full(repo, path):
+    assert repo.affected(['server/index.ts', path]) is None
+    assert repo.plan('check', [path]) is None
+
+
+def test_missing_root_script_runs_in_full(repo):
+    # The root manifest hosts server but has no 'test' script: nothing may be skipped
+    assert repo.plan('test', ['server/index.ts']) is None
+    assert repo.plan('test', ['README.md']) == []
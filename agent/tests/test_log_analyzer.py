@@ -0,0 +1,21 @@
+from tools.log_analyzer import analyze_text, needs_clean_build
+
+
+def test_missing_package_busts_cache():
+    errors = analyze_text("server/index.ts(1,20): error TS2307: Cannot find module 'drizzle-orm' or its corresponding type declarations.\n")
+    assert errors[0]['module'] == 'drizzle-orm'
+    assert needs_clean_build(errors)
+    scoped = analyze_text("server/db.ts(2,1): error TS2307: Cannot find module '@neondatabase/serverless'.\n")
+    assert needs_clean_build(scoped)
+
+
+def test_missing_relative_import_keeps_cache():
+    for spec in ('./routs', '../shared/schemaa', '@/components/ui/buton'):
+        errors = analyze_text(f"server/index.ts(3,24): error TS2307: Cannot find module '{spec}' or its corresponding type declarations.\n")
+        assert errors and errors[0]['module'] == spec
+        assert not needs_clean_build(errors), spec
+
+
+def test_lockfile_error_busts_cache():
+    errors = analyze_text("npm error code EUSAGE\nnpm error `npm ci` can only install packages when your package.json and package-lock.json are in sync\n")
+    assert needs_clean_build(errors)
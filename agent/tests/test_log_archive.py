@@ -0,0 +1,53 @@
+import os
+
+from tools.log_archive import LogArchive, query_terms
+
+LOG = (
+    "==> Building client\n"
+    "vite v5.0.0 building for production...\n"
+    "transforming client/src/pages/login.tsx\n"
+    "client/src/lib/api.ts(12,5): error TS2322: Type 'string' is not assignable to type 'number'.\n"
+)
+
+
+def archived(tmp_path, *logs):
+    archive = LogArchive(str(tmp_path))
+    for i, log in enumerate(logs):
+        w = archive.writer(f"dep-{i}")
+        w.feed(log.encode())
+        w.close()
+    return archive
+
+
+def test_paths_outside_error_lines_are_found_through_the_index(tmp_path):
+    archive = archived(tmp_path, LOG, "nothing to see here\n")
+    result = archive.search('transforming client/src/pages/login.tsx')
+    assert result['indexed_terms'] == ['file:client/src/pages/login.tsx*']
+    assert [d['deploy_id'] for d in result['deploys']] == ['dep-0']
+    assert result['blocks_read'] == 1
+
+
+def test_index_agrees_with_a_scan_for_partial_tokens(tmp_path):
+    archive = archived(tmp_path, LOG, "error TS23221: made up\n", "see lib/api.ts for details\n")
+    for query in ('TS232', 'error TS2322', 'lib/api.ts', 'src/lib/api.ts(12', "'string'"):
+        indexed = archive.search(query)
+        scanned = archive.search(query, use_index=False)
+        assert indexed['deploys'] == scanned['deploys'], query
+
+
+def test_query_terms_skip_paths_cut_off_at_the_start():
+    assert query_terms('src/lib/api.ts') == set()
+    assert query_terms(' client/src/a.ts: x') == {'file:client/src/a.ts'}
+    assert query_terms("Cannot find module 'drizzle-orm/pg-core'") == {'module:drizzle-orm'}
+
+
+def test_aborted_writer_leaves_no_bytes_behind(tmp_path):
+    archive = archived(tmp_path, LOG)
+    size = os.path.getsize(archive.data_path)
+    w = archive.writer('dep-broken')
+    w.feed(os.urandom(200 * 1024).hex().encode())
+    assert os.path.getsize(archive.data_path) > size
+    w.abort()
+    assert os.path.getsize(archive.data_path) == size
+    assert not archive.has('dep-broken')
+    assert 'error TS2322' in archive.read_log('dep-0')
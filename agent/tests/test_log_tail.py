@@ -0,0 +1,57 @@
+from tools.log_tail import LogTailer
+
+
+def test_tailer_fetches_only_new_bytes(render):
+    render.build_seconds = 0.4
+    deploy = render.create_deploy('srv-test', None, failed=True)
+    tailer = LogTailer(deploy['buildLogsUrl'])
+    errors = []
+    while render.find('srv-test', deploy['id'])['status'] == 'build_in_progress':
+        errors += tailer.poll()
+    errors += tailer.poll()
+    errors += tailer.close()
+
+    full = render.log_for(deploy['id'])
+    assert tailer.offset == len(full)
+    assert errors
+    statuses = render.stats()['statuses']
+    assert statuses.get('206', 0) >= 1
+    assert render.stats()['bytes_sent'] == len(full)
+
+
+def test_tailer_treats_416_as_nothing_new(render):
+    deploy = render.create_deploy('srv-test', None, failed=False)
+    tailer = LogTailer(deploy['buildLogsUrl'])
+    tailer.poll()
+    offset = tailer.offset
+    assert tailer.poll() == []
+    assert tailer.offset == offset
+    assert render.stats()['statuses'].get('416') == 1
+
+
+def test_monitor_does_not_send_api_token_with_log_requests(agent_env, render):
+    from monitor_render import RenderDeploymentMonitor
+    deploy = render.create_deploy('srv-test', None, failed=False)
+    monitor = RenderDeploymentMonitor()
+    monitor.tail_build_logs({'id': deploy['id'], 'build_logs_url': deploy['buildLogsUrl']})
+    assert 'Authorization' not in render.last_headers['build_log']
+
+    monitor.get_deployment_logs(deploy['id'])
+    assert render.last_headers['get_deploy'].get('Authorization') == 'Bearer test-token'
+    assert 'Authorization' not in render.last_headers['build_log']
+
+
+def test_async_client_does_not_send_api_token_with_log_requests(agent_env, render):
+    import asyncio
+    from tools.render_client import AsyncRenderClient
+    deploy = render.create_deploy('srv-test', None, failed=True)
+
+    async def run():
+        async with AsyncRenderClient(api_token='test-token') as client:
+            await client.list_deploys('srv-test')
+            return await client.analyze_logs(deploy['buildLogsUrl'])
+
+    result = asyncio.run(run())
+    assert result['errors']
+    assert render.last_headers['list_deploys'].get('Authorization') == 'Bearer test-token'
+    assert 'Authorization' not in render.last_headers['build_log']
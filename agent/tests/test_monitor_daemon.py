@@ -0,0 +1,34 @@
+import os
+import pytest
+
+from monitor_daemon import MonitorDaemon
+
+
+@pytest.fixture
+def daemon(agent_env, tmp_path):
+    d = MonitorDaemon(log_dir=str(tmp_path / 'logs'), manage_runner=False)
+    if d.watcher.mode != 'inotify':
+        pytest.skip('inotify unavailable')
+    yield d
+    d.watcher.close()
+
+
+def test_idle_daemon_does_not_wake_itself(daemon):
+    daemon.tick(act=False)
+    assert os.path.exists(daemon.state_path)
+    # Its own state file and log writes are not changes worth another tick
+    assert daemon.watcher.wait(0.3) is False
+    st = os.stat(daemon.state_path)
+    assert daemon.tick(act=False)
+    assert os.stat(daemon.state_path).st_ino == st.st_ino
+    assert daemon.watcher.wait(0.3) is False
+
+
+def test_log_writes_still_wake_the_daemon(daemon):
+    daemon.tick(act=False)
+    daemon.watcher.wait(0)
+    with open(os.path.join(daemon.log_dir, 'deploy.log'), 'a') as fh:
+        fh.write('Deployment failed\n')
+    assert daemon.watcher.wait(2) is True
+    daemon.tick(act=False)
+    assert daemon.health.get('deploy') == 'failed'
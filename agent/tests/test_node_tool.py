@@ -0,0 +1,16 @@
+import json
+import time
+from tools.node_tool import NodeTool
+
+
+def test_deadline_kills_script_children_holding_the_pipe(tmp_path):
+    # The child keeps stdout open after npm itself is gone, as tsc/vite do
+    (tmp_path / 'package.json').write_text(json.dumps({
+        'name': 'slow', 'version': '1.0.0', 'scripts': {'build': 'sh -c "sleep 30; echo $((6*7))"'}}))
+    node = NodeTool(client_dir=str(tmp_path), server_dir=str(tmp_path / 'none'),
+                    cache=False, deadline=time.monotonic() + 2)
+    start = time.monotonic()
+    code, output = node._npm('build', str(tmp_path))
+    assert time.monotonic() - start < 10
+    assert code != 0
+    assert '42' not in output
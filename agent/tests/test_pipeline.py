@@ -0,0 +1,85 @@
+import time
+import subprocess
+
+import pytest
+
+from pipeline import run_sequential, run_task, DeadlineExceeded
+
+
+class FakeRepo:
+    touched = set()
+
+    def start_feature_branch(self, title):
+        return f"agent/{title}"
+
+    def apply_minimal_edits(self, files, edits=None):
+        pass
+
+    def revert_edits(self):
+        pass
+
+    def commit_all(self, message, deadline=None):
+        self.commit_deadline = deadline
+
+
+class SlowNode:
+    deadline = None
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.seen = []
+
+    def run_script(self, name, changed=None):
+        self.seen.append(self.deadline)
+        time.sleep(self.seconds)
+        return True
+
+
+class FakeGitHub:
+    def open_prs(self, pending, deadline=None):
+        self.deadline = deadline
+        return [{'branch': b, 'title': t, 'pr': f"https://pr/{b}", 'created': True, 'error': None}
+                for b, t, _ in pending]
+
+
+def test_sequential_run_honours_the_deadline():
+    repo, node, gh = FakeRepo(), SlowNode(0.3), FakeGitHub()
+    tasks = [{'title': f"t{i}", 'npmScripts': ['build']} for i in range(3)]
+    deadline = time.monotonic() + 0.4
+    results = run_sequential(tasks, repo, node, gh, deadline)
+
+    assert results[0]['ok'] and results[0]['pr']
+    assert not any(r['ok'] for r in results[1:])
+    assert all('deadline exceeded' in r['error'] for r in results[1:])
+    # npm, push and PR calls all got the run's deadline; the warm node tool gets its own back
+    assert node.seen[0] == deadline and node.deadline is None
+    assert repo.commit_deadline == deadline and gh.deadline == deadline
+
+
+def git(cwd, *args):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def test_deadline_before_commit_reverts_the_edits(tmp_path):
+    from tools.repo_tool import RepoTool
+    (tmp_path / 'server').mkdir()
+    (tmp_path / 'server' / 'index.ts').write_text('export {};\n')
+    git(tmp_path, 'init', '-q')
+    git(tmp_path, 'config', 'user.email', 'a@b')
+    git(tmp_path, 'config', 'user.name', 'a')
+    git(tmp_path, 'add', '-A')
+    git(tmp_path, 'commit', '-qm', 'init')
+    head = git(tmp_path, 'rev-parse', 'HEAD')
+
+    repo = RepoTool(str(tmp_path), workdir=str(tmp_path))
+    task = {'title': 't', 'npmScripts': ['build'],
+            'edits': [{'op': 'replace', 'path': 'server/index.ts', 'old': 'export {};', 'new': 'export const x = 1;'},
+                      {'op': 'write', 'path': 'server/new.ts', 'content': 'export {};\n'}]}
+    # The script succeeds but uses up the rest of the deadline
+    with pytest.raises(DeadlineExceeded):
+        run_task(task, repo, SlowNode(0.3), FakeGitHub(), 'master', deadline=time.monotonic() + 0.2)
+
+    assert git(tmp_path, 'status', '--porcelain', '--untracked-files=all') == ''
+    assert git(tmp_path, 'rev-parse', 'HEAD') == head
+    assert (tmp_path / 'server' / 'index.ts').read_text() == 'export {};\n'
+    assert not repo.touched and repo.batch is None
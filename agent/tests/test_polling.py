@@ -0,0 +1,50 @@
+from tools.polling import PollScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def delays(scheduler, clock, phase, until):
+    out = []
+    while clock.now < until:
+        d = scheduler.next_delay(phase)
+        out.append(d)
+        clock.now += d
+    return out
+
+
+def test_fast_window_then_backoff_ramp():
+    clock = FakeClock()
+    s = PollScheduler(fast=2, fast_window=30, min_interval=5, max_interval=60, backoff=1.5,
+                      jitter=0, clock=clock)
+    fast = delays(s, clock, 'build_in_progress', 30)
+    assert set(fast) == {2}
+    slow = [s.next_delay('build_in_progress') for _ in range(8)]
+    # The first slow poll starts the ramp rather than jumping to the cap
+    assert slow[0] < 10
+    assert slow == sorted(slow)
+    assert slow[-1] == 60
+
+
+def test_phase_change_resets_interval():
+    clock = FakeClock()
+    s = PollScheduler(fast=2, fast_window=0, min_interval=5, max_interval=60, backoff=2,
+                      jitter=0, clock=clock)
+    assert s.next_delay('build_in_progress') == 5
+    assert s.next_delay('build_in_progress') == 10
+    assert s.next_delay('update_in_progress') == 5
+
+
+def test_fixed_interval_and_deadline():
+    clock = FakeClock()
+    s = PollScheduler(deadline=10, fixed=4, clock=clock)
+    assert s.next_delay('build_in_progress') == 4
+    clock.now = 8
+    assert s.next_delay('build_in_progress') == 2
+    clock.now = 10
+    assert s.expired()
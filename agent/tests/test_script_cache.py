@@ -0,0 +1,28 @@
+import json
+from tools.script_cache import InputHasher, ScriptCache
+
+
+def test_memo_drops_files_that_no_longer_exist(tmp_path):
+    memo = tmp_path / 'memo.json'
+    tree = tmp_path / 'wt'
+    tree.mkdir()
+    (tree / 'a.ts').write_text('a')
+    (tree / 'b.ts').write_text('b')
+    hasher = InputHasher(str(memo))
+    first = hasher.hash_inputs([str(tree)], str(tmp_path))
+    hasher.save()
+    assert len(json.loads(memo.read_text())) == 2
+
+    (tree / 'b.ts').unlink()
+    reloaded = InputHasher(str(memo))
+    assert list(reloaded._memo) == [str(tree / 'a.ts')]
+    reloaded.save()
+    assert len(json.loads(memo.read_text())) == 1
+    assert reloaded.hash_inputs([str(tree)], str(tmp_path)) != first
+
+
+def test_script_caches_share_one_hasher(tmp_path):
+    a = ScriptCache(str(tmp_path / 'cache'))
+    b = ScriptCache(str(tmp_path / 'cache'))
+    assert a.hasher is b.hasher
+    assert ScriptCache(str(tmp_path / 'other')).hasher is not a.hasher
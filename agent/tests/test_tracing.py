@@ -0,0 +1,56 @@
+import io
+import json
+import datetime
+import pytest
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+from tools import tracing
+
+
+@pytest.fixture
+def tracer(monkeypatch, tmp_path):
+    t = tracing.Tracer(str(tmp_path / 'trace.jsonl'), str(tmp_path / 'metrics.prom'))
+    monkeypatch.setattr(tracing, '_tracer', t)
+    monkeypatch.setattr(tracing, '_checked', True)
+    yield t
+    t.flush()
+
+
+def spans(t):
+    with open(t.trace_path) as fh:
+        return [json.loads(line) for line in fh]
+
+
+def test_pool_work_nests_under_the_submitting_span(tracer):
+    def work(i):
+        with tracing.span('child', i=i):
+            pass
+
+    with tracing.span('parent'):
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(tracing.in_current_context(work), range(4)))
+    records = spans(tracer)
+    parent = next(r for r in records if r['name'] == 'parent')
+    children = [r for r in records if r['name'] == 'child']
+    assert len(children) == 4
+    assert {c['parent_id'] for c in children} == {parent['span_id']}
+    assert {c['trace_id'] for c in children} == {parent['trace_id']}
+
+
+def response(body):
+    r = requests.Response()
+    r.status_code = 200
+    r.url = 'http://standin/logs'
+    r.raw = io.BytesIO(body)
+    r.request = requests.Request('GET', r.url).prepare()
+    r.elapsed = datetime.timedelta(seconds=0.01)
+    return r
+
+
+def test_response_hook_leaves_streamed_bodies_unread(tracer):
+    r = response(b'x' * 100)
+    tracing._response_hook(r, stream=True)
+    assert r.raw.tell() == 0
+    tracing._response_hook(response(b'x' * 100), stream=False)
+    assert [s['attrs']['bytes'] for s in spans(tracer)] == [0, 100]
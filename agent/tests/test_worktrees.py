@@ -0,0 +1,32 @@
+import os
+import subprocess
+
+
+def git(cwd, *args):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def test_linked_node_modules_are_not_staged(tmp_path):
+    from pipeline import _exclude_node_modules, _link_node_modules
+    from tools.repo_tool import RepoTool
+    main = tmp_path / 'main'
+    (main / 'client' / 'node_modules').mkdir(parents=True)
+    (main / '.gitignore').write_text('node_modules/\n')
+    (main / 'client' / 'index.ts').write_text('export {};\n')
+    git(main, 'init', '-q')
+    git(main, 'config', 'user.email', 'a@b')
+    git(main, 'config', 'user.name', 'a')
+    git(main, 'add', '-A')
+    git(main, 'commit', '-qm', 'init')
+
+    repo = RepoTool(str(main), workdir=str(main))
+    _exclude_node_modules(repo)
+    _exclude_node_modules(repo)
+    branch, wt = repo.add_worktree('task', str(tmp_path / 'wt'))
+    _link_node_modules(str(main), wt.repo.working_tree_dir, ['client'])
+    assert os.path.islink(os.path.join(wt.repo.working_tree_dir, 'client', 'node_modules'))
+
+    git(wt.repo.working_tree_dir, 'add', '--all')
+    assert git(wt.repo.working_tree_dir, 'status', '--porcelain') == ''
+    exclude = git(main, 'rev-parse', '--git-path', 'info/exclude').strip()
+    assert (main / exclude).read_text().split('\n').count('node_modules') == 1
@@ -0,0 +1,195 @@
+import os
+import json
+import hmac
+import time
+import base64
+import hashlib
+import threading
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional
+
+# Render webhook event types/statuses mapped onto deploy API statuses
+_EVENT_STATUS = {
+    'build_started': 'build_in_progress',
+    'deploy_started': 'update_in_progress',
+    'pre_deploy_started': 'pre_deploy_in_progress',
+}
+_ENDED_STATUS = {
+    'succeeded': 'live',
+    'failed': 'build_failed',
+    'canceled': 'canceled',
+}
+
+
+def events_url() -> str:
+    """Where the local deploy event listener can be queried"""
+    return os.getenv('RENDER_EVENTS_URL') or f"http://127.0.0.1:{os.getenv('RENDER_EVENTS_PORT', '8787')}"
+
+
+def parse_render_event(payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Turn a Render webhook payload into a deploy-state row, or None if irrelevant"""
+    data = payload.get('data') or {}
+    service_id = data.get('serviceId')
+    if not service_id:
+        return None
+
+    event_type = payload.get('type', '')
+    status = data.get('deployStatus')
+    if not status and event_type.endswith('_ended'):
+        status = _ENDED_STATUS.get(data.get('status', ''), data.get('status'))
+        if event_type == 'build_ended' and status == 'live':
+            # A finished build is not yet a live deploy
+            status = 'update_in_progress'
+    status = status or _EVENT_STATUS.get(event_type)
+    if not status:
+        return None
+
+    deploy = data.get('deploy') or {}
+    return {
+        'service_id': service_id,
+        'status': status,
+        'id': data.get('deployId') or deploy.get('id'),
+        'commit': (deploy.get('commit') or {}).get('id'),
+        # Lets the monitor tail a failing build from the event alone, without polling for details
+        'build_logs_url': data.get('buildLogsUrl') or deploy.get('buildLogsUrl'),
+        'event': event_type,
+        'event_at': payload.get('timestamp'),
+    }
+
+
+def verify_signature(secret: str, headers, body: bytes, tolerance: int = 300) -> bool:
+    """Check a Standard Webhooks signature (webhook-id/-timestamp/-signature headers)"""
+    msg_id = headers.get('webhook-id', '')
+    timestamp = headers.get('webhook-timestamp', '')
+    signatures = headers.get('webhook-signature', '')
+    if not (msg_id and timestamp.isdigit() and signatures):
+        return False
+    if abs(time.time() - int(timestamp)) > tolerance:
+        return False
+
+    key = secret[len('whsec_'):] if secret.startswith('whsec_') else secret
+    try:
+        key_bytes = base64.b64decode(key)
+    except ValueError:
+        key_bytes = key.encode()
+    signed = f"{msg_id}.{timestamp}.".encode() + body
+    expected = base64.b64encode(hmac.new(key_bytes, signed, hashlib.sha256).digest()).decode()
+    return any(hmac.compare_digest(expected, sig.split(',', 1)[-1])
+               for sig in signatures.split())
+
+
+class DeployStateTable:
+    """Thread-safe latest-state-per-service table fed by pushed deploy events"""
+
+    def __init__(self):
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._cond = threading.Condition()
+        self.version = 0
+
+    def update(self, state: Dict[str, Any]):
+        with self._cond:
+            previous = self._states.get(state['service_id'], {})
+            # Keep details learned earlier (deploy id, logs url) when the event lacks them
+            same_deploy = None in (previous.get('id'), state.get('id')) or previous.get('id') == state.get('id')
+            merged = dict(previous) if same_deploy else {}
+            merged.update({k: v for k, v in state.items() if v is not None})
+            merged['received_at'] = time.time()
+            self._states[state['service_id']] = merged
+            self.version += 1
+            self._cond.notify_all()
+
+    def get(self, service_id: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            state = self._states.get(service_id)
+            if state is None:
+                return None
+            if max_age is not None and time.time() - state['received_at'] > max_age:
+                return None
+            return dict(state)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            return {k: dict(v) for k, v in self._states.items()}
+
+    def wait(self, since_version: int, timeout: float) -> bool:
+        """Block until an event newer than ``since_version`` arrives; False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.version > since_version, timeout=timeout)
+
+
+class _EventHandler(BaseHTTPRequestHandler):
+    server_version = 'DeployEvents/1.0'
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, code: int, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        secret = self.server.secret
+        if secret and not verify_signature(secret, self.headers, body):
+            return self._reply(401, {'error': 'invalid signature'})
+        try:
+            state = parse_render_event(json.loads(body or b'{}'))
+        except ValueError:
+            return self._reply(400, {'error': 'invalid JSON'})
+        if state:
+            self.server.table.update(state)
+        self._reply(204)
+
+    def do_GET(self):
+        parts = [p for p in self.path.split('?')[0].split('/') if p]
+        if parts == ['deploys']:
+            return self._reply(200, self.server.table.snapshot())
+        if len(parts) == 2 and parts[0] == 'deploys':
+            state = self.server.table.get(parts[1])
+            return self._reply(200, state) if state else self._reply(404, {'error': 'no events'})
+        self._reply(404, {'error': 'not found'})
+
+
+class DeployEventServer(ThreadingHTTPServer):
+    """Local webhook receiver: POST events in, GET /deploys/<service_id> state out"""
+
+    daemon_threads = True
+
+    def __init__(self, port: Optional[int] = None, host: Optional[str] = None,
+                 table: Optional[DeployStateTable] = None, secret: Optional[str] = None):
+        port = int(os.getenv('RENDER_EVENTS_PORT', '8787')) if port is None else port
+        host = host or os.getenv('RENDER_EVENTS_HOST', '127.0.0.1')
+        super().__init__((host, port), _EventHandler)
+        self.table = table or DeployStateTable()
+        self.secret = os.getenv('RENDER_WEBHOOK_SECRET', '') if secret is None else secret
+        self._thread = None
+
+    def start(self) -> 'DeployEventServer':
+        self._thread = threading.Thread(target=self.serve_forever, name='deploy-events', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def fetch_pushed_statuses(max_age: Optional[float] = None,
+                          timeout: float = 0.5) -> Dict[str, Dict[str, Any]]:
+    """Fresh pushed states from a running listener, keyed by service; {} if none is running"""
+    max_age = float(os.getenv('RENDER_PUSH_MAX_AGE', '600')) if max_age is None else max_age
+    try:
+        response = requests.get(f"{events_url()}/deploys", timeout=timeout)
+        response.raise_for_status()
+        states = response.json()
+    except (requests.RequestException, ValueError):
+        return {}
+    now = time.time()
+    return {sid: state for sid, state in states.items()
+            if now - state.get('received_at', 0) <= max_age}
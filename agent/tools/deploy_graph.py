@@ -0,0 +1,232 @@
+import os
+import re
+import time
+import requests
+import yaml
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable
+from tools.http_session import pooled_session
+from tools.render_client import FAILED_STATUSES
+from tools.render_tool import RenderTool
+from tools.deploy_store import open_history
+from tools.polling import PollScheduler
+from tools.tracing import in_current_context
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(AGENT_DIR)
+
+
+def _env_key(name: str) -> str:
+    return re.sub(r'[^A-Z0-9]', '_', name.upper())
+
+
+def default_graph_path() -> str:
+    return os.getenv('RENDER_SERVICE_GRAPH') or os.path.join(ROOT_DIR, 'render.yaml')
+
+
+def load_service_graph(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Deployable services from a render.yaml-style file, keyed by name.
+
+    Besides the Blueprint fields, each service may set ``dependsOn`` (names of
+    services that must be live first), ``serviceId``, ``deployHookUrl``,
+    ``readinessUrl``, ``deployTimeout`` and ``assumeReady``. Services referenced through
+    ``envVars[].fromService`` are dependencies too. IDs and hooks can also come
+    from ``RENDER_SERVICE_ID_<NAME>`` / ``RENDER_DEPLOY_HOOK_URL_<NAME>``.
+    """
+    with open(path or default_graph_path()) as fh:
+        spec = yaml.safe_load(fh) or {}
+    entries = spec.get('services') or []
+    names = {s['name'] for s in entries}
+    graph = {}
+    for s in entries:
+        name = s['name']
+        depends = list(s.get('dependsOn') or [])
+        depends += [(v.get('fromService') or {}).get('name') for v in s.get('envVars') or []]
+        key = _env_key(name)
+        graph[name] = {
+            'name': name,
+            'service_id': s.get('serviceId') or os.getenv(f'RENDER_SERVICE_ID_{key}'),
+            'hook_url': s.get('deployHookUrl') or os.getenv(f'RENDER_DEPLOY_HOOK_URL_{key}'),
+            'readiness_url': s.get('readinessUrl'),
+            'timeout': s.get('deployTimeout'),
+            'assume_ready': bool(s.get('assumeReady')),
+            # Databases and other non-deployable references are not graph edges
+            'depends_on': sorted({d for d in depends if d in names and d != name}),
+        }
+    if len(graph) == 1:
+        # A single-service blueprint keeps using the plain RENDER_SERVICE_ID/RENDER_DEPLOY_HOOK_URL
+        only = next(iter(graph.values()))
+        only['service_id'] = only['service_id'] or os.getenv('RENDER_SERVICE_ID')
+        only['hook_url'] = only['hook_url'] or os.getenv('RENDER_DEPLOY_HOOK_URL')
+    return graph
+
+
+def topological_waves(graph: Dict[str, Dict[str, Any]]) -> List[List[str]]:
+    """Group services into waves whose members only depend on earlier waves"""
+    missing = {d for s in graph.values() for d in s['depends_on'] if d not in graph}
+    if missing:
+        raise ValueError(f"Unknown dependencies: {', '.join(sorted(missing))}")
+    remaining = {name: set(s['depends_on']) for name, s in graph.items()}
+    waves = []
+    while remaining:
+        wave = sorted(name for name, deps in remaining.items() if not deps)
+        if not wave:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        waves.append(wave)
+        for name in wave:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(wave)
+    return waves
+
+
+class DeployOrchestrator:
+    """Deploy a service graph wave by wave on top of RenderTool.
+
+    Services in a wave are triggered concurrently and each is waited on until
+    live (and, if configured, until its readiness URL answers). A failed,
+    timed-out or skipped service causes everything downstream of it to be skipped.
+
+    A hook-only service without a readiness URL can't be confirmed and ends
+    ``unconfirmed``. Its dependents go ahead only if it sets ``assumeReady``,
+    or after its ``deployTimeout`` has passed; otherwise they are skipped.
+    """
+
+    def __init__(self, graph: Dict[str, Dict[str, Any]], max_parallel: Optional[int] = None,
+                 timeout: Optional[float] = None, check_interval: Optional[float] = None,
+                 tool_factory: Optional[Callable[[Dict[str, Any]], RenderTool]] = None,
+                 log: Callable[[str], None] = print):
+        self.graph = graph
+        self.waves = topological_waves(graph)
+        self.max_parallel = max_parallel or int(os.getenv('RENDER_DEPLOY_PARALLEL', '4'))
+        self.timeout = timeout or float(os.getenv('RENDER_MONITOR_TIMEOUT', '1800'))
+        self.check_interval = check_interval
+        self.log = log
+        self.history = open_history()
+        self.session = pooled_session(os.getenv('RENDER_API_TOKEN', ''), self.max_parallel)
+        self.tool_factory = tool_factory or self._tool
+
+    def _tool(self, service: Dict[str, Any]) -> RenderTool:
+        tool = RenderTool(service['service_id'], session=self.session, history=self.history)
+        # Never fall back to the single-service env settings for a graph member
+        tool.service_id = service['service_id'] or ''
+        tool.deploy_hook_url = service['hook_url'] or ''
+        return tool
+
+    def _latest_id(self, tool: RenderTool) -> Optional[str]:
+        status = tool.get_deploy_status()
+        return status.get('deploy_id') if status['success'] else None
+
+    def _wait_ready(self, service: Dict[str, Any], tool: RenderTool, deploy_id: Optional[str],
+                    previous_id: Optional[str]) -> Dict[str, Any]:
+        scheduler = PollScheduler(deadline=service['timeout'] or self.timeout, fixed=self.check_interval)
+        status: Dict[str, Any] = {}
+        if not (tool.api_token and tool.service_id):
+            # Hook-only service: Render's status is out of reach, the readiness URL is all we have
+            if service['readiness_url']:
+                return self._probe(service, scheduler, {'deploy_id': deploy_id, 'confirmed': False})
+            return self._unconfirmed(service, deploy_id)
+        while not scheduler.expired():
+            status = tool.get_deploy_status(deploy_id)
+            state = status.get('status') if status['success'] else None
+            # A hook returns no deploy id; wait until a newer deploy than before shows up
+            fresh = deploy_id or (status.get('deploy_id') and status.get('deploy_id') != previous_id)
+            if fresh and state == 'live':
+                break
+            if fresh and state in FAILED_STATUSES:
+                return {'state': 'failed', 'status': state, 'deploy_id': status.get('deploy_id')}
+            time.sleep(scheduler.next_delay(state))
+        else:
+            return {'state': 'timed_out', 'status': status.get('status'), 'deploy_id': status.get('deploy_id')}
+
+        return self._probe(service, scheduler, {'status': 'live', 'deploy_id': status.get('deploy_id')})
+
+    def _unconfirmed(self, service: Dict[str, Any], deploy_id: Optional[str]) -> Dict[str, Any]:
+        """Nothing can tell when a hook-only deploy is live; release dependents only on opt-in or after its timeout"""
+        result = {'state': 'unconfirmed', 'deploy_id': deploy_id, 'released': False,
+                  'error': 'hook-only service has no readinessUrl'}
+        if service['assume_ready']:
+            result['released'] = True
+        elif service['timeout']:
+            time.sleep(service['timeout'])
+            result.update(released=True, error=f"assumed live after deployTimeout {service['timeout']}s")
+        return result
+
+    def _probe(self, service: Dict[str, Any], scheduler: PollScheduler, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Wait for the service's readiness URL, if it has one, to answer 2xx"""
+        url = service['readiness_url']
+        while url and not scheduler.expired():
+            try:
+                if requests.get(url, timeout=10).ok:
+                    break
+            except requests.RequestException:
+                pass
+            time.sleep(scheduler.next_delay('live'))
+        else:
+            if url:
+                return dict(result, state='timed_out', error=f"{url} never became ready")
+        return dict(result, state='ready')
+
+    def _deploy_one(self, name: str, commit_sha: Optional[str], force: bool,
+                    clear_cache: Optional[bool]) -> Dict[str, Any]:
+        service = self.graph[name]
+        started = time.monotonic()
+        tool = self.tool_factory(service)
+        previous_id = None if tool.deploy_hook_url == '' else self._latest_id(tool)
+        triggered = tool.deploy(commit_sha, clear_cache, force)
+        if not triggered['success']:
+            result = {'state': 'failed', 'error': triggered.get('error')}
+        elif triggered['method'] == 'skipped':
+            result = {'state': 'ready', 'status': 'live', 'deploy_id': triggered['deploy_id']}
+        else:
+            result = self._wait_ready(service, tool, triggered.get('deploy_id'), previous_id)
+        result.update(name=name, method=triggered.get('method'), seconds=round(time.monotonic() - started, 3))
+        self.log(f"{name}: {result['state']} via {result['method']} in {result['seconds']:.0f}s"
+                 + (f" ({result.get('status') or result.get('error')})" if result['state'] != 'ready' else ''))
+        return result
+
+    @staticmethod
+    def _satisfied(result: Dict[str, Any]) -> bool:
+        return result['state'] == 'ready' or (result['state'] == 'unconfirmed' and result.get('released'))
+
+    def plan(self) -> List[List[str]]:
+        return [list(w) for w in self.waves]
+
+    def run(self, commit_sha: Optional[str] = None, force: bool = False,
+            clear_cache: Optional[bool] = None) -> Dict[str, Any]:
+        started = time.monotonic()
+        services: Dict[str, Dict[str, Any]] = {}
+        waves = []
+        for i, wave in enumerate(self.waves, 1):
+            wave_started = time.monotonic()
+            blocked = {name: [d for d in self.graph[name]['depends_on'] if not self._satisfied(services[d])]
+                       for name in wave}
+            runnable = [name for name in wave if not blocked[name]]
+            for name in wave:
+                if blocked[name]:
+                    services[name] = {'name': name, 'state': 'skipped', 'seconds': 0,
+                                      'error': f"upstream not ready: {', '.join(blocked[name])}"}
+                    self.log(f"{name}: skipped, upstream not ready ({', '.join(blocked[name])})")
+            self.log(f"Wave {i}: deploying {', '.join(runnable) or 'nothing'}")
+            if runnable:
+                with ThreadPoolExecutor(max_workers=min(self.max_parallel, len(runnable)),
+                                        thread_name_prefix='render-deploy') as pool:
+                    deploy = in_current_context(lambda n: self._deploy_one(n, commit_sha, force, clear_cache))
+                    for result in pool.map(deploy, runnable):
+                        services[result['name']] = result
+            # Waves are barriers, so a wave takes as long as its slowest service
+            critical = max(runnable, key=lambda n: services[n]['seconds']) if runnable else None
+            waves.append({
+                'wave': i,
+                'services': wave,
+                'seconds': round(time.monotonic() - wave_started, 3),
+                'critical_path': critical,
+                'critical_seconds': services[critical]['seconds'] if critical else 0,
+            })
+        return {
+            'success': all(s['state'] in ('ready', 'unconfirmed') for s in services.values()),
+            'wall_seconds': round(time.monotonic() - started, 3),
+            'critical_path': [w['critical_path'] for w in waves if w['critical_path']],
+            'waves': waves,
+            'services': services,
+        }
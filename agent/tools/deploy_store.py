@@ -0,0 +1,192 @@
+import os
+import math
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TERMINAL_STATUSES = ('live', 'deactivated', 'failed', 'build_failed', 'update_failed',
+                     'pre_deploy_failed', 'canceled')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deploys (
+    id TEXT PRIMARY KEY,
+    service_id TEXT,
+    commit_sha TEXT,
+    status TEXT,
+    created_at TEXT,
+    finished_at TEXT,
+    first_seen REAL,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS deploys_service ON deploys(service_id, updated_at);
+CREATE TABLE IF NOT EXISTS transitions (
+    deploy_id TEXT,
+    status TEXT,
+    observed_at REAL,
+    PRIMARY KEY (deploy_id, status)
+);
+CREATE TABLE IF NOT EXISTS errors (
+    deploy_id TEXT,
+    kind TEXT,
+    code TEXT,
+    file TEXT,
+    line INTEGER,
+    col INTEGER,
+    module TEXT,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS errors_deploy ON errors(deploy_id);
+"""
+
+
+def default_db_path() -> str:
+    return os.getenv('AGENT_DEPLOY_DB') or os.path.join(AGENT_DIR, 'logs', 'deploys.db')
+
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered)) - 1
+    return ordered[min(max(rank, 0), len(ordered) - 1)]
+
+
+def open_history(path: Optional[str] = None) -> Optional['DeployHistory']:
+    """Open the history store; None when disabled (AGENT_DEPLOY_DB=off) or unavailable"""
+    if os.getenv('AGENT_DEPLOY_DB', '').lower() == 'off':
+        return None
+    try:
+        return DeployHistory(path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Deploy history unavailable: {e}")
+        return None
+
+
+class DeployHistory:
+    """SQLite-backed history of deploys, their status transitions and build errors"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_db_path()
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(_SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def record(self, service_id: str, deploy: Dict[str, Any]):
+        """Upsert a deploy in the monitor's status shape and log its status transition"""
+        deploy_id = deploy.get('id')
+        if not deploy_id:
+            return
+        now = time.time()
+        with self._lock, self.db:
+            self.db.execute(
+                """INSERT INTO deploys (id, service_id, commit_sha, status, created_at, finished_at, first_seen, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET
+                     status = excluded.status,
+                     commit_sha = COALESCE(excluded.commit_sha, commit_sha),
+                     created_at = COALESCE(excluded.created_at, created_at),
+                     finished_at = COALESCE(excluded.finished_at, finished_at),
+                     updated_at = excluded.updated_at""",
+                (deploy_id, service_id, deploy.get('commit'), deploy.get('status'),
+                 deploy.get('created_at'), deploy.get('finished_at'), now, now))
+            if deploy.get('status'):
+                self.db.execute('INSERT OR IGNORE INTO transitions VALUES (?, ?, ?)',
+                                (deploy_id, deploy['status'], now))
+
+    def record_errors(self, deploy_id: str, errors: Iterable[Dict[str, Any]]):
+        """Replace the extracted error records stored for a deploy"""
+        with self._lock, self.db:
+            self.db.execute('DELETE FROM errors WHERE deploy_id = ?', (deploy_id,))
+            self.db.executemany(
+                'INSERT INTO errors VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(deploy_id, e.get('kind'), e.get('code'), e.get('file'), e.get('line'),
+                  e.get('column'), e.get('module'), e.get('message')) for e in errors])
+
+    def errors_for(self, deploy_id: str) -> List[Dict[str, Any]]:
+        """Error records stored for a deploy, in the analyzer's record shape"""
+        with self._lock:
+            rows = self.db.execute('SELECT * FROM errors WHERE deploy_id = ?', (deploy_id,)).fetchall()
+        return [{'kind': r['kind'], 'code': r['code'], 'file': r['file'], 'line': r['line'],
+                 'column': r['col'], 'module': r['module'], 'message': r['message']} for r in rows]
+
+    def latest(self, service_id: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Most recently observed deploy for a service, if observed within ``max_age`` seconds"""
+        with self._lock:
+            row = self.db.execute(
+                'SELECT * FROM deploys WHERE service_id = ? ORDER BY COALESCE(created_at, \'\') DESC, first_seen DESC LIMIT 1',
+                (service_id,)).fetchone()
+        if row is None or (max_age is not None and time.time() - row['updated_at'] > max_age):
+            return None
+        return dict(row)
+
+    def recent(self, service_id: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+        """Recent finished deploys with their build duration in seconds"""
+        sql = 'SELECT * FROM deploys WHERE status IN (%s)' % ','.join('?' * len(TERMINAL_STATUSES))
+        params: List[Any] = list(TERMINAL_STATUSES)
+        if service_id:
+            sql += ' AND service_id = ?'
+            params.append(service_id)
+        sql += ' ORDER BY first_seen DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = [dict(r) for r in self.db.execute(sql, params)]
+            ids = [r['id'] for r in rows]
+            spans = {r['deploy_id']: (r['first'], r['last']) for r in self.db.execute(
+                'SELECT deploy_id, MIN(observed_at) AS first, MAX(observed_at) AS last FROM transitions '
+                'WHERE deploy_id IN (%s) GROUP BY deploy_id' % ','.join('?' * len(ids)), ids)}
+        for row in rows:
+            start, end = _parse_time(row['created_at']), _parse_time(row['finished_at'])
+            if start is None or end is None:
+                # Fall back to when the agent itself saw the deploy start and finish
+                start, end = spans.get(row['id'], (None, None))
+            row['duration'] = end - start if start is not None and end is not None and end > start else None
+        return rows
+
+    def duration_percentiles(self, service_id: Optional[str] = None, limit: int = 200) -> Dict[str, Any]:
+        durations = [r['duration'] for r in self.recent(service_id, limit) if r['duration'] is not None]
+        return {'count': len(durations), 'p50': percentile(durations, 50), 'p95': percentile(durations, 95)}
+
+    def failure_rates(self, service_id: Optional[str] = None, limit: int = 200) -> Dict[str, Any]:
+        """Share of recent deploys that failed, broken down by error class (TS code or kind)"""
+        deploys = self.recent(service_id, limit)
+        failed = [d['id'] for d in deploys if d['status'] != 'live' and d['status'] != 'deactivated']
+        classes: Dict[str, int] = {}
+        if failed:
+            with self._lock:
+                rows = self.db.execute(
+                    'SELECT COALESCE(code, kind) AS class, COUNT(DISTINCT deploy_id) AS n FROM errors '
+                    'WHERE deploy_id IN (%s) GROUP BY class ORDER BY n DESC' % ','.join('?' * len(failed)),
+                    failed).fetchall()
+            classes = {r['class']: r['n'] for r in rows}
+        total = len(deploys)
+        return {
+            'deploys': total,
+            'failed': len(failed),
+            'failure_rate': len(failed) / total if total else None,
+            'by_class': {k: {'deploys': n, 'rate': n / total} for k, n in classes.items()}
+        }
+
+    def slowest(self, n: int = 5, service_id: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+        timed = [r for r in self.recent(service_id, limit) if r['duration'] is not None]
+        return sorted(timed, key=lambda r: r['duration'], reverse=True)[:n]
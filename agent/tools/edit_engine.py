@@ -0,0 +1,369 @@
+import os
+import re
+import stat
+import tempfile
+import subprocess
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+OPS = ('write', 'replace', 'insert', 'delete', 'patch')
+
+# What apply_minimal_edits appends when a task lists files but no edits
+TOUCH_MARKER = "\n// agent touch\n"
+
+_HUNK_RE = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+_NULL_SHA = '0' * 40
+
+
+class EditError(ValueError):
+    """A batch that can't be applied; nothing was written"""
+
+    def __init__(self, problems: List[str]):
+        self.problems = problems
+        more = f" (+{len(problems) - 5} more)" if len(problems) > 5 else ''
+        super().__init__('; '.join(problems[:5]) + more)
+
+
+def _git(root: str, *args: str, data: Optional[bytes] = None) -> bytes:
+    p = subprocess.run(['git', *args], cwd=root, input=data, capture_output=True)
+    if p.returncode != 0:
+        raise RuntimeError(f"git {args[0]} failed: {p.stderr.decode(errors='replace').strip()}")
+    return p.stdout
+
+
+def _patch_path(header: str) -> Optional[str]:
+    path = header.split('\t')[0].strip()
+    if path == '/dev/null':
+        return None
+    if path.startswith(('a/', 'b/')):
+        path = path[2:]
+    return path
+
+
+def parse_patch(diff: str) -> List[Dict[str, Any]]:
+    """Files in a unified diff: [{'path', 'create', 'delete', 'hunks': [(old_start, old_count, old, new)]}]"""
+    files: List[Dict[str, Any]] = []
+    lines = diff.splitlines(keepends=True)
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith('--- ') and i + 1 < len(lines) and lines[i + 1].startswith('+++ '):
+            old, new = _patch_path(line[4:]), _patch_path(lines[i + 1][4:])
+            files.append({'path': new or old, 'create': old is None, 'delete': new is None, 'hunks': []})
+            i += 2
+            continue
+        m = _HUNK_RE.match(line)
+        if not m:
+            i += 1
+            continue
+        if not files:
+            raise ValueError('hunk before any ---/+++ header')
+        old_start = int(m.group(1))
+        old_left = int(m.group(2)) if m.group(2) is not None else 1
+        new_left = int(m.group(4)) if m.group(4) is not None else 1
+        old_count = old_left
+        old_lines: List[str] = []
+        new_lines: List[str] = []
+        last: List[List[str]] = []
+        i += 1
+        # Counts, not prefixes, end a hunk: a removed "-- x" line looks like a header
+        while i < len(lines) and (old_left > 0 or new_left > 0 or lines[i].startswith('\\')):
+            body = lines[i]
+            tag, text = body[:1], body[1:]
+            if tag == '\\':
+                # "\ No newline at end of file" applies to the line just before it
+                for target in last:
+                    target[-1] = target[-1].rstrip('\r\n')
+            elif tag == ' ' or body in ('\n', '\r\n'):
+                # Some tools drop the space before an empty context line
+                text = text if tag == ' ' else body
+                old_lines.append(text); new_lines.append(text)
+                old_left -= 1; new_left -= 1
+                last = [old_lines, new_lines]
+            elif tag == '-':
+                old_lines.append(text); old_left -= 1
+                last = [old_lines]
+            elif tag == '+':
+                new_lines.append(text); new_left -= 1
+                last = [new_lines]
+            else:
+                break
+            i += 1
+        if old_left > 0 or new_left > 0:
+            raise ValueError(f"{files[-1]['path']}: hunk at line {old_start} is truncated")
+        files[-1]['hunks'].append((old_start, old_count, old_lines, new_lines))
+    return files
+
+
+def _find(lines: List[str], block: List[str], start: int, lo: int) -> int:
+    """Index where `block` occurs in `lines` nearest to `start` (not before `lo`), or -1"""
+    if not block:
+        return min(max(start, lo), len(lines))
+    for same in (lambda a, b: a == b, lambda a, b: a.rstrip() == b.rstrip()):
+        for delta in range(len(lines) + 1):
+            for at in ((start + delta, start - delta) if delta else (start,)):
+                if lo <= at <= len(lines) - len(block) and all(same(lines[at + k], block[k]) for k in range(len(block))):
+                    return at
+    return -1
+
+
+def apply_hunks(text: str, hunks, where: str) -> str:
+    lines = text.splitlines(keepends=True)
+    offset, lo = 0, 0
+    for old_start, old_count, old, new in hunks:
+        # "-n,0" inserts after line n; otherwise the hunk starts at line n
+        expected = (old_start if old_count == 0 else old_start - 1) + offset
+        at = _find(lines, old, expected, lo)
+        if at < 0:
+            raise ValueError(f"{where}: hunk at line {old_start} does not match the file")
+        lines[at:at + len(old)] = new
+        offset = at - (old_start - 1 if old_count else old_start) + len(new) - len(old)
+        lo = at + len(new)
+    return ''.join(lines)
+
+
+def _with_newline(text: str) -> str:
+    return text if text.endswith('\n') else text + '\n'
+
+
+def _unique(haystack: str, needle: str, what: str, where: str) -> int:
+    count = haystack.count(needle)
+    if count != 1:
+        raise ValueError(f"{where}: {what} {'not found' if count == 0 else f'matches {count} times'}")
+    return haystack.index(needle)
+
+
+class EditBatch:
+    """A set of structured edits applied to a work tree all at once, or not at all.
+
+    Edits are dicts with an ``op`` and a ``path`` relative to ``workdir``:
+
+    - ``write``: replace the whole file with ``content`` (creating it if needed)
+    - ``replace``: swap ``old`` for ``new``; ``old`` must occur once unless ``all`` is set
+    - ``insert``: add ``text`` on the line after ``after`` or before ``before``
+      (anchors must occur once), else at ``at`` = ``start`` or ``end`` (the default,
+      which creates a missing file)
+    - ``delete``: remove the file
+    - ``patch``: apply the unified ``diff`` (paths in its headers, a/ and b/ stripped)
+
+    ``stage`` applies every edit to in-memory copies and raises EditError listing
+    all problems before anything is written. ``apply`` then writes each changed
+    file once through a temporary file and rename, and stages them with one
+    ``git update-index``. ``rollback`` restores the previous file contents and
+    index entries.
+    """
+
+    def __init__(self, root: str, workdir: Optional[str] = None):
+        self.root = os.path.realpath(root)
+        self.workdir = workdir or root
+        self._original: Dict[str, Optional[bytes]] = {}
+        self._modes: Dict[str, int] = {}
+        self._buffers: Dict[str, Optional[str]] = {}
+        self._index: Dict[str, bytes] = {}
+        self._made_dirs: List[str] = []
+        self._indexed = False
+        self.changed: List[str] = []
+
+    def _rel(self, path: str) -> str:
+        full = os.path.realpath(os.path.join(self.workdir, path))
+        rel = os.path.relpath(full, self.root)
+        if rel == '.' or rel.startswith('..') or rel.split(os.sep)[0] == '.git':
+            raise ValueError(f"{path}: outside the work tree")
+        return rel
+
+    def _read(self, rel: str) -> Optional[str]:
+        if rel not in self._original:
+            full = os.path.join(self.root, rel)
+            try:
+                st = os.lstat(full)
+            except FileNotFoundError:
+                self._original[rel] = None
+                self._buffers[rel] = None
+                return None
+            if not stat.S_ISREG(st.st_mode):
+                raise ValueError(f"{rel}: not a regular file")
+            with open(full, 'rb') as fh:
+                self._original[rel] = fh.read()
+            self._modes[rel] = stat.S_IMODE(st.st_mode)
+            self._buffers[rel] = self._original[rel].decode('utf-8', 'surrogateescape')
+        return self._buffers[rel]
+
+    def _edit(self, edit: Dict[str, Any]):
+        op = edit.get('op')
+        if op not in OPS:
+            raise ValueError(f"unknown op {op!r} (expected one of {', '.join(OPS)})")
+        if op == 'patch':
+            for f in parse_patch(edit.get('diff') or ''):
+                rel = self._rel(f['path'])
+                current = self._read(rel)
+                if f['create'] and current is not None:
+                    raise ValueError(f"{rel}: patch creates a file that already exists")
+                if not f['create'] and current is None:
+                    raise ValueError(f"{rel}: patch edits a file that does not exist")
+                text = apply_hunks(current or '', f['hunks'], rel)
+                self._buffers[rel] = None if f['delete'] else text
+            return
+        if not edit.get('path'):
+            raise ValueError(f"{op}: missing 'path'")
+        rel = self._rel(edit['path'])
+        current = self._read(rel)
+        if op == 'write':
+            self._buffers[rel] = edit.get('content', '')
+            return
+        if current is None and not (op == 'insert' and not (edit.get('after') or edit.get('before'))
+                                    and edit.get('at', 'end') == 'end'):
+            raise ValueError(f"{rel}: does not exist")
+        if op == 'delete':
+            self._buffers[rel] = None
+        elif op == 'replace':
+            old, new = edit.get('old') or '', edit.get('new', '')
+            if not old:
+                raise ValueError(f"{rel}: replace needs 'old'")
+            if edit.get('all'):
+                if old not in current:
+                    raise ValueError(f"{rel}: 'old' not found")
+                self._buffers[rel] = current.replace(old, new)
+            else:
+                at = _unique(current, old, "'old'", rel)
+                self._buffers[rel] = current[:at] + new + current[at + len(old):]
+        else:
+            current = current or ''
+            text = edit.get('text', '')
+            if edit.get('after'):
+                at = _unique(current, edit['after'], "'after' anchor", rel)
+                eol = current.find('\n', at + len(edit['after']))
+                at = len(current) if eol < 0 else eol + 1
+                if at == len(current) and current and not current.endswith('\n'):
+                    text = '\n' + text
+                self._buffers[rel] = current[:at] + _with_newline(text) + current[at:]
+            elif edit.get('before'):
+                at = _unique(current, edit['before'], "'before' anchor", rel)
+                at = current.rfind('\n', 0, at) + 1
+                self._buffers[rel] = current[:at] + _with_newline(text) + current[at:]
+            elif edit.get('at') == 'start':
+                self._buffers[rel] = text + current
+            else:
+                self._buffers[rel] = current + text
+
+    def stage(self, edits: Iterable[Dict[str, Any]]) -> List[str]:
+        """Apply `edits` in memory, in order; the repo-relative paths whose content would change"""
+        problems = []
+        for i, edit in enumerate(edits):
+            try:
+                self._edit(edit if isinstance(edit, dict) else {})
+            except ValueError as e:
+                problems.append(f"edit[{i}]: {e}")
+        if problems:
+            raise EditError(problems)
+        self.changed = sorted(rel for rel, text in self._buffers.items()
+                              if (None if text is None else text.encode('utf-8', 'surrogateescape'))
+                              != self._original[rel])
+        return self.changed
+
+    def _write_file(self, rel: str, data: bytes, mode: Optional[int]) -> Tuple[str, str]:
+        full = os.path.join(self.root, rel)
+        d = os.path.dirname(full)
+        if not os.path.isdir(d):
+            missing = d
+            while not os.path.isdir(os.path.dirname(missing)):
+                missing = os.path.dirname(missing)
+            os.makedirs(d, exist_ok=True)
+            self._made_dirs.append(missing)
+        fd, tmp = tempfile.mkstemp(dir=d, prefix='.agent-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(data)
+            if mode is None:
+                mode = 0o666 & ~_UMASK
+            os.chmod(tmp, mode)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return tmp, full
+
+    def apply(self, index: bool = True) -> List[str]:
+        """Write the staged changes (and stage them in git's index); restore everything on failure"""
+        if not self.changed:
+            return []
+        self._indexed = index
+        if index:
+            listed = _git(self.root, 'ls-files', '-s', '-z', '--', *self.changed).split(b'\0')
+            for entry in filter(None, listed):
+                meta, path = entry.split(b'\t', 1)
+                mode, sha, _ = meta.split(b' ')
+                self._index[path.decode('utf-8', 'surrogateescape')] = mode + b' ' + sha
+        renames = []
+        try:
+            # Every new file is fully written before any of them replaces an original
+            for rel in self.changed:
+                text = self._buffers[rel]
+                if text is not None:
+                    renames.append(self._write_file(rel, text.encode('utf-8', 'surrogateescape'),
+                                                    self._modes.get(rel)))
+        except BaseException:
+            for tmp, _ in renames:
+                os.unlink(tmp)
+            self._remove_made_dirs()
+            raise
+        try:
+            for tmp, full in renames:
+                os.replace(tmp, full)
+            for rel in self.changed:
+                if self._buffers[rel] is None:
+                    os.unlink(os.path.join(self.root, rel))
+            if index:
+                paths = b''.join(rel.encode('utf-8', 'surrogateescape') + b'\0' for rel in self.changed)
+                _git(self.root, 'update-index', '--add', '--remove', '-z', '--stdin', data=paths)
+        except BaseException:
+            for tmp, _ in renames:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+            self.rollback()
+            raise
+        return self.changed
+
+    def rollback(self):
+        """Put back the file contents, modes and index entries from before `apply`"""
+        for rel in self.changed:
+            full = os.path.join(self.root, rel)
+            original = self._original[rel]
+            if original is None:
+                if os.path.lexists(full):
+                    os.unlink(full)
+                continue
+            tmp, _ = self._write_file(rel, original, self._modes[rel])
+            os.replace(tmp, full)
+        self._remove_made_dirs()
+        if self._indexed:
+            records = []
+            for rel in self.changed:
+                entry = self._index.get(rel)
+                path = rel.encode('utf-8', 'surrogateescape')
+                records.append((entry or f"0 {_NULL_SHA}".encode()) + b'\t' + path + b'\0')
+            _git(self.root, 'update-index', '-z', '--index-info', data=b''.join(records))
+
+    def _remove_made_dirs(self):
+        for top in reversed(self._made_dirs):
+            for dirpath, _, _ in os.walk(top, topdown=False):
+                try:
+                    os.rmdir(dirpath)
+                except OSError:
+                    pass
+        self._made_dirs = []
+
+
+def _read_umask() -> int:
+    # /proc reports it without touching it; os.umask can only be read by setting it,
+    # which would race with threads creating files, so that fallback runs once at import
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+_UMASK = _read_umask()
@@ -0,0 +1,216 @@
+import os
+import re
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Iterable, List, Optional
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level source trees; anything before them in a path is checkout/worktree noise
+_SOURCE_ROOTS = ('client', 'server', 'shared', 'db')
+_ROOT_RE = re.compile(r"(?:^|.*/)((?:%s)/.*)$" % '|'.join(_SOURCE_ROOTS))
+_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?")
+_HASH_RE = re.compile(r"\b(?=[0-9a-f]*\d)(?=[0-9a-f]*[a-f])[0-9a-f]{7,}\b", re.IGNORECASE)
+_PATH_RE = re.compile(r"(?:[A-Za-z]:)?[\w.@~-]*[/\\][\w.@~/\\-]+")
+_LOCATION_SUFFIX_RE = re.compile(r"(?:\(\d+,\d+\)|:\d+:\d+)")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+
+# Work items in these states keep their fingerprints covered
+_ACTIVE_WORK = ('queued', 'running')
+_DONE_WORK = ('succeeded',)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    fp TEXT PRIMARY KEY,
+    kind TEXT,
+    code TEXT,
+    file TEXT,
+    message TEXT,
+    first_seen REAL,
+    last_seen REAL,
+    first_deploy TEXT,
+    last_deploy TEXT,
+    occurrences INTEGER DEFAULT 0,
+    work_id TEXT
+);
+CREATE INDEX IF NOT EXISTS fingerprints_last_seen ON fingerprints(last_seen);
+CREATE INDEX IF NOT EXISTS fingerprints_work ON fingerprints(work_id);
+CREATE TABLE IF NOT EXISTS work_items (
+    id TEXT PRIMARY KEY,
+    goal TEXT,
+    job_id TEXT,
+    state TEXT,
+    branch TEXT,
+    pr TEXT,
+    deploys INTEGER DEFAULT 1,
+    created_at REAL,
+    updated_at REAL,
+    finished_at REAL
+);
+"""
+
+
+def default_db_path() -> str:
+    return os.getenv('AGENT_FINGERPRINT_DB') or os.path.join(AGENT_DIR, 'logs', 'fingerprints.db')
+
+
+def canonical_path(path: Optional[str]) -> str:
+    """Repo-relative form of a path, whatever checkout or worktree it was built in"""
+    if not path:
+        return ''
+    path = path.replace('\\', '/')
+    m = _ROOT_RE.match(path)
+    if m:
+        return m.group(1)
+    return path[2:] if path.startswith('./') else path
+
+
+def canonical_message(message: Optional[str]) -> str:
+    """Error text with timestamps, paths, positions, hashes and numbers normalised away"""
+    if not message:
+        return ''
+    text = _TIMESTAMP_RE.sub('', message)
+    text = _PATH_RE.sub(lambda m: canonical_path(m.group(0)), text)
+    text = _LOCATION_SUFFIX_RE.sub('', text)
+    text = _HASH_RE.sub('<hash>', text)
+    text = _NUMBER_RE.sub('<n>', text)
+    return ' '.join(text.split())
+
+
+def fingerprint(error: Dict[str, Any]) -> str:
+    """Identity of one error record that survives line shifts, rebuilds and new checkouts"""
+    parts = (error.get('kind') or '', error.get('code') or '', canonical_path(error.get('file')),
+             error.get('module') or '', canonical_message(error.get('message')))
+    return hashlib.sha1('\0'.join(parts).encode()).hexdigest()
+
+
+def open_index(path: Optional[str] = None) -> Optional['FingerprintIndex']:
+    """Open the fingerprint index; None when disabled (AGENT_FINGERPRINT_DB=off) or unavailable"""
+    if os.getenv('AGENT_FINGERPRINT_DB', '').lower() == 'off':
+        return None
+    try:
+        return FingerprintIndex(path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Fingerprint index unavailable: {e}")
+        return None
+
+
+class FingerprintIndex:
+    """SQLite index of normalised build-error fingerprints and the fix work opened for them.
+
+    Fingerprints are looked up by primary key, so checks stay cheap however many
+    historical errors accumulate; entries not seen for ``ttl`` seconds are evicted.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None,
+                 cover_ttl: Optional[float] = None):
+        self.path = path or default_db_path()
+        self.ttl = ttl if ttl is not None else float(os.getenv('AGENT_FINGERPRINT_TTL_DAYS', '14')) * 86400
+        self.cover_ttl = (cover_ttl if cover_ttl is not None
+                          else float(os.getenv('AGENT_FINGERPRINT_COVER_HOURS', '24')) * 3600)
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(_SCHEMA)
+        columns = {row['name'] for row in self.db.execute('PRAGMA table_info(work_items)')}
+        if 'finished_at' not in columns:
+            self.db.execute('ALTER TABLE work_items ADD COLUMN finished_at REAL')
+        self.evict()
+
+    def close(self):
+        self.db.close()
+
+    def observe(self, deploy_id: Optional[str], errors: Iterable[Dict[str, Any]]) -> List[str]:
+        """Record a deploy's errors; returns their distinct fingerprints in first-seen order"""
+        now = time.time()
+        rows = {}
+        for e in errors:
+            rows.setdefault(fingerprint(e), e)
+        with self._lock, self.db:
+            self.db.executemany(
+                """INSERT INTO fingerprints (fp, kind, code, file, message, first_seen, last_seen,
+                                             first_deploy, last_deploy, occurrences)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+                   ON CONFLICT(fp) DO UPDATE SET
+                     last_seen = excluded.last_seen,
+                     last_deploy = COALESCE(excluded.last_deploy, last_deploy),
+                     occurrences = occurrences + 1""",
+                [(fp, e.get('kind'), e.get('code'), canonical_path(e.get('file')),
+                  canonical_message(e.get('message')), now, now, deploy_id, deploy_id)
+                 for fp, e in rows.items()])
+        return list(rows)
+
+    def coverage(self, fps: Iterable[str], stale_after: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The work item covering every fingerprint, or None if any of them is uncovered.
+
+        Succeeded work covers for ``cover_ttl`` seconds after it finished, so an error
+        its PR didn't fix is retried; queued/running work only while it was updated
+        within ``stale_after`` seconds, so a crashed run doesn't suppress fixes forever.
+        """
+        fps = list(dict.fromkeys(fps))
+        if not fps:
+            return None
+        with self._lock:
+            rows = self.db.execute(
+                'SELECT f.fp, w.* FROM fingerprints f LEFT JOIN work_items w ON w.id = f.work_id '
+                'WHERE f.fp IN (%s)' % ','.join('?' * len(fps)), fps).fetchall()
+        if len(rows) < len(fps):
+            return None
+        now = time.time()
+        work = None
+        for row in rows:
+            state = row['state']
+            fresh = stale_after is None or now - (row['updated_at'] or 0) <= stale_after
+            recent = now - (row['finished_at'] or row['updated_at'] or 0) <= self.cover_ttl
+            if not ((state in _DONE_WORK and recent) or (state in _ACTIVE_WORK and fresh)):
+                return None
+            # Prefer reporting the newest item when errors were split across several
+            if work is None or row['updated_at'] > work['updated_at']:
+                work = {k: row[k] for k in row.keys() if k != 'fp'}
+        return work
+
+    def open_work(self, goal: str, fps: Iterable[str], job_id: Optional[str] = None,
+                  state: str = 'queued') -> Dict[str, Any]:
+        """Create a work item and make it the owner of the given fingerprints"""
+        now = time.time()
+        work = {'id': uuid.uuid4().hex[:12], 'goal': goal, 'job_id': job_id, 'state': state,
+                'branch': None, 'pr': None, 'deploys': 1, 'created_at': now, 'updated_at': now,
+                'finished_at': None}
+        with self._lock, self.db:
+            self.db.execute('INSERT INTO work_items (%s) VALUES (%s)' % (', '.join(work), ','.join('?' * len(work))),
+                            tuple(work.values()))
+            self.db.executemany('UPDATE fingerprints SET work_id = ? WHERE fp = ?',
+                                [(work['id'], fp) for fp in fps])
+        return work
+
+    def attach(self, work_id: str):
+        """Count another failing deploy against existing work instead of opening new work"""
+        with self._lock, self.db:
+            self.db.execute('UPDATE work_items SET deploys = deploys + 1 WHERE id = ?', (work_id,))
+
+    def update_work(self, work_id: str, **fields):
+        fields = {k: v for k, v in fields.items() if k in ('job_id', 'state', 'branch', 'pr', 'finished_at')}
+        fields['updated_at'] = time.time()
+        with self._lock, self.db:
+            self.db.execute('UPDATE work_items SET %s WHERE id = ?' % ', '.join(f"{k} = ?" for k in fields),
+                            (*fields.values(), work_id))
+
+    def work_for_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.db.execute('SELECT * FROM work_items WHERE job_id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def evict(self, ttl: Optional[float] = None) -> int:
+        """Drop fingerprints not seen within the TTL and work items nothing points at any more"""
+        cutoff = time.time() - (self.ttl if ttl is None else ttl)
+        with self._lock, self.db:
+            removed = self.db.execute('DELETE FROM fingerprints WHERE last_seen < ?', (cutoff,)).rowcount
+            self.db.execute('DELETE FROM work_items WHERE updated_at < ? AND id NOT IN '
+                            '(SELECT work_id FROM fingerprints WHERE work_id IS NOT NULL)', (cutoff,))
+        return removed
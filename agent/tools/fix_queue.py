@@ -0,0 +1,154 @@
+import os
+import time
+import uuid
+import queue
+import threading
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+ACTIVE_STATES = ('queued', 'running')
+
+
+class FixJobQueue:
+    """In-process queue of fix jobs run by a small worker pool.
+
+    ``runner(goal, deadline)`` does the work and returns a dict with a
+    ``success`` flag; ``deadline`` is a ``time.monotonic()`` value. Jobs with
+    the same error fingerprint are coalesced while one is still queued or
+    running, so repeated failures of one deploy don't stack up PRs.
+    ``on_done(job)``, if given, is called from the worker once a job settles,
+    before waiters are woken, so ``wait`` returning means callbacks have run.
+    A job submitted with a ``payload`` is run as ``runner(goal, deadline, payload)``.
+    Settled jobs are forgotten once collected with ``wait_for(..., collect=True)``
+    or ``retain`` seconds after they finished, so a long-lived queue stays small.
+    """
+
+    def __init__(self, runner: Callable[[str, float], Dict[str, Any]], workers: Optional[int] = None,
+                 deadline: Optional[float] = None,
+                 on_done: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 retain: Optional[float] = None):
+        self.runner = runner
+        self.on_done = on_done
+        self.workers = workers or int(os.getenv('AGENT_FIX_WORKERS', '1'))
+        self.deadline = deadline or float(os.getenv('AGENT_FIX_DEADLINE', '600'))
+        self.retain = retain if retain is not None else float(os.getenv('AGENT_FIX_RETAIN', '3600'))
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._pending: 'queue.Queue[Optional[str]]' = queue.Queue()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._work, name=f"fix-worker-{len(self._threads)}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, goal: str, fingerprint: Optional[str] = None,
+               payload: Optional[Dict[str, Any]] = None) -> Tuple[Dict[str, Any], bool]:
+        """Queue a fix job; returns (job, created). An active job with the same fingerprint is reused."""
+        with self._cond:
+            self._evict()
+            if fingerprint:
+                for job in self.jobs.values():
+                    if job['fingerprint'] == fingerprint and job['state'] in ACTIVE_STATES:
+                        return dict(job), False
+            job = {
+                'id': uuid.uuid4().hex[:12],
+                'goal': goal,
+                'fingerprint': fingerprint,
+                'payload': payload,
+                'state': 'queued',
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None
+            }
+            self.jobs[job['id']] = job
+            self._start_workers()
+        self._pending.put(job['id'])
+        return dict(job), True
+
+    def _evict(self):
+        # Caller holds self._cond
+        cutoff = time.time() - self.retain
+        for job_id in [j['id'] for j in self.jobs.values()
+                       if j['state'] not in ACTIVE_STATES and j['finished_at'] < cutoff]:
+            del self.jobs[job_id]
+
+    def _update(self, job_id: str, **fields):
+        with self._cond:
+            self.jobs[job_id].update(fields)
+            self._cond.notify_all()
+
+    def _settle(self, job_id: str, **fields):
+        # Waiters only see the final state once on_done has recorded the outcome
+        if self.on_done:
+            with self._cond:
+                job = dict(self.jobs[job_id], **fields)
+            try:
+                self.on_done(job)
+            except Exception as e:
+                print(f"Fix job {job_id} callback failed: {e}")
+        self._update(job_id, **fields)
+
+    def _work(self):
+        while True:
+            job_id = self._pending.get()
+            if job_id is None:
+                return
+            job = self.jobs[job_id]
+            deadline = time.monotonic() + self.deadline
+            self._update(job_id, state='running', started_at=time.time())
+            try:
+                if job['payload'] is None:
+                    result = self.runner(job['goal'], deadline)
+                else:
+                    result = self.runner(job['goal'], deadline, job['payload'])
+                if result.get('success'):
+                    state = 'succeeded'
+                else:
+                    state = 'timed_out' if time.monotonic() > deadline else 'failed'
+                self._settle(job_id, state=state, result=result, error=result.get('error'),
+                             finished_at=time.time())
+            except Exception as e:
+                state = 'timed_out' if time.monotonic() > deadline else 'failed'
+                self._settle(job_id, state=state, error=str(e), finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def status(self) -> List[Dict[str, Any]]:
+        """Snapshot of every job, oldest first"""
+        with self._cond:
+            self._evict()
+            return sorted((dict(j) for j in self.jobs.values()), key=lambda j: j['created_at'])
+
+    def wait_for(self, job_id: str, timeout: Optional[float] = None,
+                 collect: bool = False) -> Optional[Dict[str, Any]]:
+        """Block until one job settles (or `timeout` passes) and return its snapshot.
+
+        With `collect`, a settled job is removed from the queue as it is returned.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: job_id not in self.jobs or self.jobs[job_id]['state'] not in ACTIVE_STATES,
+                                timeout=timeout)
+            job = self.jobs.get(job_id)
+            if job and collect and job['state'] not in ACTIVE_STATES:
+                del self.jobs[job_id]
+            return dict(job) if job else None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until no job is queued or running; False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not any(j['state'] in ACTIVE_STATES for j in self.jobs.values()), timeout=timeout)
+
+    def shutdown(self, wait: bool = True):
+        for _ in self._threads:
+            self._pending.put(None)
+        if wait:
+            for t in self._threads:
+                t.join()
+        self._threads = []
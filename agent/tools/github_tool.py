@@ -1,22 +1,160 @@
-import os, requests
+import os, time, random, threading, requests
+from concurrent.futures import ThreadPoolExecutor
+from tools.http_session import pooled_session
+from tools.tracing import span, in_current_context
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+def github_api_url() -> str:
+    """GitHub API base URL; overridable so a local stand-in server can be used"""
+    return os.getenv('GITHUB_API_URL', 'https://api.github.com').rstrip('/')
+
+class TokenBucket:
+    """Paces calls to `rate` per second with bursts of up to `burst`"""
+    def __init__(self, rate:float, burst:int):
+        self.rate = rate; self.burst = burst
+        self.tokens = float(burst); self.updated = time.monotonic()
+        self._lock = threading.Lock()
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1; return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
 class GitHubTool:
-    def __init__(self, repo_slug:str):
+    def __init__(self, repo_slug:str, session=None, max_concurrency:int=None):
         self.repo = repo_slug
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Authorization': f"Bearer {os.getenv('GITHUB_TOKEN','')}",
-            'Accept': 'application/vnd.github+json'
-        })
-    def open_pr(self, branch:str, title:str, body:str):
+        self.max_concurrency = max_concurrency or int(os.getenv('GITHUB_MAX_CONCURRENCY', '4'))
+        self.session = session or pooled_session(os.getenv('GITHUB_TOKEN',''), self.max_concurrency)
+        self.session.headers.update({'Accept': 'application/vnd.github+json'})
+        # GitHub asks for content-creating requests to be spaced out; default ~1/s
+        self.bucket = TokenBucket(float(os.getenv('GITHUB_RATE', '1')), int(os.getenv('GITHUB_BURST', '3')))
+        self.max_retries = int(os.getenv('GITHUB_MAX_RETRIES', '4'))
+        self.max_wait = float(os.getenv('GITHUB_MAX_WAIT', '300'))
+        self._pause_until = 0.0
+        self._pause_lock = threading.Lock()
+
+    def _pause(self, seconds:float):
+        # Shared across threads: once GitHub says stop, nobody sends until it's over
+        with self._pause_lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + min(seconds, self.max_wait))
+
+    def _note_limits(self, r):
+        if r.headers.get('X-RateLimit-Remaining') == '0' and r.headers.get('X-RateLimit-Reset', '').isdigit():
+            self._pause(int(r.headers['X-RateLimit-Reset']) - time.time() + 1)
+
+    def _retry_delay(self, r, attempt:int):
+        """Seconds to wait before retrying `r`, or None if it should not be retried"""
+        if r is None or r.status_code in RETRY_STATUSES:
+            return min(2 ** attempt + random.uniform(0, 1), self.max_wait)
+        if r.status_code in (403, 429):
+            if r.headers.get('Retry-After', '').isdigit():
+                return float(r.headers['Retry-After'])
+            if r.headers.get('X-RateLimit-Remaining') == '0':
+                return max(int(r.headers.get('X-RateLimit-Reset', '0')) - time.time() + 1, 1)
+            if 'rate limit' in r.text.lower():
+                # Secondary limits without Retry-After: wait at least a minute
+                return max(60.0, 2 ** attempt)
+        return None
+
+    def request(self, method:str, path:str, deadline:float=None, **kw):
+        """Paced, rate-limit-aware call; retries 5xx, connection errors and abuse limits.
+
+        With `deadline` (a time.monotonic() value) no wait, retry or request runs past
+        it; requests.Timeout is raised instead.
+        """
+        url = path if path.startswith('http') else f"{github_api_url()}{path}"
+        timeout = kw.pop('timeout', 30)
+        def left(need=0.0):
+            if deadline is None: return timeout
+            remaining = deadline - time.monotonic()
+            if remaining <= need: raise requests.Timeout(f"deadline exceeded before {method} {path}")
+            return min(timeout, remaining)
+        for attempt in range(self.max_retries + 1):
+            wait = self._pause_until - time.monotonic()
+            if wait > 0:
+                left(wait); time.sleep(wait)
+            if method != 'GET': self.bucket.acquire()
+            kw['timeout'] = left()
+            try:
+                r = self.session.request(method, url, **kw)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.max_retries: raise
+                r = None
+            if r is not None:
+                self._note_limits(r)
+            delay = self._retry_delay(r, attempt) if attempt < self.max_retries else None
+            if delay is None:
+                return r
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                if r is None: raise requests.Timeout(f"deadline exceeded retrying {method} {path}")
+                return r
+            if r is not None and r.status_code in (403, 429): self._pause(delay)
+            else: time.sleep(delay)
+        return r
+
+    def open_pr(self, branch:str, title:str, body:str, deadline:float=None):
         if not self.repo: return "(no repo set)"
-        url = f"https://api.github.com/repos/{self.repo}/pulls"
         data = {'title': title, 'head': branch,
                 'base': os.getenv('GITHUB_DEFAULT_BRANCH','main'),
                 'body': body or ''}
-        r = self.session.post(url, json=data)
+        with span('github.open_pr', branch=branch, title=title) as s:
+            r = self.request('POST', f"/repos/{self.repo}/pulls", deadline=deadline, json=data)
+            s.set(http_status=r.status_code, status='ok' if r.ok else 'error')
         # print diagnostic info on failure
         if r.status_code >= 400:
             try: print("GitHub error:", r.status_code, r.json())
             except: print("GitHub error:", r.status_code, r.text)
         r.raise_for_status()
         return r.json().get('html_url')
+
+    def find_open_prs(self, deadline:float=None):
+        """{branch: html_url} for every open PR from this repo's own branches (not forks)"""
+        prs, url = {}, f"/repos/{self.repo}/pulls"
+        params = {'state': 'open', 'per_page': 100}
+        while url:
+            r = self.request('GET', url, deadline=deadline, params=params)
+            r.raise_for_status()
+            for pr in r.json():
+                # A fork can use the same branch name; its head repo is gone if the fork was deleted
+                head_repo = (pr['head'].get('repo') or {}).get('full_name') or ''
+                if head_repo.lower() == self.repo.lower():
+                    prs[pr['head']['ref']] = pr['html_url']
+            url, params = r.links.get('next', {}).get('url'), None
+        return prs
+
+    def open_prs(self, pending, reuse_existing:bool=True, deadline:float=None):
+        """Open many PRs with bounded concurrency; one result dict per (branch, title, body), in order"""
+        if not self.repo:
+            return [{'branch': b, 'title': t, 'pr': "(no repo set)", 'created': False, 'error': None}
+                    for b, t, _ in pending]
+        existing = {}
+        if reuse_existing:
+            try: existing = self.find_open_prs(deadline)
+            except requests.RequestException as e: print(f"Could not list open PRs: {e}")
+
+        def submit(req):
+            branch, title, body = req
+            result = {'branch': branch, 'title': title, 'pr': existing.get(branch), 'created': False, 'error': None}
+            if result['pr']:
+                return result
+            try:
+                result.update(pr=self.open_pr(branch, title, body, deadline), created=True)
+            except requests.HTTPError as e:
+                # 422 means a PR for this head already exists (opened since the list call)
+                if e.response is not None and e.response.status_code == 422 and reuse_existing:
+                    try: result['pr'] = self.find_open_prs(deadline).get(branch)
+                    except requests.RequestException: pass
+                if not result['pr']: result['error'] = str(e)
+            except requests.RequestException as e:
+                result['error'] = str(e)
+            return result
+
+        with span('github.open_prs', count=len(pending), existing=len(existing)), \
+                ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='github-pr') as pool:
+            return list(pool.map(in_current_context(submit), pending))
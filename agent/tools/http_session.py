@@ -0,0 +1,14 @@
+import requests
+from requests.adapters import HTTPAdapter
+from tools.tracing import instrument_session
+
+
+def pooled_session(api_token: str = '', pool_size: int = 10) -> requests.Session:
+    """A requests session whose connection pool can serve ``pool_size`` concurrent calls"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if api_token:
+        session.headers.update({'Authorization': f'Bearer {api_token}'})
+    return instrument_session(session)
@@ -0,0 +1,248 @@
+import os
+import re
+import json
+import threading
+from typing import Dict, Any, Iterable, List, Optional, Set
+from tools.script_cache import SKIP_DIRS, ROOT_MANIFESTS, find_repo_root
+
+SOURCE_EXTS = ('.ts', '.tsx', '.mts', '.cts', '.js', '.jsx', '.mjs', '.cjs')
+
+# Used when the repo has no tsconfig "include" to derive packages from
+DEFAULT_PACKAGES = ('client', 'server', 'shared', 'db')
+
+# Root-level tool configs that only matter to one package's build
+TOOL_CONFIGS = {
+    'vite.config.ts': 'client', 'vite.config.js': 'client',
+    'tailwind.config.ts': 'client', 'tailwind.config.js': 'client',
+    'postcss.config.js': 'client', 'components.json': 'client',
+    'drizzle.config.ts': 'db',
+}
+
+# Changes to these never need a build, typecheck or test run
+DOC_EXTS = ('.md', '.markdown', '.txt', '.rst')
+
+_IMPORT_RE = re.compile(r"""(?:\bfrom\s*|\bimport\s*\(?\s*|\brequire\s*\(\s*)['"]([^'"\n]+)['"]""")
+_JSON_COMMENT_RE = re.compile(r'//[^\n"]*$|/\*.*?\*/', re.MULTILINE | re.DOTALL)
+
+# (size, mtime_ns, specifiers) per source file; shared so a warm process rescans only edited files
+_scan_memo: Dict[str, tuple] = {}
+_scan_lock = threading.Lock()
+
+
+def _read_json(path: str) -> Dict[str, Any]:
+    try:
+        with open(path) as fh:
+            text = fh.read()
+    except OSError:
+        return {}
+    try:
+        return json.loads(text)
+    except ValueError:
+        # tsconfig allows comments and trailing commas
+        try:
+            return json.loads(re.sub(r',\s*([}\]])', r'\1', _JSON_COMMENT_RE.sub('', text)))
+        except ValueError:
+            return {}
+
+
+def _specifiers(path: str) -> List[str]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return []
+    with _scan_lock:
+        memo = _scan_memo.get(path)
+    if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+        return memo[2]
+    try:
+        with open(path, encoding='utf-8', errors='replace') as fh:
+            specs = sorted(set(_IMPORT_RE.findall(fh.read())))
+    except OSError:
+        return []
+    with _scan_lock:
+        _scan_memo[path] = (st.st_size, st.st_mtime_ns, specs)
+    return specs
+
+
+class ImpactResolver:
+    """Which packages a set of changed paths affects, and which npm scripts verify them.
+
+    Packages are the top-level source trees (from tsconfig ``include``, or
+    client/server/shared/db). Edges come from import statements, resolved
+    through relative paths and tsconfig ``paths`` aliases, plus per-package
+    ``package.json`` dependencies and tsconfig ``references`` when packages
+    have their own. A change affects its package and everything that depends
+    on it, transitively.
+    """
+
+    def __init__(self, root: str):
+        self.root = find_repo_root(root)
+        tsconfig = _read_json(os.path.join(self.root, 'tsconfig.json'))
+        self.compiler = tsconfig.get('compilerOptions') or {}
+        self.packages = self._packages(tsconfig)
+        self.aliases = self._aliases()
+        self.global_dirs = {os.path.normpath(os.path.relpath(os.path.join(self.root, t), self.root))
+                            for t in self.compiler.get('typeRoots', []) if 'node_modules' not in t}
+        self.deps = self._dependencies()
+        self.dependents = self._invert(self.deps)
+
+    def _packages(self, tsconfig: Dict[str, Any]) -> List[str]:
+        tops = [p.replace('\\', '/').lstrip('./').split('/')[0] for p in tsconfig.get('include', [])]
+        tops = [t for t in dict.fromkeys(tops) if t and '*' not in t] or list(DEFAULT_PACKAGES)
+        return [t for t in tops if os.path.isdir(os.path.join(self.root, t))]
+
+    def _aliases(self) -> List[tuple]:
+        base = os.path.join(self.root, self.compiler.get('baseUrl', '.'))
+        aliases = []
+        for pattern, targets in (self.compiler.get('paths') or {}).items():
+            if targets:
+                target = os.path.normpath(os.path.join(base, targets[0].rstrip('*')))
+                aliases.append((pattern.rstrip('*'), target))
+        # Longest prefix first so '@shared/' wins over '@/'
+        return sorted(dict.fromkeys(aliases), key=lambda a: len(a[0]), reverse=True)
+
+    def package_of(self, path: str) -> Optional[str]:
+        """Package owning a repo-relative or absolute path, if any"""
+        rel = os.path.relpath(path, self.root) if os.path.isabs(path) else os.path.normpath(path)
+        top = rel.replace('\\', '/').split('/')[0]
+        return top if top in self.packages else None
+
+    def _resolve(self, spec: str, source: str) -> Optional[str]:
+        if spec.startswith('.'):
+            return self.package_of(os.path.normpath(os.path.join(os.path.dirname(source), spec)))
+        for prefix, target in self.aliases:
+            if spec == prefix.rstrip('/') or spec.startswith(prefix):
+                return self.package_of(os.path.join(target, spec[len(prefix):]))
+        return None
+
+    def _dependencies(self) -> Dict[str, Set[str]]:
+        deps: Dict[str, Set[str]] = {p: set() for p in self.packages}
+        names = {}
+        for p in self.packages:
+            manifest = _read_json(os.path.join(self.root, p, 'package.json'))
+            if manifest.get('name'):
+                names[manifest['name']] = p
+        for p in self.packages:
+            pdir = os.path.join(self.root, p)
+            manifest = _read_json(os.path.join(pdir, 'package.json'))
+            for section in ('dependencies', 'devDependencies', 'peerDependencies'):
+                for name, version in (manifest.get(section) or {}).items():
+                    if name in names:
+                        deps[p].add(names[name])
+                    elif isinstance(version, str) and version.startswith(('file:', 'link:')):
+                        target = self.package_of(os.path.join(pdir, version.split(':', 1)[1]))
+                        if target:
+                            deps[p].add(target)
+            for ref in _read_json(os.path.join(pdir, 'tsconfig.json')).get('references') or []:
+                target = self.package_of(os.path.join(pdir, ref.get('path', '')))
+                if target:
+                    deps[p].add(target)
+            for dirpath, dirnames, filenames in os.walk(pdir):
+                dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+                for name in filenames:
+                    if name.endswith(SOURCE_EXTS):
+                        source = os.path.join(dirpath, name)
+                        for spec in _specifiers(source):
+                            target = self._resolve(spec, source)
+                            if target:
+                                deps[p].add(target)
+            deps[p].discard(p)
+        return deps
+
+    @staticmethod
+    def _invert(deps: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+        out: Dict[str, Set[str]] = {p: set() for p in deps}
+        for p, ds in deps.items():
+            for d in ds:
+                out.setdefault(d, set()).add(p)
+        return out
+
+    def _closure(self, start: Iterable[str], edges: Dict[str, Set[str]]) -> Set[str]:
+        seen, stack = set(), list(start)
+        while stack:
+            p = stack.pop()
+            if p not in seen:
+                seen.add(p)
+                stack.extend(edges.get(p, ()))
+        return seen
+
+    def affected(self, changed: Iterable[str]) -> Optional[Set[str]]:
+        """Packages whose build, typecheck or tests can be changed by `changed` (repo-relative paths).
+
+        None when a path other than docs belongs to no package (e.g. e2e tests,
+        playwright.config.ts, scripts/): nothing can be ruled out for it.
+        """
+        direct = set()
+        for path in changed:
+            rel = os.path.normpath(os.path.relpath(path, self.root) if os.path.isabs(path) else path)
+            if rel.lower().endswith(DOC_EXTS):
+                continue
+            top = rel.replace('\\', '/').split('/')[0]
+            # Ambient declarations are visible to every package
+            if rel in ROOT_MANIFESTS or top in self.global_dirs or rel.endswith('.d.ts'):
+                return set(self.packages)
+            pkg = self.package_of(rel) or TOOL_CONFIGS.get(rel)
+            if pkg not in self.packages:
+                return None
+            direct.add(pkg)
+        return self._closure(direct, self.dependents)
+
+    def _scripts(self, d: str) -> Dict[str, str]:
+        return _read_json(os.path.join(d, 'package.json')).get('scripts') or {}
+
+    def plan(self, script: str, changed: Iterable[str]) -> Optional[List[Dict[str, Any]]]:
+        """npm runs that verify `changed` for `script`: [{'dir', 'script', 'args', 'packages', 'inputs'}].
+
+        None when the change can't be narrowed to packages, or an affected package
+        has nowhere to run `script`; the script then runs in full and fails loudly.
+        """
+        affected = self.affected(changed)
+        if affected is None:
+            return None
+        if not affected:
+            return []
+        steps = []
+        hosted = []
+        for p in sorted(affected):
+            pdir = os.path.join(self.root, p)
+            if script in self._scripts(pdir):
+                # A package with its own manifest verifies itself
+                steps.append(self._step(pdir, script, [p]))
+            else:
+                hosted.append(p)
+        if not hosted:
+            return steps
+        root_scripts = self._scripts(self.root)
+        if script not in root_scripts:
+            # Skipping would report unverified packages as passing
+            return None
+
+        # Root-hosted packages: prefer per-package variants such as build:server
+        variants = {p for p in self.packages if f"{script}:{p}" in root_scripts}
+        chosen = {p for p in hosted if p in variants}
+        # A library package without a variant is verified through a dependent that has one
+        covered = all(p in chosen or self._closure([p], self.dependents) & chosen for p in hosted)
+        if chosen and covered and chosen != variants:
+            steps += [self._step(self.root, f"{script}:{p}", [p]) for p in sorted(chosen)]
+        else:
+            # The plain script runs over the whole project, so its result depends on all of it
+            step = self._step(self.root, script, sorted(hosted), self._incremental_args(root_scripts[script]))
+            step['inputs'] = self._step(self.root, script, self.packages)['inputs']
+            steps.append(step)
+        return steps
+
+    def _step(self, d: str, script: str, packages: List[str], args: Optional[List[str]] = None) -> Dict[str, Any]:
+        reads = self._closure(packages, self.deps)
+        inputs = [os.path.join(self.root, p) for p in sorted(reads)]
+        inputs += [os.path.join(self.root, f) for f, p in sorted(TOOL_CONFIGS.items())
+                   if p in reads and os.path.exists(os.path.join(self.root, f))]
+        return {'dir': d, 'script': script, 'args': args or [], 'packages': packages, 'inputs': inputs}
+
+    def _incremental_args(self, command: str) -> List[str]:
+        # tsc checks incrementally given a build-info file; add one if tsconfig doesn't
+        if not command.strip().startswith('tsc') or '--build' in command or ' -b' in command:
+            return []
+        if self.compiler.get('incremental') or self.compiler.get('composite') or '--incremental' in command:
+            return []
+        info = os.path.join(self.root, 'node_modules', '.cache', 'agent-tsbuildinfo')
+        return ['--incremental', '--tsBuildInfoFile', info]
@@ -0,0 +1,177 @@
+import re
+import codecs
+import hashlib
+from collections import deque
+from typing import Dict, Any, Iterable, List, Optional
+from tools.fingerprint_index import fingerprint
+
+# One alternation covers every error signature we care about, so each block of
+# log text is scanned exactly once by the regex engine instead of once per check.
+_SIGNAL_RE = re.compile(
+    r"error (?P<type_error>TS\d+)"
+    r"|(?P<missing_module>Cannot find module)"
+    r"|(?P<missing_property>Property\b.*?\bdoes not exist)"
+    r"|(?P<unknown_property>Object literal may only specify known properties)"
+    r"|(?P<lockfile>npm (?:ERR!|error) code (?:EUSAGE|ERESOLVE|ELOCKVERIFY|ENOLOCK)\b"
+    r"|package-lock\.json[^\n]*\bin sync)"
+)
+
+# tsc prints either `file(line,col): error TS...` or `file:line:col - error TS...`
+_LOCATION_RE = re.compile(
+    r"(?P<file>[^\s():]+\.[cm]?[jt]sx?)"
+    r"(?:\((?P<line>\d+),(?P<column>\d+)\)|:(?P<line_alt>\d+):(?P<column_alt>\d+))"
+)
+_CODE_RE = re.compile(r"error (TS\d+):?\s*")
+_MODULE_RE = re.compile(r"Cannot find module '([^']+)'")
+
+# Kinds ordered by precedence when one line matches several signatures
+_KIND_ORDER = ('lockfile', 'missing_module', 'missing_property', 'unknown_property', 'type_error')
+
+# Failures a stale build cache can cause or hide; only these justify a cold build
+CACHE_BUSTING_KINDS = ('lockfile', 'missing_module')
+
+DEFAULT_SCOPES = ('server/', 'db/', 'shared/')
+MAX_LINE_CHARS = 4096
+
+
+def parse_error_line(line: str) -> Optional[Dict[str, Any]]:
+    """Parse a single matching log line into a structured error record"""
+    kinds = {m.lastgroup for m in _SIGNAL_RE.finditer(line)}
+    if not kinds:
+        return None
+    kind = next(k for k in _KIND_ORDER if k in kinds)
+
+    record = {'kind': kind, 'file': None, 'line': None, 'column': None,
+              'code': None, 'module': None, 'message': line}
+    loc = _LOCATION_RE.search(line)
+    if loc:
+        record['file'] = loc.group('file')
+        record['line'] = int(loc.group('line') or loc.group('line_alt'))
+        record['column'] = int(loc.group('column') or loc.group('column_alt'))
+    code = _CODE_RE.search(line)
+    if code:
+        record['code'] = code.group(1)
+        record['message'] = line[code.end():].strip()
+    module = _MODULE_RE.search(line)
+    if module:
+        record['module'] = module.group(1)
+    return record
+
+
+def is_fatal(record: Dict[str, Any]) -> bool:
+    """Errors that doom a build: any tsc error, an unresolved module or a lockfile mismatch"""
+    return bool(record['code']) or record['kind'] in CACHE_BUSTING_KINDS
+
+
+# Specifiers that name a file in the repo rather than an installed package
+LOCAL_MODULE_PREFIXES = ('./', '../', '/', '@/', '~/')
+
+
+def busts_cache(record: Dict[str, Any]) -> bool:
+    """A lockfile error or an unresolved package; a missing relative import is a code bug, not a stale cache"""
+    if record['kind'] == 'missing_module':
+        module = record.get('module') or ''
+        return not (module.startswith(LOCAL_MODULE_PREFIXES) or module in ('.', '..'))
+    return record['kind'] in CACHE_BUSTING_KINDS
+
+
+def needs_clean_build(errors: Iterable[Dict[str, Any]]) -> bool:
+    """Whether a failure was classified as a dependency/lockfile problem"""
+    return any(busts_cache(e) for e in errors)
+
+
+def error_fingerprint(errors: Iterable[Dict[str, Any]]) -> str:
+    """Stable identity of a failure: the set of its per-error fingerprints, ignoring order"""
+    return hashlib.sha1('\n'.join(sorted({fingerprint(e) for e in errors})).encode()).hexdigest()
+
+
+class BuildLogAnalyzer:
+    """Incremental, single-pass matcher for TypeScript/Node build errors.
+
+    Text is fed in arbitrary chunks; only the trailing partial line is kept
+    between calls, so memory stays bounded by the chunk size, ``max_errors``
+    and ``tail_lines`` regardless of how large the log is.
+    """
+
+    def __init__(self, scopes: Iterable[str] = DEFAULT_SCOPES, max_errors: int = 500,
+                 tail_lines: int = 0):
+        self.scopes = tuple(scopes)
+        self.max_errors = max_errors
+        self.errors: List[Dict[str, Any]] = []
+        self.tail = deque(maxlen=tail_lines) if tail_lines else None
+        self.bytes_seen = 0
+        self.lines_seen = 0
+        self._partial = ''
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    def _in_scope(self, record: Dict[str, Any], line: str) -> bool:
+        # Generic TS errors only count for backend code; the other kinds always do
+        if record['kind'] != 'type_error' or not self.scopes:
+            return True
+        return any(s in line for s in self.scopes)
+
+    def _scan(self, block: str) -> List[Dict[str, Any]]:
+        found = []
+        last_line_start = -1
+        for m in _SIGNAL_RE.finditer(block):
+            start = block.rfind('\n', 0, m.start()) + 1
+            if start == last_line_start:
+                continue
+            last_line_start = start
+            end = block.find('\n', m.end())
+            line = block[start:end if end != -1 else len(block)].strip()
+            line = line[:MAX_LINE_CHARS]
+            record = parse_error_line(line)
+            if record and self._in_scope(record, line):
+                found.append(record)
+        return found
+
+    def _consume(self, block: str) -> List[Dict[str, Any]]:
+        self.lines_seen += block.count('\n')
+        if self.tail is not None:
+            self.tail.extend(line[:MAX_LINE_CHARS] for line in block.splitlines())
+        found = self._scan(block)
+        room = self.max_errors - len(self.errors)
+        if room > 0:
+            self.errors.extend(found[:room])
+        return found
+
+    def feed(self, data) -> List[Dict[str, Any]]:
+        """Feed a chunk of bytes or text; return error records completed by it"""
+        if isinstance(data, bytes):
+            self.bytes_seen += len(data)
+            data = self._decoder.decode(data)
+        else:
+            self.bytes_seen += len(data.encode('utf-8', 'replace'))
+        text = self._partial + data
+        cut = text.rfind('\n')
+        if cut == -1:
+            # Guard against pathological logs with no newlines at all
+            self._partial = text[:MAX_LINE_CHARS]
+            return []
+        self._partial = text[cut + 1:][:MAX_LINE_CHARS]
+        return self._consume(text[:cut + 1])
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flush any buffered partial line and return its error records"""
+        rest = self._partial + self._decoder.decode(b'', final=True)
+        self._partial = ''
+        return self._consume(rest) if rest else []
+
+    def tail_text(self) -> str:
+        return '\n'.join(self.tail) if self.tail is not None else ''
+
+
+def analyze_stream(chunks: Iterable, **kwargs) -> List[Dict[str, Any]]:
+    """Run a fresh analyzer over an iterable of byte/text chunks"""
+    analyzer = BuildLogAnalyzer(**kwargs)
+    for chunk in chunks:
+        if chunk:
+            analyzer.feed(chunk)
+    analyzer.close()
+    return analyzer.errors
+
+
+def analyze_text(text: str, **kwargs) -> List[Dict[str, Any]]:
+    """Analyze an in-memory log; kept for callers that already hold the text"""
+    return analyze_stream([text], **kwargs)
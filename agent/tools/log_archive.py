@@ -0,0 +1,327 @@
+import os
+import re
+import mmap
+import time
+import zlib
+import fcntl
+import sqlite3
+import bisect
+import threading
+from array import array
+from typing import Dict, Any, List, Optional, Set
+from tools.log_analyzer import analyze_text
+from tools.fingerprint_index import canonical_path
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BLOCK_BYTES = 64 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deploys (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    deploy_id TEXT UNIQUE,
+    service_id TEXT,
+    archived_at REAL,
+    bytes INTEGER,
+    lines INTEGER
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    deploy_seq INTEGER,
+    offset INTEGER,
+    length INTEGER,
+    first_line INTEGER,
+    line_offsets BLOB
+);
+CREATE INDEX IF NOT EXISTS blocks_deploy ON blocks(deploy_seq);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT,
+    block_id INTEGER,
+    PRIMARY KEY (term, block_id)
+) WITHOUT ROWID;
+"""
+
+# Tokens indexed from every line of a block, and recognised in queries, with the same patterns
+_CODE_RE = re.compile(r"TS\d+")
+_MODULE_RE = re.compile(r"Cannot find module '([^']+)'")
+_PATH_RUN_RE = re.compile(r"[\w.@~/\\-]+")
+_SOURCE_EXT_RE = re.compile(r"\.[cm]?[jt]sx?\b")
+
+# Bumped whenever block_terms changes; older indexes are rebuilt on open
+INDEX_VERSION = 1
+
+
+def default_archive_dir() -> str:
+    return os.getenv('AGENT_LOG_ARCHIVE') or os.path.join(AGENT_DIR, 'logs', 'archive')
+
+
+def open_archive(path: Optional[str] = None) -> Optional['LogArchive']:
+    """Open the build-log archive; None when disabled (AGENT_LOG_ARCHIVE=off) or unavailable"""
+    if os.getenv('AGENT_LOG_ARCHIVE', '').lower() == 'off':
+        return None
+    try:
+        return LogArchive(path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Build log archive unavailable: {e}")
+        return None
+
+
+def _package(module: str) -> str:
+    # 'drizzle-orm/pg-core' -> 'drizzle-orm', '@scope/pkg/x' -> '@scope/pkg'
+    parts = module.split('/')
+    return '/'.join(parts[:2] if module.startswith('@') else parts[:1])
+
+
+def _paths(text: str):
+    """(path, start, end of its run) for each source path; one linear pass, however long the line"""
+    for run in _PATH_RUN_RE.finditer(text):
+        ends = [m.end() for m in _SOURCE_EXT_RE.finditer(run.group(0))]
+        if ends:
+            path = run.group(0)[:ends[-1]]
+            if '/' in path or '\\' in path:
+                yield path, run.start(), run.end()
+
+
+def block_terms(text: str) -> Set[str]:
+    """Index terms for a block of log text: error kinds, plus every TS code, missing module and source path in it"""
+    terms = {f"kind:{e['kind']}" for e in analyze_text(text, scopes=())}
+    terms.update(f"code:{c}" for c in _CODE_RE.findall(text))
+    terms.update(f"module:{_package(m)}" for m in _MODULE_RE.findall(text))
+    terms.update(f"file:{canonical_path(p)}" for p, _, _ in _paths(text))
+    return terms
+
+
+def query_terms(query: str) -> Set[str]:
+    """Index terms a literal query necessarily implies; empty when it needs a full scan.
+
+    A token cut off by the end of the query may continue in the log, so it is
+    matched as a prefix (``term*``); a path cut off at the start may be the tail
+    of a longer one and isn't used at all.
+    """
+    terms = set()
+    for m in _CODE_RE.finditer(query):
+        terms.add(f"code:{m.group(0)}" + ('*' if m.end() == len(query) else ''))
+    terms.update(f"module:{_package(m)}" for m in _MODULE_RE.findall(query))
+    for path, start, run_end in _paths(query):
+        if start > 0:
+            terms.add(f"file:{canonical_path(path)}" + ('*' if run_end == len(query) else ''))
+    return terms
+
+
+class ArchiveWriter:
+    """Appends one deploy's log to the archive as it streams in; nothing is indexed until close().
+
+    Call abort() if the stream fails, so the blocks already written aren't left
+    behind as unindexed bytes.
+    """
+
+    def __init__(self, archive: 'LogArchive', deploy_id: str, service_id: Optional[str]):
+        self.archive = archive
+        self.deploy_id = deploy_id
+        self.service_id = service_id
+        self._buffer = bytearray()
+        self._blocks = []
+        self.bytes = 0
+        self.lines = 0
+
+    def feed(self, chunk: bytes):
+        self._buffer += chunk
+        self.bytes += len(chunk)
+        while len(self._buffer) >= BLOCK_BYTES:
+            # Blocks end on a line boundary so no line straddles two of them
+            cut = self._buffer.find(b'\n', BLOCK_BYTES - 1) + 1
+            if not cut:
+                if len(self._buffer) < 4 * BLOCK_BYTES:
+                    break
+                cut = len(self._buffer)
+            self._flush(bytes(self._buffer[:cut]))
+            del self._buffer[:cut]
+
+    def _flush(self, raw: bytes):
+        text = raw.decode('utf-8', errors='replace')
+        offsets = array('I', [0])
+        pos = raw.find(b'\n')
+        while pos != -1 and pos + 1 < len(raw):
+            offsets.append(pos + 1)
+            pos = raw.find(b'\n', pos + 1)
+        offset, length = self.archive._append(zlib.compress(raw, 6))
+        self._blocks.append((offset, length, self.lines, offsets.tobytes(), block_terms(text)))
+        self.lines += len(offsets)
+
+    def close(self) -> Dict[str, Any]:
+        if self._buffer:
+            self._flush(bytes(self._buffer))
+            self._buffer = bytearray()
+        summary = {'deploy_id': self.deploy_id, 'bytes': self.bytes, 'lines': self.lines,
+                   'blocks': len(self._blocks)}
+        if not self.archive._commit(self):
+            self.abort()  # archived concurrently
+        return summary
+
+    def abort(self):
+        """Drop this deploy's blocks from the end of the data file"""
+        if self._blocks:
+            start = self._blocks[0][0]
+            end = self._blocks[-1][0] + self._blocks[-1][1]
+            self.archive._truncate(start, end)
+        self._blocks = []
+        self._buffer = bytearray()
+
+
+class LogArchive:
+    """Append-only archive of build logs in zlib blocks, with a SQLite sidecar index.
+
+    ``builds.dat`` holds the compressed blocks back to back and is read through
+    mmap. ``index.db`` maps each deploy to its blocks, keeps each block's line
+    offsets and an inverted index from error codes, modules and file paths to
+    the blocks containing them, so searches only inflate candidate blocks.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_archive_dir()
+        os.makedirs(self.path, exist_ok=True)
+        self.data_path = os.path.join(self.path, 'builds.dat')
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(self.path, 'index.db'), check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(_SCHEMA)
+        open(self.data_path, 'ab').close()
+        self._map = None
+        self._map_size = 0
+        if self.db.execute('PRAGMA user_version').fetchone()[0] < INDEX_VERSION:
+            self._reindex()
+
+    def close(self):
+        if self._map:
+            self._map.close()
+        self.db.close()
+
+    def has(self, deploy_id: str) -> bool:
+        with self._lock:
+            return self.db.execute('SELECT 1 FROM deploys WHERE deploy_id = ?', (deploy_id,)).fetchone() is not None
+
+    def writer(self, deploy_id: str, service_id: Optional[str] = None) -> Optional[ArchiveWriter]:
+        """A writer for a deploy's log, or None if it is already archived"""
+        return None if self.has(deploy_id) else ArchiveWriter(self, deploy_id, service_id)
+
+    def _append(self, data: bytes):
+        with open(self.data_path, 'ab') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                offset = fh.seek(0, os.SEEK_END)
+                fh.write(data)
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+        return offset, len(data)
+
+    def _truncate(self, start: int, end: int):
+        # Only the file's tail can go; blocks another writer appended after ours must stay
+        with open(self.data_path, 'r+b') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                if fh.seek(0, os.SEEK_END) == end:
+                    fh.truncate(start)
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _reindex(self):
+        with self._lock:
+            blocks = self.db.execute('SELECT id, offset, length FROM blocks').fetchall()
+        terms = []
+        for b in blocks:
+            text = self._read(b['offset'], b['length']).decode('utf-8', errors='replace')
+            terms += [(t, b['id']) for t in block_terms(text)]
+        with self._lock, self.db:
+            self.db.execute('DELETE FROM terms')
+            self.db.executemany('INSERT OR IGNORE INTO terms VALUES (?, ?)', terms)
+            self.db.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+
+    def _commit(self, w: ArchiveWriter) -> bool:
+        with self._lock, self.db:
+            cur = self.db.execute(
+                'INSERT OR IGNORE INTO deploys (deploy_id, service_id, archived_at, bytes, lines) VALUES (?, ?, ?, ?, ?)',
+                (w.deploy_id, w.service_id, time.time(), w.bytes, w.lines))
+            if not cur.rowcount:
+                return False
+            seq = cur.lastrowid
+            for offset, length, first_line, offsets, terms in w._blocks:
+                block_id = self.db.execute(
+                    'INSERT INTO blocks (deploy_seq, offset, length, first_line, line_offsets) VALUES (?, ?, ?, ?, ?)',
+                    (seq, offset, length, first_line, offsets)).lastrowid
+                self.db.executemany('INSERT OR IGNORE INTO terms VALUES (?, ?)',
+                                    [(t, block_id) for t in terms])
+        return True
+
+    def _read(self, offset: int, length: int) -> bytes:
+        end = offset + length
+        with self._lock:
+            if self._map is None or end > self._map_size:
+                # The file only grows; remap to cover blocks appended since
+                if self._map:
+                    self._map.close()
+                with open(self.data_path, 'rb') as fh:
+                    self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                self._map_size = len(self._map)
+            return zlib.decompress(self._map[offset:end])
+
+    def read_log(self, deploy_id: str) -> str:
+        with self._lock:
+            rows = self.db.execute(
+                'SELECT b.offset, b.length FROM blocks b JOIN deploys d ON d.seq = b.deploy_seq '
+                'WHERE d.deploy_id = ? ORDER BY b.id', (deploy_id,)).fetchall()
+        return b''.join(self._read(r['offset'], r['length']) for r in rows).decode('utf-8', errors='replace')
+
+    def search(self, query: str, last: int = 500, service_id: Optional[str] = None,
+               limit: int = 20, use_index: bool = True) -> Dict[str, Any]:
+        """Which of the last ``last`` archived deploys contain ``query``, with the matching lines"""
+        started = time.perf_counter()
+        terms = query_terms(query) if use_index else set()
+        scope = 'SELECT seq FROM deploys%s ORDER BY seq DESC LIMIT ?' % (' WHERE service_id = ?' if service_id else '')
+        scope_params: List[Any] = ([service_id] if service_id else []) + [last]
+        params = list(scope_params)
+        sql = ('SELECT b.*, d.deploy_id, d.service_id, d.archived_at FROM blocks b '
+               'JOIN deploys d ON d.seq = b.deploy_seq WHERE b.deploy_seq IN (%s)' % scope)
+        # Blocks holding every term; the literal is then confirmed inside them
+        for term in sorted(terms):
+            if term.endswith('*'):
+                sql += ' AND b.id IN (SELECT block_id FROM terms WHERE term >= ? AND term < ?)'
+                params += [term[:-1], term[:-1] + '\U0010ffff']
+            else:
+                sql += ' AND b.id IN (SELECT block_id FROM terms WHERE term = ?)'
+                params.append(term)
+        with self._lock:
+            rows = self.db.execute(sql + ' ORDER BY b.deploy_seq DESC, b.id', params).fetchall()
+            total = self.db.execute('SELECT COUNT(*) FROM blocks WHERE deploy_seq IN (%s)' % scope,
+                                    scope_params).fetchone()[0]
+
+        needle = query.encode()
+        deploys: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            raw = self._read(row['offset'], row['length'])
+            pos = raw.find(needle)
+            if pos == -1:
+                continue
+            offsets = array('I'); offsets.frombytes(row['line_offsets'])
+            hit = deploys.setdefault(row['deploy_id'], {
+                'deploy_id': row['deploy_id'], 'service_id': row['service_id'],
+                'archived_at': row['archived_at'], 'matches': []})
+            while pos != -1 and len(hit['matches']) < limit:
+                i = bisect.bisect_right(offsets, pos) - 1
+                end = offsets[i + 1] if i + 1 < len(offsets) else len(raw)
+                hit['matches'].append({'line': row['first_line'] + i + 1,
+                                       'text': raw[offsets[i]:end].decode('utf-8', errors='replace').rstrip('\n')})
+                pos = raw.find(needle, end)
+        return {
+            'query': query,
+            'indexed_terms': sorted(terms),
+            'deploys': list(deploys.values()),
+            'blocks_read': len(rows),
+            'blocks_total': total,
+            'seconds': round(time.perf_counter() - started, 4)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self.db.execute('SELECT COUNT(*) AS n, COALESCE(SUM(bytes), 0) AS raw FROM deploys').fetchone()
+        return {'deploys': row['n'], 'raw_bytes': row['raw'], 'stored_bytes': os.path.getsize(self.data_path)}
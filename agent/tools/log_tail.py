@@ -0,0 +1,62 @@
+import re
+import requests
+from typing import Dict, Any, List, Optional
+from tools.log_analyzer import BuildLogAnalyzer
+
+_CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-\d+/(?:\d+|\*)")
+
+
+class LogTailer:
+    """Follow a growing build log over HTTP, fetching only unseen bytes.
+
+    Each poll asks for ``Range: bytes=<offset>-``. Servers that honour it reply
+    206 with just the new bytes (or 416 when nothing was appended); servers that
+    ignore it reply 200 with the whole body, and the already-seen prefix is
+    skipped while streaming so it is never re-analyzed.
+    """
+
+    def __init__(self, url: str, session: Optional[requests.Session] = None,
+                 analyzer: Optional[BuildLogAnalyzer] = None,
+                 chunk_size: int = 64 * 1024, timeout: int = 30):
+        self.url = url
+        self.session = session or requests.Session()
+        self.analyzer = analyzer or BuildLogAnalyzer()
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.offset = 0
+        self.requests = 0
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """Fetch and analyze bytes appended since the last poll"""
+        # Identity encoding keeps byte offsets meaningful for Range requests
+        headers = {'Accept-Encoding': 'identity'}
+        if self.offset:
+            headers['Range'] = f'bytes={self.offset}-'
+
+        self.requests += 1
+        found = []
+        with self.session.get(self.url, headers=headers, stream=True,
+                              timeout=self.timeout) as response:
+            if response.status_code == 416:
+                return found
+            response.raise_for_status()
+
+            skip = self.offset
+            if response.status_code == 206:
+                match = _CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+                skip = max(self.offset - int(match.group(1)), 0) if match else 0
+
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                if skip:
+                    if len(chunk) <= skip:
+                        skip -= len(chunk)
+                        continue
+                    chunk, skip = chunk[skip:], 0
+                if chunk:
+                    self.offset += len(chunk)
+                    found.extend(self.analyzer.feed(chunk))
+        return found
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Flush the analyzer once the log is known to be complete"""
+        return self.analyzer.close()
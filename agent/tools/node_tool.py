@@ -1,11 +1,82 @@
-import os, subprocess
+import os, time, signal, subprocess, threading
+from concurrent.futures import ThreadPoolExecutor
+from tools.script_cache import ScriptCache
+from tools.impact import ImpactResolver
+from tools.tracing import span, in_current_context
+
+# Serializes prefixed output lines from concurrently running scripts/tasks
+output_lock = threading.Lock()
+
+def _kill_group(p):
+    try: os.killpg(p.pid, signal.SIGKILL)
+    except ProcessLookupError: pass
+
 class NodeTool:
-    def __init__(self, client_dir='client', server_dir='server'):
+    def __init__(self, client_dir='client', server_dir='server', tag=None, cache=None, deadline=None):
         self.client_dir = client_dir; self.server_dir = server_dir
-    def run_script(self, name:str):
-        for d in [self.client_dir, self.server_dir]:
-            if os.path.exists(os.path.join(d,'package.json')):
-                print(f"Running {name} in {d}...")
-                if subprocess.call(['npm','run',name], cwd=d) != 0:
-                    return False
-        return True
+        self.tag = tag
+        self.deadline = deadline  # time.monotonic() value after which scripts are killed
+        if cache is None and os.getenv('AGENT_SCRIPT_CACHE', '').lower() != 'off':
+            cache = ScriptCache()
+        self.cache = cache
+    def _say(self, msg:str, d:str=None):
+        label = ':'.join(x for x in (self.tag, d and os.path.basename(os.path.normpath(d))) if x)
+        with output_lock: print(f"[{label}] {msg}" if label else msg, flush=True)
+    def _npm(self, name:str, d:str, args=()):
+        cmd = ['npm','run',name] + (['--', *args] if args else [])
+        # Own process group, so the watchdog also reaches tsc/vite/esbuild holding our stdout pipe
+        p = subprocess.Popen(cmd, cwd=d, stdout=subprocess.PIPE, start_new_session=True,
+                             stderr=subprocess.STDOUT, text=True, errors='replace')
+        out = []
+        watchdog = None
+        if self.deadline is not None:
+            watchdog = threading.Timer(max(self.deadline - time.monotonic(), 0), _kill_group, (p,))
+            watchdog.daemon = True; watchdog.start()
+        for line in p.stdout:
+            out.append(line); self._say(line.rstrip('\n'), d)
+        code = p.wait()
+        if watchdog: watchdog.cancel()
+        return code, ''.join(out)
+    def _run_one(self, name:str, d:str, args=(), inputs=None):
+        with span('npm', script=name, dir=d, task=self.tag) as s:
+            key = self.cache.key(' '.join([name, *args]), d, inputs) if self.cache else None
+            hit = self.cache.get(key) if key else None
+            if hit:
+                s.set(cache='hit', returncode=hit['returncode'])
+                self._say(f"{name}: inputs unchanged, replaying cached result (exit {hit['returncode']})", d)
+                for line in hit['output'].splitlines(): self._say(line, d)
+                return hit['returncode']
+            self._say(f"Running {name} in {d}...", d)
+            code, output = self._npm(name, d, args)
+            s.set(cache='miss' if key else 'off', returncode=code, bytes=len(output),
+                  status='ok' if code == 0 else 'error')
+            # Only successes are cached, so flaky failures always get a fresh run
+            if key and code == 0: self.cache.put(key, code, output)
+            return code
+    def plan_script(self, name:str, changed):
+        """Resolver steps for `name` given repo-relative changed paths; None to run it in full"""
+        if os.getenv('AGENT_IMPACT', '').lower() == 'off':
+            return None
+        steps = ImpactResolver(self.client_dir).plan(name, changed)
+        if steps is None:
+            self._say(f"{name}: changes outside every package, running in full")
+        return steps
+    def run_script(self, name:str, changed=None):
+        """Run `name`; with `changed`, only for the packages those paths can affect"""
+        steps = self.plan_script(name, changed) if changed is not None else None
+        if steps is None:
+            dirs = [d for d in [self.client_dir, self.server_dir]
+                    if os.path.exists(os.path.join(d,'package.json'))]
+            steps = [{'dir': d, 'script': name, 'args': [], 'inputs': None} for d in dirs]
+        elif not steps:
+            self._say(f"{name}: no affected packages, skipping")
+            return True
+        else:
+            self._say(f"{name}: affected {', '.join(sorted({p for s in steps for p in s['packages']}))} -> "
+                      + ', '.join(' '.join([s['script'], *s['args']]) for s in steps))
+        run = lambda s: self._run_one(s['script'], s['dir'], s['args'], s['inputs'])
+        if len(steps) < 2:
+            return all(run(s) == 0 for s in steps)
+        with ThreadPoolExecutor(max_workers=len(steps)) as pool:
+            codes = list(pool.map(in_current_context(run), steps))
+        return all(c == 0 for c in codes)
@@ -0,0 +1,179 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Iterable, List, Optional
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_PATH = os.path.join(AGENT_DIR, 'prompts', 'task_schema.json')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    key TEXT PRIMARY KEY,
+    goal_key TEXT,
+    goal TEXT,
+    head TEXT,
+    fingerprints TEXT,
+    plan TEXT,
+    created_at REAL,
+    last_used REAL,
+    hits INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS plans_goal ON plans(goal_key, created_at);
+CREATE INDEX IF NOT EXISTS plans_last_used ON plans(last_used);
+"""
+
+_TYPES = {'object': dict, 'array': list, 'string': str, 'integer': int, 'number': (int, float), 'boolean': bool}
+
+
+def default_db_path() -> str:
+    return os.getenv('AGENT_PLAN_CACHE') or os.path.join(AGENT_DIR, 'logs', 'plans.db')
+
+
+def normalize_goal(goal: str) -> str:
+    """Goal text as a cache key: case, spacing and trailing punctuation don't make a new goal"""
+    return re.sub(r'\s+', ' ', goal or '').strip().rstrip('.!').lower()
+
+
+def goal_key(goal: str, fingerprints: Iterable[str] = ()) -> str:
+    return hashlib.sha1('\0'.join([normalize_goal(goal), *sorted(set(fingerprints))]).encode()).hexdigest()
+
+
+def plan_key(goal: str, head: Optional[str], fingerprints: Iterable[str] = ()) -> str:
+    return hashlib.sha1(f"{goal_key(goal, fingerprints)}\0{head or ''}".encode()).hexdigest()
+
+
+def load_task_schema(path: Optional[str] = None) -> Dict[str, Any]:
+    with open(path or SCHEMA_PATH) as fh:
+        return json.load(fh)
+
+
+def _check(schema: Dict[str, Any], value: Any, where: str, errors: List[str]):
+    # The subset of JSON Schema task_schema.json uses: type, required, properties, items, min*
+    expected = schema.get('type')
+    if expected:
+        # bool is an int subclass but not a JSON number
+        if not isinstance(value, _TYPES[expected]) or (isinstance(value, bool) and expected != 'boolean'):
+            errors.append(f"{where}: expected {expected}, got {type(value).__name__}")
+            return
+    if isinstance(value, str) and len(value) < schema.get('minLength', 0):
+        errors.append(f"{where}: shorter than {schema['minLength']}")
+    if isinstance(value, list):
+        if len(value) < schema.get('minItems', 0):
+            errors.append(f"{where}: fewer than {schema['minItems']} items")
+        for i, item in enumerate(value):
+            _check(schema.get('items') or {}, item, f"{where}[{i}]", errors)
+    if isinstance(value, dict):
+        errors.extend(f"{where}: missing {k!r}" for k in schema.get('required', []) if k not in value)
+        for k, sub in (schema.get('properties') or {}).items():
+            if k in value:
+                _check(sub, value[k], f"{where}.{k}", errors)
+
+
+def validate_plan(tasks: Any, schema: Optional[Dict[str, Any]] = None) -> List[str]:
+    """Problems with a plan (a non-empty list of tasks) against task_schema.json; empty if valid"""
+    schema = schema or load_task_schema()
+    if not isinstance(tasks, list) or not tasks:
+        return ['plan: expected a non-empty list of tasks']
+    errors: List[str] = []
+    for i, task in enumerate(tasks):
+        _check(schema, task, f"task[{i}]", errors)
+    return errors
+
+
+def open_plan_cache(path: Optional[str] = None) -> Optional['PlanCache']:
+    """Open the plan cache; None when disabled (AGENT_PLAN_CACHE=off) or unavailable"""
+    if os.getenv('AGENT_PLAN_CACHE', '').lower() == 'off':
+        return None
+    try:
+        return PlanCache(path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Plan cache unavailable: {e}")
+        return None
+
+
+class PlanCache:
+    """SQLite store of validated plans keyed by normalised goal, HEAD commit and error fingerprints.
+
+    Entries older than ``ttl`` seconds are dropped, and beyond ``max_entries``
+    the least recently used go first. Plans are re-validated when read, so a
+    schema change retires entries it no longer accepts.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.path = path or default_db_path()
+        self.max_entries = max_entries or int(os.getenv('AGENT_PLAN_CACHE_MAX', '500'))
+        self.ttl = ttl if ttl is not None else float(os.getenv('AGENT_PLAN_CACHE_TTL_DAYS', '7')) * 86400
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.executescript(_SCHEMA)
+        self.evict()
+
+    def close(self):
+        self.db.close()
+
+    def _load(self, row: Optional[sqlite3.Row]) -> Optional[List[Dict[str, Any]]]:
+        if row is None:
+            return None
+        try:
+            tasks = json.loads(row['plan'])
+        except ValueError:
+            tasks = None
+        if tasks is None or validate_plan(tasks):
+            with self._lock, self.db:
+                self.db.execute('DELETE FROM plans WHERE key = ?', (row['key'],))
+            return None
+        with self._lock, self.db:
+            self.db.execute('UPDATE plans SET last_used = ?, hits = hits + 1 WHERE key = ?', (time.time(), row['key']))
+        return tasks
+
+    def get(self, goal: str, head: Optional[str], fingerprints: Iterable[str] = ()) -> Optional[List[Dict[str, Any]]]:
+        """The plan cached for exactly this goal, commit and fingerprint set"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            row = self.db.execute('SELECT * FROM plans WHERE key = ? AND created_at >= ?',
+                                  (plan_key(goal, head, fingerprints), cutoff)).fetchone()
+        return self._load(row)
+
+    def latest(self, goal: str, fingerprints: Iterable[str] = ()) -> Optional[List[Dict[str, Any]]]:
+        """The newest plan for this goal and fingerprint set at any commit"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            row = self.db.execute('SELECT * FROM plans WHERE goal_key = ? AND created_at >= ? '
+                                  'ORDER BY created_at DESC LIMIT 1',
+                                  (goal_key(goal, fingerprints), cutoff)).fetchone()
+        return self._load(row)
+
+    def put(self, goal: str, head: Optional[str], fingerprints: Iterable[str], tasks: List[Dict[str, Any]]):
+        fingerprints = sorted(set(fingerprints))
+        now = time.time()
+        with self._lock, self.db:
+            self.db.execute(
+                'INSERT OR REPLACE INTO plans (key, goal_key, goal, head, fingerprints, plan, created_at, last_used, hits) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)',
+                (plan_key(goal, head, fingerprints), goal_key(goal, fingerprints), goal, head,
+                 json.dumps(fingerprints), json.dumps(tasks), now, now))
+            self.db.execute('DELETE FROM plans WHERE key NOT IN '
+                            '(SELECT key FROM plans ORDER BY last_used DESC LIMIT ?)', (self.max_entries,))
+
+    def evict(self, ttl: Optional[float] = None) -> int:
+        """Drop plans created before the TTL and any beyond the LRU limit"""
+        cutoff = time.time() - (self.ttl if ttl is None else ttl)
+        with self._lock, self.db:
+            removed = self.db.execute('DELETE FROM plans WHERE created_at < ?', (cutoff,)).rowcount
+            removed += self.db.execute('DELETE FROM plans WHERE key NOT IN '
+                                       '(SELECT key FROM plans ORDER BY last_used DESC LIMIT ?)',
+                                       (self.max_entries,)).rowcount
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            row = self.db.execute('SELECT COUNT(*) AS n, COALESCE(SUM(hits), 0) AS hits FROM plans').fetchone()
+        return {'plans': row['n'], 'hits': row['hits']}
@@ -0,0 +1,112 @@
+import time
+import random
+import requests
+from typing import Dict, Any, Optional, Callable
+
+# Phases close to completion are polled quickly; long build phases back off
+FINISHING_STATUSES = ('update_in_progress', 'pre_deploy_in_progress')
+
+
+class PollScheduler:
+    """Phase-aware poll interval with backoff, jitter and a wall-clock deadline.
+
+    Right after a trigger it polls every ``fast`` seconds for ``fast_window``
+    seconds. After that the interval starts at ``min_interval`` and grows by
+    ``backoff`` while the deploy stays in the same phase, capped at
+    ``max_interval``. A phase change or a finishing phase resets it. Passing
+    ``fixed`` reproduces the old constant-interval loop for comparison.
+    """
+
+    def __init__(self, deadline: float = 1800, fast: float = 2, fast_window: float = 30,
+                 min_interval: float = 5, max_interval: float = 60, backoff: float = 1.5,
+                 jitter: float = 0.2, fixed: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.deadline = deadline
+        self.fast = fast
+        self.fast_window = fast_window
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.fixed = fixed
+        self.clock = clock
+        self.started = clock()
+        self.polls = 0
+        self.detected_after = None
+        self._phase = None
+        self._interval = min_interval
+
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def remaining(self) -> float:
+        return max(self.deadline - self.elapsed(), 0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def mark_detected(self):
+        """Record when the terminal state was observed"""
+        if self.detected_after is None:
+            self.detected_after = self.elapsed()
+
+    def next_delay(self, phase: Optional[str] = None) -> float:
+        """Seconds to wait before the next poll, given the phase just observed"""
+        self.polls += 1
+        if self.fixed is not None:
+            return min(self.fixed, self.remaining())
+
+        fast = self.elapsed() < self.fast_window
+        if phase != self._phase:
+            self._phase = phase
+            self._interval = self.min_interval
+        elif phase in FINISHING_STATUSES:
+            self._interval = self.min_interval
+        elif not fast:
+            # The ramp starts when the fast window ends, not while it is running
+            self._interval = min(self._interval * self.backoff, self.max_interval)
+
+        base = self.fast if fast else self._interval
+        delay = base * random.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(delay, self.remaining())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'polls': self.polls,
+            'elapsed': round(self.elapsed(), 3),
+            'time_to_detect': None if self.detected_after is None else round(self.detected_after, 3),
+            'mode': 'fixed' if self.fixed is not None else 'adaptive'
+        }
+
+
+class ConditionalPoller:
+    """GET a JSON resource with If-None-Match so unchanged polls cost a 304"""
+
+    def __init__(self, session: requests.Session, url: str, params: Optional[Dict[str, Any]] = None,
+                 timeout: int = 30):
+        self.session = session
+        self.url = url
+        self.params = params
+        self.timeout = timeout
+        self.etag = None
+        self.body = None
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes = 0
+
+    def get(self) -> Any:
+        headers = {'If-None-Match': self.etag} if self.etag else {}
+        self.requests += 1
+        response = self.session.get(self.url, params=self.params, headers=headers,
+                                    timeout=self.timeout)
+        if response.status_code == 304 and self.body is not None:
+            self.not_modified += 1
+            return self.body
+        response.raise_for_status()
+        self.bytes += len(response.content)
+        self.etag = response.headers.get('ETag')
+        self.body = response.json()
+        return self.body
+
+    def stats(self) -> Dict[str, Any]:
+        return {'requests': self.requests, 'not_modified': self.not_modified, 'bytes': self.bytes}
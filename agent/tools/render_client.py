@@ -0,0 +1,146 @@
+import os
+import asyncio
+import requests
+from typing import Dict, Any, List, Optional, Iterable
+from tools.log_analyzer import BuildLogAnalyzer
+from tools.polling import PollScheduler
+from tools.http_session import pooled_session
+
+
+IN_PROGRESS_STATUSES = ('created', 'build_in_progress', 'update_in_progress', 'pre_deploy_in_progress')
+FAILED_STATUSES = ('failed', 'build_failed', 'update_failed', 'pre_deploy_failed', 'canceled')
+
+
+def render_api_url() -> str:
+    """Render API base URL; overridable so local stand-in servers can be used"""
+    return os.getenv('RENDER_API_URL', 'https://api.render.com/v1').rstrip('/')
+
+
+def service_ids_from_env() -> List[str]:
+    """Services to watch: RENDER_SERVICE_IDS (comma separated) or RENDER_SERVICE_ID"""
+    raw = os.getenv('RENDER_SERVICE_IDS') or os.getenv('RENDER_SERVICE_ID', '')
+    return [s.strip() for s in raw.split(',') if s.strip()]
+
+
+def summarize_deploy(deploy: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a Render deploy object into the monitor's status shape"""
+    # List endpoints wrap each item as {"deploy": {...}, "cursor": ...}
+    deploy = deploy.get('deploy', deploy)
+    return {
+        "status": deploy.get('status'),
+        "id": deploy.get('id'),
+        "commit": (deploy.get('commit') or {}).get('id') or deploy.get('commitSha'),
+        "created_at": deploy.get('createdAt'),
+        "finished_at": deploy.get('finishedAt'),
+        "build_logs_url": deploy.get('buildLogsUrl')
+    }
+
+
+class AsyncRenderClient:
+    """asyncio front end over one pooled requests session.
+
+    Blocking calls run in worker threads; a semaphore caps how many are in
+    flight so fan-out over many services cannot exhaust the pool or trip
+    Render's rate limits.
+    """
+
+    def __init__(self, api_token: Optional[str] = None, max_concurrency: int = 8,
+                 session: Optional[requests.Session] = None, timeout: int = 30):
+        self.api_token = api_token if api_token is not None else os.getenv('RENDER_API_TOKEN', '')
+        self.max_concurrency = max_concurrency
+        self.session = session or pooled_session(self.api_token, max_concurrency)
+        # Build logs can live on another host; they are fetched without the API token
+        self.log_session = pooled_session('', max_concurrency)
+        self.timeout = timeout
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+        self.log_session.close()
+
+    def _limit(self) -> asyncio.Semaphore:
+        # Created lazily so the semaphore binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _call(self, fn, *args, **kwargs):
+        async with self._limit():
+            return await asyncio.to_thread(fn, *args, **kwargs)
+
+    async def get_json(self, path: str, **params) -> Any:
+        def fetch():
+            response = self.session.get(f"{render_api_url()}{path}", params=params or None,
+                                        timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        return await self._call(fetch)
+
+    async def list_deploys(self, service_id: str, limit: int = 1) -> List[Dict[str, Any]]:
+        return await self.get_json(f"/services/{service_id}/deploys", limit=limit)
+
+    async def get_deploy(self, service_id: str, deploy_id: str) -> Dict[str, Any]:
+        return await self.get_json(f"/services/{service_id}/deploys/{deploy_id}")
+
+    async def latest_status(self, service_id: str) -> Dict[str, Any]:
+        """Latest deploy status for one service; errors are reported, not raised"""
+        try:
+            deploys = await self.list_deploys(service_id)
+            status = summarize_deploy(deploys[0]) if deploys else {"status": "no_deploys"}
+        except Exception as e:
+            status = {"error": str(e)}
+        status["service_id"] = service_id
+        return status
+
+    async def analyze_logs(self, logs_url: str, chunk_size: int = 64 * 1024) -> Dict[str, Any]:
+        """Stream a build log through a fresh analyzer in a worker thread"""
+        def stream():
+            analyzer = BuildLogAnalyzer()
+            with self.log_session.get(logs_url, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        analyzer.feed(chunk)
+            analyzer.close()
+            return {"errors": analyzer.errors, "log_bytes": analyzer.bytes_seen}
+        try:
+            return await self._call(stream)
+        except Exception as e:
+            return {"errors": [], "log_bytes": 0, "error": str(e)}
+
+    async def statuses(self, service_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch the latest status of every service concurrently"""
+        results = await asyncio.gather(*(self.latest_status(s) for s in service_ids))
+        return {r["service_id"]: r for r in results}
+
+    async def watch_service(self, service_id: str, check_interval: Optional[float] = None,
+                            timeout: float = 1800) -> Dict[str, Any]:
+        """Poll one service until its latest deploy settles or ``timeout`` expires"""
+        scheduler = PollScheduler(deadline=timeout, fixed=check_interval)
+        while True:
+            status = await self.latest_status(service_id)
+            state = status.get('status')
+            if state == 'live':
+                scheduler.mark_detected()
+                return dict(status, success=True, errors=[], poll=scheduler.stats())
+            if state in FAILED_STATUSES:
+                scheduler.mark_detected()
+                logs = await self.analyze_logs(status['build_logs_url']) if status.get('build_logs_url') else {"errors": []}
+                return dict(status, success=False, poll=scheduler.stats(), **logs)
+            delay = scheduler.next_delay(state)
+            if scheduler.expired():
+                return dict(status, success=False, errors=[], timed_out=True, poll=scheduler.stats())
+            await asyncio.sleep(delay)
+
+    async def watch_services(self, service_ids: Iterable[str], check_interval: Optional[float] = None,
+                             timeout: float = 1800) -> Dict[str, Dict[str, Any]]:
+        """Watch every service concurrently; returns one result per service"""
+        results = await asyncio.gather(*(self.watch_service(s, check_interval, timeout)
+                                         for s in service_ids))
+        return {r["service_id"]: r for r in results}
@@ -2,15 +2,22 @@ import os
 import requests
 import json
 from typing import Dict, Any, Optional
+from tools.http_session import pooled_session
+from tools.render_client import render_api_url, service_ids_from_env, summarize_deploy, IN_PROGRESS_STATUSES
+from tools.deploy_store import DeployHistory, open_history
+from tools.log_analyzer import needs_clean_build
+from tools.tracing import span
 
 class RenderTool:
-    def __init__(self):
+    def __init__(self, service_id: Optional[str] = None, session: Optional[requests.Session] = None,
+                 history: Optional[DeployHistory] = None):
         self.deploy_hook_url = os.getenv('RENDER_DEPLOY_HOOK_URL', '')
         self.api_token = os.getenv('RENDER_API_TOKEN', '')
-        self.service_id = os.getenv('RENDER_SERVICE_ID', '')
+        self.service_id = service_id or os.getenv('RENDER_SERVICE_ID') or next(iter(service_ids_from_env()), '')
         self.env = os.getenv('RENDER_ENV', 'production')
+        self.history = history if history is not None else open_history()
         
-        self.session = requests.Session()
+        self.session = session or pooled_session(self.api_token)
         if self.api_token:
             self.session.headers.update({
                 'Authorization': f'Bearer {self.api_token}',
@@ -44,7 +51,7 @@ class RenderTool:
                 'error': str(e)
             }
 
-    def deploy_via_api(self) -> Dict[str, Any]:
+    def deploy_via_api(self, commit_sha: Optional[str] = None, clear_cache: bool = False) -> Dict[str, Any]:
         """Deploy using Render API"""
         if not self.api_token or not self.service_id:
             return {
@@ -54,17 +61,19 @@ class RenderTool:
             }
         
         try:
-            # Get current deploy
-            url = f"https://api.render.com/v1/services/{self.service_id}/deploys"
+            url = f"{render_api_url()}/services/{self.service_id}/deploys"
+            # Keep the build cache unless a classified failure calls for a cold build
+            payload = {'clearCache': 'clear' if clear_cache else 'do_not_clear'}
+            if commit_sha:
+                payload['commitId'] = commit_sha
             
-            print(f"Triggering deploy via API for service: {self.service_id}")
-            response = self.session.post(url, json={
-                'clearCache': 'clear',
-                'commitSha': os.getenv('GIT_SHA', 'latest')
-            }, timeout=30)
+            print(f"Triggering deploy via API for service: {self.service_id} "
+                  f"(commit={commit_sha or 'branch HEAD'}, clearCache={payload['clearCache']})")
+            response = self.session.post(url, json=payload, timeout=30)
             response.raise_for_status()
             
             deploy_data = response.json()
+            self._record(deploy_data)
             return {
                 'success': True,
                 'method': 'api',
@@ -80,19 +89,84 @@ class RenderTool:
                 'error': str(e)
             }
 
-    def deploy(self) -> Dict[str, Any]:
-        """Try hook first, fallback to API"""
+    def find_redundant_deploy(self, commit_sha: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Return a result for an in-flight or live deploy that already covers commit_sha"""
+        if not self.api_token or not self.service_id:
+            return None
+        try:
+            url = f"{render_api_url()}/services/{self.service_id}/deploys"
+            response = self.session.get(url, params={'limit': 10}, timeout=30)
+            response.raise_for_status()
+            deploys = [summarize_deploy(d) for d in response.json()]
+        except Exception as e:
+            print(f"Could not check existing deploys: {e}")
+            return None
+        
+        for deploy in deploys:
+            same_commit = commit_sha is None or deploy['commit'] == commit_sha
+            if deploy['status'] in IN_PROGRESS_STATUSES and same_commit:
+                return {
+                    'success': True,
+                    'method': 'coalesced',
+                    'deploy_id': deploy['id'],
+                    'status': deploy['status'],
+                    'message': f"Deploy {deploy['id']} for {deploy['commit'] or 'latest'} already in progress"
+                }
+            if deploy['status'] == 'live':
+                if commit_sha and deploy['commit'] == commit_sha:
+                    return {
+                        'success': True,
+                        'method': 'skipped',
+                        'deploy_id': deploy['id'],
+                        'status': deploy['status'],
+                        'message': f"Commit {commit_sha} is already live"
+                    }
+                # Anything older than the live deploy is irrelevant
+                break
+        return None
+
+    def last_failure_needs_clean_build(self) -> bool:
+        """Whether the most recent finished deploy failed on a dependency/lockfile error"""
+        if not self.history or not self.service_id:
+            return False
+        recent = self.history.recent(self.service_id, limit=1)
+        if not recent or recent[0]['status'] == 'live':
+            return False
+        return needs_clean_build(self.history.errors_for(recent[0]['id']))
+
+    def deploy(self, commit_sha: Optional[str] = None, clear_cache: Optional[bool] = None,
+               force: bool = False) -> Dict[str, Any]:
+        """Skip or coalesce redundant deploys, then try hook first, fallback to API"""
+        with span('render.deploy', service_id=self.service_id, commit=commit_sha) as s:
+            result = self._deploy(commit_sha, clear_cache, force)
+            s.set(method=result.get('method'), status='ok' if result['success'] else 'error')
+        return result
+
+    def _deploy(self, commit_sha: Optional[str], clear_cache: Optional[bool], force: bool) -> Dict[str, Any]:
         print("Starting Render deployment...")
+        commit_sha = commit_sha or os.getenv('GIT_SHA') or None
+        
+        if not force:
+            existing = self.find_redundant_deploy(commit_sha)
+            if existing:
+                print(existing['message'])
+                return existing
         
-        # Try deploy hook first (faster and simpler)
-        if self.deploy_hook_url:
+        if clear_cache is None:
+            clear_cache = self.last_failure_needs_clean_build()
+            if clear_cache:
+                print("Last deploy failed on a dependency/lockfile error, clearing build cache")
+        
+        # Try deploy hook first (faster and simpler); it cannot pin a commit or clear the cache
+        can_use_api = bool(self.api_token and self.service_id)
+        if self.deploy_hook_url and not (can_use_api and (clear_cache or commit_sha)):
             result = self.deploy_via_hook()
             if result['success']:
                 return result
             print(f"Hook deployment failed: {result['error']}, trying API...")
         
         # Fallback to API
-        result = self.deploy_via_api()
+        result = self.deploy_via_api(commit_sha, clear_cache)
         if result['success']:
             return result
         
@@ -102,8 +176,40 @@ class RenderTool:
             'error': f"Hook failed: {result.get('error', 'unknown')}, API failed: {result.get('error', 'unknown')}"
         }
 
-    def get_deploy_status(self, deploy_id: str = None) -> Dict[str, Any]:
-        """Get deployment status"""
+    def _record(self, deploy_data: Dict[str, Any]):
+        """Write a deploy seen via the API into the history store"""
+        if self.history:
+            self.history.record(self.service_id, {
+                'id': deploy_data.get('id'),
+                'status': deploy_data.get('status'),
+                'commit': (deploy_data.get('commit') or {}).get('id') or deploy_data.get('commitSha'),
+                'created_at': deploy_data.get('createdAt'),
+                'finished_at': deploy_data.get('finishedAt')
+            })
+
+    def get_deploy_status(self, deploy_id: str = None, max_age: float = 0) -> Dict[str, Any]:
+        """Get deployment status, from the history store if observed within max_age seconds"""
+        with span('render.status', service_id=self.service_id, deploy_id=deploy_id) as s:
+            result = self._get_deploy_status(deploy_id, max_age)
+            s.set(deploy_status=result.get('status'), source=result.get('source', 'api'),
+                  status='ok' if result['success'] else 'error')
+        return result
+
+    def _get_deploy_status(self, deploy_id: Optional[str], max_age: float) -> Dict[str, Any]:
+        if not deploy_id and max_age and self.history:
+            cached = self.history.latest(self.service_id, max_age)
+            if cached:
+                return {
+                    'success': True,
+                    'deploy_id': cached['id'],
+                    'status': cached['status'],
+                    'commit_sha': cached['commit_sha'],
+                    'created_at': cached['created_at'],
+                    'finished_at': cached['finished_at'],
+                    'url': None,
+                    'source': 'history'
+                }
+        
         if not self.api_token or not self.service_id:
             return {
                 'success': False,
@@ -112,24 +218,23 @@ class RenderTool:
         
         try:
             if deploy_id:
-                url = f"https://api.render.com/v1/deploys/{deploy_id}"
+                url = f"{render_api_url()}/services/{self.service_id}/deploys/{deploy_id}"
+                response = self.session.get(url, timeout=30)
+                response.raise_for_status()
+                deploy_data = response.json()
             else:
-                url = f"https://api.render.com/v1/services/{self.service_id}/deploys"
-                response = self.session.get(url)
+                # The list already carries every field we report; no second round trip
+                url = f"{render_api_url()}/services/{self.service_id}/deploys"
+                response = self.session.get(url, params={'limit': 1}, timeout=30)
                 response.raise_for_status()
                 deploys = response.json()
-                if deploys:
-                    deploy_id = deploys[0]['id']
-                    url = f"https://api.render.com/v1/deploys/{deploy_id}"
-                else:
+                if not deploys:
                     return {
                         'success': False,
                         'error': 'No deployments found'
                     }
-            
-            response = self.session.get(url)
-            response.raise_for_status()
-            deploy_data = response.json()
+                deploy_data = deploys[0].get('deploy', deploys[0])
+            self._record(deploy_data)
             
             return {
                 'success': True,
@@ -1,15 +1,28 @@
-import os, re
+import os, re, time, threading
 from git import Repo
+from tools.tracing import span
+from tools.edit_engine import EditBatch, TOUCH_MARKER
+
+# Branch naming and `git worktree add` touch shared refs/config; serialize them
+_branch_lock = threading.Lock()
 
 class RepoTool:
-    def __init__(self, path:str='.') -> None:
+    def __init__(self, path:str='.', workdir:str=None) -> None:
         self.repo = Repo(path, search_parent_directories=True)
         self.remote = os.getenv('GIT_REMOTE','origin')
+        # Plan file paths are relative to the directory the agent runs from
+        self.workdir = workdir or os.getcwd()
+        self.log = print
+        # Repo-relative paths this task modified; staging and dirty checks are scoped to them
+        self.touched = set()
+        # The last applied EditBatch, kept until commit so a failed task can be undone
+        self.batch = None
+        self.full_scan = os.getenv('AGENT_FULL_SCAN', '').lower() in ('1', 'true', 'yes')
 
     def _slug(self, s:str):
         return re.sub(r'[^a-z0-9]+','-', s.lower()).strip('-')
 
-    def start_feature_branch(self, title:str):
+    def _new_branch_name(self, title:str):
         base = f"agent/{self._slug(title)}"
         existing = {h.name for h in self.repo.heads}
         branch = base
@@ -17,23 +30,110 @@ class RepoTool:
         while branch in existing:
             branch = f"{base}-{i}"
             i += 1
-        if self.repo.is_dirty(untracked_files=True):
+        return branch
+
+    def head(self):
+        """Commit SHA checked out, or None in a repo without commits"""
+        try:
+            return self.repo.head.commit.hexsha
+        except ValueError:
+            return None
+
+    def track(self, paths):
+        """Record paths (relative to workdir or absolute) as modified by the current task"""
+        for p in paths:
+            full = os.path.join(self.workdir, p)
+            self.touched.add(os.path.relpath(full, self.repo.working_tree_dir))
+
+    def _pending(self, full_scan:bool=None):
+        """(paths still to stage, whether anything is staged); paths is None for 'everything' (full-tree scan)"""
+        if full_scan or (full_scan is None and self.full_scan):
+            return (None, True) if self.repo.is_dirty(untracked_files=True) else ([], False)
+        if not self.touched:
+            return [], False
+        out = self.repo.git.status('--porcelain', '-z', '--untracked-files=all', '--', *sorted(self.touched))
+        entries, paths, staged = iter(out.split('\0')), set(), False
+        for e in entries:
+            if not e: continue
+            # Edits applied by EditBatch are already in the index (worktree column blank)
+            if e[1] != ' ': paths.add(e[3:])
+            if e[0] not in ' ?': staged = True
+            if e[0] in 'RC': next(entries, None)  # skip the rename source
+        return sorted(paths), staged
+
+    def _stage_and_commit(self, message:str, full_scan:bool=None):
+        pending, staged = self._pending(full_scan)
+        if pending is None:
             self.repo.git.add(all=True)
-            self.repo.index.commit(f"chore(agent): save work before branching {branch}")
-        self.repo.git.checkout('HEAD', b=branch)
+        elif pending:
+            self.repo.git.add('--all', '--', *pending)
+        elif not staged:
+            return False
+        self.repo.index.commit(message)
+        self.touched.clear()
+        self.batch = None
+        return True
+
+    def start_feature_branch(self, title:str, full_scan:bool=None):
+        with span('git.branch', title=title) as s:
+            branch = self._new_branch_name(title)
+            self._stage_and_commit(f"chore(agent): save work before branching {branch}", full_scan)
+            self.repo.git.checkout('HEAD', b=branch)
+            s.set(branch=branch)
         return branch
 
-    def apply_minimal_edits(self, files):
-        for f in files:
-            d = os.path.dirname(f)
-            if d and not os.path.exists(d): os.makedirs(d, exist_ok=True)
-            with open(f,'a') as fh: fh.write("\n// agent touch\n")
+    def add_worktree(self, title:str, root:str):
+        """Create a branch for `title` checked out in its own worktree under `root`"""
+        with span('git.worktree_add', title=title) as s, _branch_lock:
+            branch = self._new_branch_name(title)
+            path = os.path.join(root, branch.replace('/', '-'))
+            self.repo.git.worktree('add', '-b', branch, path, 'HEAD')
+            s.set(branch=branch)
+        rel = os.path.relpath(self.workdir, self.repo.working_tree_dir)
+        return branch, RepoTool(path, workdir=os.path.normpath(os.path.join(path, rel)))
 
-    def commit_all(self, message:str):
-        self.repo.git.add(all=True)
-        if self.repo.is_dirty(untracked_files=True):
-            self.repo.index.commit(message)
-        try:
-            self.repo.git.push(self.remote, self.repo.active_branch.name, set_upstream=True)
-        except Exception as e:
-            print(f"Push failed: {e}")
+    def remove_worktree(self, tool:'RepoTool'):
+        with span('git.worktree_remove'), _branch_lock:
+            self.repo.git.worktree('remove', '--force', tool.repo.working_tree_dir)
+
+    def apply_minimal_edits(self, files, edits=None):
+        """Apply a task's structured edits (see EditBatch) in one validated, atomic, indexed batch.
+
+        Without `edits` each listed file gets the touch marker appended. Raises
+        EditError, leaving the tree untouched, if any edit doesn't apply.
+        """
+        edits = list(edits or []) or [{'op': 'insert', 'path': f, 'text': TOUCH_MARKER} for f in files]
+        with span('git.edit', edits=len(edits)) as s:
+            batch = EditBatch(self.repo.working_tree_dir, self.workdir)
+            batch.stage(edits)
+            changed = batch.apply()
+            s.set(files=len(changed))
+        self.batch = batch
+        self.touched.update(changed)
+        return changed
+
+    def revert_edits(self):
+        """Undo the last apply_minimal_edits in the work tree and index (before it is committed)"""
+        if self.batch is None:
+            return False
+        with span('git.revert', files=len(self.batch.changed)):
+            self.batch.rollback()
+        self.touched.difference_update(self.batch.changed)
+        self.batch = None
+        return True
+
+    def commit_all(self, message:str, full_scan:bool=None, deadline:float=None):
+        """Stage and commit the task's tracked paths (the whole tree only if full_scan), then push.
+
+        `deadline` (a time.monotonic() value) bounds the push; git is killed when it passes.
+        """
+        with span('git.commit') as s:
+            s.set(committed=self._stage_and_commit(message, full_scan))
+        branch = self.repo.active_branch.name
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 1)
+        with span('git.push', remote=self.remote, branch=branch) as s:
+            try:
+                self.repo.git.push(self.remote, branch, set_upstream=True, kill_after_timeout=timeout)
+            except Exception as e:
+                s.set(status='error', error=str(e))
+                self.log(f"Push failed: {e}")
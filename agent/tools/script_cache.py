@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from typing import Dict, Any, Iterable, Optional
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generated or vendored trees never count as inputs
+SKIP_DIRS = {'node_modules', 'dist', 'build', '.git', '.cache', 'coverage',
+             'playwright-report', 'test-results', '__pycache__'}
+
+# Shared inputs every package build depends on, relative to the repo root
+SHARED_INPUTS = ('shared', 'db', 'package.json', 'package-lock.json', 'tsconfig.json')
+ROOT_MANIFESTS = ('package.json', 'package-lock.json', 'tsconfig.json')
+
+MAX_OUTPUT_CHARS = 256 * 1024
+
+
+def find_repo_root(start: str) -> str:
+    path = os.path.abspath(start)
+    while not os.path.exists(os.path.join(path, '.git')):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return os.path.abspath(start)
+        path = parent
+    return path
+
+
+def _atomic_write_json(path: str, data):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'w') as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+class InputHasher:
+    """Content hash of a set of files/directories.
+
+    File digests are memoised by (size, mtime_ns), so after the first run only
+    files that actually changed are re-read. Entries for files that no longer
+    exist (e.g. removed worktrees) are pruned on load and whenever the memo
+    has doubled since the last prune. Use ``shared`` to get the one hasher
+    for a memo file, so concurrent users don't overwrite each other's saves.
+    """
+
+    _shared: Dict[str, 'InputHasher'] = {}
+    _shared_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, memo_path: str) -> 'InputHasher':
+        memo_path = os.path.abspath(memo_path)
+        with cls._shared_lock:
+            if memo_path not in cls._shared:
+                cls._shared[memo_path] = cls(memo_path)
+            return cls._shared[memo_path]
+
+    def __init__(self, memo_path: Optional[str] = None):
+        self.memo_path = memo_path
+        self._lock = threading.Lock()
+        self._memo: Dict[str, list] = {}
+        self._dirty = False
+        if memo_path and os.path.exists(memo_path):
+            try:
+                with open(memo_path) as fh:
+                    self._memo = json.load(fh)
+            except (OSError, ValueError):
+                self._memo = {}
+        self.prune()
+
+    def prune(self) -> int:
+        """Forget files that no longer exist; returns how many were dropped"""
+        with self._lock:
+            paths = list(self._memo)
+        gone = [p for p in paths if not os.path.exists(p)]
+        with self._lock:
+            for p in gone:
+                self._memo.pop(p, None)
+            self._pruned_size = len(self._memo)
+            self._dirty = self._dirty or bool(gone)
+        return len(gone)
+
+    def _file_digest(self, path: str, st: os.stat_result) -> str:
+        with self._lock:
+            memo = self._memo.get(path)
+        if memo and memo[0] == st.st_size and memo[1] == st.st_mtime_ns:
+            return memo[2]
+        h = hashlib.sha1()
+        with open(path, 'rb') as fh:
+            for block in iter(lambda: fh.read(1 << 20), b''):
+                h.update(block)
+        digest = h.hexdigest()
+        with self._lock:
+            self._memo[path] = [st.st_size, st.st_mtime_ns, digest]
+            self._dirty = True
+        return digest
+
+    def _files(self, root: str):
+        if os.path.isfile(root):
+            yield root
+            return
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS)
+            for name in sorted(filenames):
+                yield os.path.join(dirpath, name)
+
+    def hash_inputs(self, roots: Iterable[str], base: str) -> str:
+        h = hashlib.sha256()
+        for root in roots:
+            if not os.path.exists(root):
+                continue
+            for path in self._files(root):
+                try:
+                    st = os.stat(path)
+                    digest = self._file_digest(path, st)
+                except OSError:
+                    continue
+                h.update(f"{os.path.relpath(path, base)}\0{digest}\n".encode())
+        return h.hexdigest()
+
+    def save(self):
+        if not (self.memo_path and self._dirty):
+            return
+        if len(self._memo) > 2 * max(self._pruned_size, 1000):
+            self.prune()
+        with self._lock:
+            snapshot, self._dirty = dict(self._memo), False
+        _atomic_write_json(self.memo_path, snapshot)
+
+
+class ScriptCache:
+    """On-disk cache of npm script results keyed by script name + input hash, LRU-evicted by size"""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.getenv('AGENT_SCRIPT_CACHE_DIR') or os.path.join(AGENT_DIR, '.cache', 'npm-scripts')
+        self.max_bytes = max_bytes or int(float(os.getenv('AGENT_SCRIPT_CACHE_MAX_MB', '50')) * 1024 * 1024)
+        self.entries_dir = os.path.join(self.cache_dir, 'entries')
+        os.makedirs(self.entries_dir, exist_ok=True)
+        self.hasher = InputHasher.shared(os.path.join(self.cache_dir, 'stat-memo.json'))
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, script: str, package_dir: str, inputs: Optional[Iterable[str]] = None) -> str:
+        """Cache key for running `script` in `package_dir` against its current inputs.
+
+        `inputs` narrows the hashed trees (e.g. to the packages a root-hosted
+        ``build:server`` reads); root manifests are always included.
+        """
+        package_dir = os.path.abspath(package_dir)
+        root = find_repo_root(package_dir)
+        if inputs is not None:
+            roots = sorted(inputs) + [os.path.join(root, p) for p in ROOT_MANIFESTS]
+        else:
+            roots = [package_dir] + [os.path.join(root, p) for p in SHARED_INPUTS
+                                     if not os.path.join(root, p).startswith(package_dir + os.sep)]
+        inputs = self.hasher.hash_inputs(roots, root)
+        self.hasher.save()
+        return hashlib.sha256(f"{script}\0{os.path.relpath(package_dir, root)}\0{inputs}".encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.entries_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path) as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        os.utime(path)  # mark as recently used
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, returncode: int, output: str):
+        _atomic_write_json(self._path(key), {
+            'returncode': returncode,
+            'output': output[-MAX_OUTPUT_CHARS:],
+            'created_at': time.time()
+        })
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.entries_dir):
+            try:
+                st = os.stat(os.path.join(self.entries_dir, name))
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.entries_dir, name))
+                total -= size
+            except OSError:
+                pass
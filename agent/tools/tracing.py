@@ -0,0 +1,218 @@
+"""Phase-level spans to JSONL plus Prometheus-text metrics; a no-op unless AGENT_TRACE is set.
+
+    with span('npm', script='build', dir='server') as s:
+        ...
+        s.set(returncode=code)
+
+Spans nest per thread; work handed to a thread pool through
+``in_current_context(fn)`` nests under the span that submitted it. Every finished span is one JSON line in
+``agent/logs/trace.jsonl`` and feeds ``agent_span_seconds`` (histogram) and
+``agent_span_total`` (counter) in ``agent/logs/metrics.prom``.
+"""
+import os
+import json
+import time
+import uuid
+import atexit
+import tempfile
+import threading
+import contextvars
+from urllib.parse import urlsplit
+from typing import Dict, Any, Optional
+
+AGENT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_current: contextvars.ContextVar = contextvars.ContextVar('agent_span', default=None)
+
+
+def _enabled_from_env() -> bool:
+    return os.getenv('AGENT_TRACE', '').lower() in ('1', 'true', 'yes', 'on')
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        return self
+
+
+NOOP = _NoopSpan()
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'trace_id', 'span_id', 'parent_id', 'start', '_t0', '_token', 'tracer')
+
+    def __init__(self, tracer: 'Tracer', name: str, attrs: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        parent = _current.get()
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = uuid.uuid4().hex[:16]
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+        return self
+
+    def __enter__(self):
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._t0
+        _current.reset(self._token)
+        status = 'error' if exc_type else self.attrs.pop('status', 'ok')
+        if exc_type:
+            self.attrs['error'] = f"{exc_type.__name__}: {exc}"
+        self.tracer.emit(self.name, self.start, duration, status, self.attrs,
+                         self.trace_id, self.span_id, self.parent_id)
+        return False
+
+
+class Tracer:
+    def __init__(self, trace_path: Optional[str] = None, metrics_path: Optional[str] = None,
+                 flush_interval: float = 5.0):
+        self.trace_path = trace_path or os.getenv('AGENT_TRACE_FILE') or os.path.join(AGENT_DIR, 'logs', 'trace.jsonl')
+        self.metrics_path = metrics_path or os.getenv('AGENT_METRICS_FILE') or os.path.join(AGENT_DIR, 'logs', 'metrics.prom')
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._fh = None
+        self._hist: Dict[tuple, list] = {}   # (name, status) -> [bucket counts..., sum, count]
+        self._bytes: Dict[str, int] = {}
+        self._last_flush = 0.0
+        atexit.register(self.flush)
+
+    def span(self, name: str, **attrs) -> Span:
+        return Span(self, name, attrs)
+
+    def emit(self, name: str, start: float, duration: float, status: str, attrs: Dict[str, Any],
+             trace_id: Optional[str] = None, span_id: Optional[str] = None, parent_id: Optional[str] = None):
+        record = {'name': name, 'start': round(start, 6), 'duration': round(duration, 6), 'status': status,
+                  'trace_id': trace_id, 'span_id': span_id or uuid.uuid4().hex[:16], 'parent_id': parent_id,
+                  'thread': threading.current_thread().name, 'attrs': attrs}
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            if self._fh is None:
+                os.makedirs(os.path.dirname(self.trace_path), exist_ok=True)
+                self._fh = open(self.trace_path, 'a', buffering=1)
+            self._fh.write(line)
+            hist = self._hist.setdefault((name, status), [0] * (len(BUCKETS) + 2))
+            for i, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    hist[i] += 1
+            hist[-2] += duration
+            hist[-1] += 1
+            if attrs.get('bytes'):
+                self._bytes[name] = self._bytes.get(name, 0) + int(attrs['bytes'])
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def record(self, name: str, duration: float, status: str = 'ok', **attrs):
+        """Emit an already-timed span (e.g. from a response hook) under the current span"""
+        parent = _current.get()
+        self.emit(name, time.time() - duration, duration, status, attrs,
+                  parent.trace_id if parent else None, None, parent.span_id if parent else None)
+
+    def prometheus_text(self) -> str:
+        lines = ['# HELP agent_span_seconds Duration of agent pipeline phases and calls',
+                 '# TYPE agent_span_seconds histogram']
+        with self._lock:
+            hist = {k: list(v) for k, v in self._hist.items()}
+            sent = dict(self._bytes)
+        for (name, status), h in sorted(hist.items()):
+            labels = f'name="{name}",status="{status}"'
+            for bound, n in zip(BUCKETS, h):
+                lines.append(f'agent_span_seconds_bucket{{{labels},le="{bound}"}} {n}')
+            lines.append(f'agent_span_seconds_bucket{{{labels},le="+Inf"}} {h[-1]}')
+            lines.append(f'agent_span_seconds_sum{{{labels}}} {h[-2]:.6f}')
+            lines.append(f'agent_span_seconds_count{{{labels}}} {h[-1]}')
+        lines += ['# HELP agent_span_total Finished spans by outcome', '# TYPE agent_span_total counter']
+        lines += [f'agent_span_total{{name="{n}",status="{s}"}} {h[-1]}' for (n, s), h in sorted(hist.items())]
+        lines += ['# HELP agent_bytes_total Bytes transferred by span name', '# TYPE agent_bytes_total counter']
+        lines += [f'agent_bytes_total{{name="{n}"}} {b}' for n, b in sorted(sent.items())]
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._hist:
+            return
+        os.makedirs(os.path.dirname(self.metrics_path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.metrics_path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(self.prometheus_text())
+        os.replace(tmp, self.metrics_path)
+
+
+_tracer: Optional[Tracer] = None
+_checked = False
+_tracer_lock = threading.Lock()
+
+
+def tracer() -> Optional[Tracer]:
+    """The process-wide tracer, or None when tracing is disabled.
+
+    AGENT_TRACE is read on first use (after .env is loaded), not at import.
+    """
+    global _tracer, _checked
+    if not _checked:
+        with _tracer_lock:
+            if not _checked:
+                _tracer = Tracer() if _enabled_from_env() else None
+                _checked = True
+    return _tracer
+
+
+def span(name: str, **attrs):
+    """Context manager timing one phase; a shared no-op object when tracing is off"""
+    t = _tracer if _checked else tracer()
+    return t.span(name, **attrs) if t else NOOP
+
+
+def in_current_context(fn):
+    """``fn`` wrapped to run in a copy of the caller's context, e.g. for ThreadPoolExecutor.map.
+
+    Pool threads don't inherit context variables, so without this their spans
+    would start new traces instead of nesting under the current span.
+    """
+    parent = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        # One copy per call: a context can't be entered by two threads at once
+        return parent.copy().run(fn, *args, **kwargs)
+    return run
+
+
+def _response_hook(response, *args, **kwargs):
+    t = tracer()
+    if t is None:
+        return response
+    url = urlsplit(response.url)
+    size = response.headers.get('Content-Length')
+    if size is None and not kwargs.get('stream'):
+        # requests reads an unstreamed body right after the hooks anyway; streamed
+        # bodies are left alone and counted by the span that consumes them
+        size = len(response.content)
+    t.record('http', response.elapsed.total_seconds(),
+             'ok' if response.status_code < 400 else 'error',
+             method=response.request.method, host=url.netloc, path=url.path,
+             http_status=response.status_code, bytes=int(size) if size else 0)
+    return response
+
+
+def instrument_session(session):
+    """Record an `http` span for every response the session receives"""
+    if _enabled_from_env() and _response_hook not in session.hooks['response']:
+        session.hooks['response'].append(_response_hook)
+    return session